@@ -1,6 +1,16 @@
 from __future__ import annotations
+import math
+import numpy as np
+import pandas as pd
 from flask import Blueprint, request, jsonify, current_app
-from services.weather_service import request_seven_day_observations, extract_weather, prepare_weather_week
+from services.weather_service import (
+    WEATHER_FILL_VALUES,
+    fetch_observations_concurrently,
+    load_station_catalog,
+    request_seven_day_observations,
+)
+from src.api_helpers import nearest_station_url
+from src.features import build_feature_matrix
 
 FEATURE_NAMES = [
     'temperature_day0', 'temperature_day1', 'temperature_day2',
@@ -28,26 +38,47 @@ FEATURE_NAMES = [
 
 bp_predict = Blueprint("predict", __name__)
 
+
+def _predictor(payload: dict):
+    """Model named in the payload (or the registry default) and the feature columns it was trained on."""
+    predictor = current_app.extensions["model_registry"].get(payload.get("model"))
+    return predictor, predictor.feature_columns or FEATURE_NAMES
+
 @bp_predict.post("/api/v1/predict/fire_single_station")
 def predict_fire():
     payload = request.get_json(silent=True) or {}
 
+    station_url = payload.get("station_url")
+    if not station_url and "latitude" in payload and "longitude" in payload:
+        # Nearest station from the local index; /points only for areas it doesn't cover
+        try:
+            lat, lon = float(payload["latitude"]), float(payload["longitude"])
+        except (TypeError, ValueError):
+            return jsonify({"error": "latitude and longitude must be numbers"}), 400
+        station_url = nearest_station_url(lat, lon, index=current_app.extensions.get("station_index"))
+        if not station_url:
+            return jsonify({"error": f"No weather station found near {lat}, {lon}"}), 404
+    if not station_url:
+        return jsonify({"error": "station_url or latitude/longitude must be specified"}), 400
+
     try:
-        station_url = payload.get("station_url")
-    except (ValueError):
-        return jsonify({"error": "station_url must be specified"}), 400
+        predictor, feature_columns = _predictor(payload)
+    except KeyError as e:
+        return jsonify({"error": str(e.args[0])}), 400
+    except RuntimeError as e:
+        # Model failed to load (and failed again on retry)
+        return jsonify({"error": str(e)}), 503
 
     weather_api_response = request_seven_day_observations(station_url)
-    print("Hello")
-    print(weather_api_response)
 
     try:
-        weather_data  = extract_weather(weather_api_response)
-        weather_prepared = prepare_weather_week(weather_data)
-
-        predictor = current_app.extensions["rf_predictor"]
-
-        prediction = predictor.predict_proba_one(weather_prepared[FEATURE_NAMES].to_numpy())
+        features = build_feature_matrix(
+            [weather_api_response],
+            feature_columns,
+            dtype=np.float64,
+            fill_value=WEATHER_FILL_VALUES,
+        )
+        prediction = predictor.predict_proba_one(features)
     except Exception as e:
         return jsonify({"error": f"Error processing weather data: {str(e)}"}), 500
 
@@ -62,3 +93,109 @@ def predict_fire():
                         },
                     "fire_message": fire_message.format(station_url=station_url)
                     }), 200
+
+
+def _resolve_stations(payload: dict, max_stations: int) -> pd.DataFrame:
+    """
+    Pick the stations for a batch request from station_urls, bbox and/or
+    n_stations. Returns a frame indexed by station_url with latitude/longitude
+    (NaN for URLs that are not in the station catalog).
+    """
+    catalog = load_station_catalog(str(current_app.config["STATIONS_DIR"]))
+
+    n_stations = payload.get("n_stations")
+    if n_stations is not None:
+        try:
+            n_stations = int(n_stations)
+        except (TypeError, ValueError):
+            raise ValueError("n_stations must be an integer")
+        if not 0 < n_stations <= max_stations:
+            raise ValueError(f"n_stations must be between 1 and {max_stations}")
+
+    station_urls = payload.get("station_urls")
+    bbox = payload.get("bbox")
+    if station_urls is not None:
+        if not isinstance(station_urls, list) or not all(isinstance(u, str) for u in station_urls):
+            raise ValueError("station_urls must be a list of station URL strings")
+        station_urls = list(dict.fromkeys(u.rstrip("/") for u in station_urls))
+        stations = catalog.reindex(station_urls)
+    elif bbox is not None:
+        try:
+            min_lat, max_lat = float(bbox["min_lat"]), float(bbox["max_lat"])
+            min_lon, max_lon = float(bbox["min_lon"]), float(bbox["max_lon"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("bbox must have numeric min_lat, max_lat, min_lon and max_lon")
+        stations = catalog[
+            catalog["latitude"].between(min_lat, max_lat) & catalog["longitude"].between(min_lon, max_lon)
+        ]
+    elif n_stations is not None:
+        stations = catalog
+    else:
+        raise ValueError("one of station_urls, bbox or n_stations must be specified")
+
+    if n_stations is not None:
+        stations = stations.head(n_stations)
+    if len(stations) > max_stations:
+        raise ValueError(f"at most {max_stations} stations can be scored per request, got {len(stations)}")
+    return stations
+
+
+def _coord(value):
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+@bp_predict.post("/api/v1/predict/weather")
+def predict_fire_batch():
+    payload = request.get_json(silent=True) or {}
+
+    try:
+        stations = _resolve_stations(payload, current_app.config["BATCH_MAX_STATIONS"])
+        predictor, feature_columns = _predictor(payload)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except KeyError as e:
+        return jsonify({"error": str(e.args[0])}), 400
+    except RuntimeError as e:
+        # Model failed to load (and failed again on retry)
+        return jsonify({"error": str(e)}), 503
+
+    observations, fetch_errors = fetch_observations_concurrently(
+        list(stations.index), max_workers=current_app.config["BATCH_MAX_WORKERS"]
+    )
+    scored_urls = [url for url in stations.index if url in observations]
+
+    try:
+        features = build_feature_matrix(
+            [observations[url] for url in scored_urls],
+            feature_columns,
+            dtype=np.float64,
+            fill_value=WEATHER_FILL_VALUES,
+        )
+        predictions = predictor.predict_proba_batch(features)
+    except Exception as e:
+        return jsonify({"error": f"Error scoring weather data: {str(e)}"}), 500
+
+    results = []
+    for url, prediction in zip(scored_urls, predictions):
+        results.append({
+            "station": url,
+            "station_url": url,
+            "latitude": _coord(stations.at[url, "latitude"]),
+            "longitude": _coord(stations.at[url, "longitude"]),
+            "prediction": {
+                "wildfire_probability": prediction.wildfire_probability,
+                "model_version": prediction.model_version,
+                "threshold": prediction.threshold,
+                "label": prediction.label
+            },
+        })
+    results.sort(key=lambda r: r["prediction"]["wildfire_probability"], reverse=True)
+
+    errors = [{"station_url": url, "error": fetch_errors[url]} for url in stations.index if url in fetch_errors]
+
+    return jsonify({"requested": len(stations),
+                    "scored": len(results),
+                    "results": results,
+                    "errors": errors
+                    }), 200
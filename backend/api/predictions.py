@@ -0,0 +1,48 @@
+from __future__ import annotations
+from flask import Blueprint, request, jsonify, current_app
+
+bp_predictions = Blueprint("predictions", __name__)
+
+def _snapshot():
+    return current_app.extensions["prediction_snapshots"].current
+
+@bp_predictions.get("/api/v1/predictions/latest")
+def latest_predictions():
+    snapshot = _snapshot()
+    if snapshot is None:
+        return jsonify({"error": "no precomputed predictions available yet"}), 503
+
+    try:
+        limit = request.args.get("limit", type=int)
+        min_probability = float(request.args.get("min_probability", 0.0))
+    except ValueError:
+        return jsonify({"error": "min_probability must be a number"}), 400
+    if limit is not None and limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+
+    results = snapshot.top(limit=limit, min_probability=min_probability)
+    return jsonify({"as_of": snapshot.as_of,
+                    "source": snapshot.source,
+                    "count": len(results),
+                    "results": results
+                    }), 200
+
+@bp_predictions.get("/api/v1/predictions/station")
+def station_prediction():
+    station_url = request.args.get("station_url")
+    if not station_url:
+        return jsonify({"error": "station_url must be specified"}), 400
+
+    snapshot = _snapshot()
+    if snapshot is None:
+        return jsonify({"error": "no precomputed predictions available yet"}), 503
+
+    result = snapshot.by_station.get(station_url.rstrip("/"))
+    if result is None:
+        return jsonify({"error": f"no prediction for {station_url} in {snapshot.source}",
+                        "as_of": snapshot.as_of}), 404
+
+    return jsonify({"as_of": snapshot.as_of,
+                    "source": snapshot.source,
+                    "result": result
+                    }), 200
@@ -2,9 +2,7 @@ from __future__ import annotations
 from flask import Blueprint, request, jsonify, current_app, send_from_directory
 from services.satellite_images import (
     SatelliteRequest,
-    build_filename,
-    get_satellite_image_bytes,
-    save_image_bytes,
+    get_satellite_tile,
 )
 
 bp_sat = Blueprint("satellite", __name__)
@@ -33,12 +31,11 @@ def satellite_image():
     req_obj = SatelliteRequest(lat=lat, lon=lon, zoom=zoom, fmt=("jpg" if fmt == "jpeg" else fmt))
 
     try:
-        img_bytes = get_satellite_image_bytes(req_obj)
+        out_path, cache_hit = get_satellite_tile(req_obj, current_app.extensions["tile_cache"])
     except Exception as exc:
         return jsonify({"error": str(exc)}), 502
 
-    filename = build_filename(req_obj)
-    out_path = save_image_bytes(current_app.config["IMAGE_DIR"], filename, img_bytes)
+    filename = out_path.name
 
     if return_image:
         return send_from_directory(
@@ -53,7 +50,8 @@ def satellite_image():
         "zoom": zoom,
         "format": req_obj.fmt,
         "filename": filename,
-        "path": str(out_path.as_posix())
+        "path": str(out_path.as_posix()),
+        "cache_hit": cache_hit
     }), 200
 
 @bp_sat.get("/api/v1/satellite/image/<path:filename>")
@@ -0,0 +1,82 @@
+from __future__ import annotations
+import hashlib
+import math
+from flask import Blueprint, request, jsonify, current_app
+from services.station_catalog import BBox, CLUSTER_MAX_ZOOM
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+MAX_ZOOM = 22  # deepest web map zoom
+
+bp_stations = Blueprint("stations", __name__)
+
+
+def _bbox(args):
+    """BBox from min_lat/max_lat/min_lon/max_lon, or from bbox=min_lon,min_lat,max_lon,max_lat; None if absent."""
+    if "bbox" in args:
+        try:
+            min_lon, min_lat, max_lon, max_lat = (float(v) for v in args["bbox"].split(","))
+        except ValueError:
+            raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+        bbox = BBox(min_lat, max_lat, min_lon, max_lon)
+    else:
+        keys = ("min_lat", "max_lat", "min_lon", "max_lon")
+        if not any(k in args for k in keys):
+            return None
+        try:
+            bbox = BBox(*(float(args[k]) for k in keys))
+        except (KeyError, ValueError):
+            raise ValueError("min_lat, max_lat, min_lon and max_lon must all be numbers")
+
+    # float() also accepts nan and inf, which the grid lookup can't index
+    if not all(math.isfinite(v) for v in (bbox.min_lat, bbox.max_lat, bbox.min_lon, bbox.max_lon)):
+        raise ValueError("bbox coordinates must be finite numbers")
+    if not -90 <= bbox.min_lat <= bbox.max_lat <= 90:
+        raise ValueError("latitudes must satisfy -90 <= min_lat <= max_lat <= 90")
+    if not -180 <= bbox.min_lon <= bbox.max_lon <= 180:
+        raise ValueError("longitudes must satisfy -180 <= min_lon <= max_lon <= 180")
+    return bbox
+
+
+@bp_stations.get("/stations")
+@bp_stations.get("/api/v1/stations")
+def list_stations():
+    catalog = current_app.extensions["station_catalog"].current
+    if catalog is None:
+        return jsonify({"error": "station catalog not available"}), 503
+
+    try:
+        bbox = _bbox(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        zoom = int(request.args["zoom"]) if "zoom" in request.args else None
+        limit = int(request.args.get("limit", DEFAULT_LIMIT))
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({"error": "zoom, limit and offset must be integers"}), 400
+    if zoom is not None and not 0 <= zoom <= MAX_ZOOM:
+        return jsonify({"error": f"zoom must be between 0 and {MAX_ZOOM}"}), 400
+    if not 0 < limit <= MAX_LIMIT or offset < 0:
+        return jsonify({"error": f"limit must be between 1 and {MAX_LIMIT} and offset non-negative"}), 400
+
+    positions = catalog.select(bbox)
+    body = {"source": catalog.source, "total": int(len(positions))}
+    if zoom is not None and zoom < CLUSTER_MAX_ZOOM:
+        # Zoomed out: one marker per cluster, the whole view at once
+        clusters = catalog.clusters(positions, zoom)
+        body.update({"zoom": zoom, "count": len(clusters), "clusters": clusters})
+    else:
+        page = positions[offset:offset + limit]
+        next_offset = offset + limit if offset + limit < len(positions) else None
+        body.update({"offset": offset, "limit": limit, "next_offset": next_offset,
+                     "count": int(len(page)), "stations": catalog.stations(page)})
+
+    # Same catalog + same query -> same body, so clients can revalidate cheaply
+    response = jsonify(body)
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.args.items(multi=True)))
+    response.set_etag(f"{catalog.version}-{hashlib.sha1(query.encode()).hexdigest()[:12]}")
+    response.last_modified = catalog.last_modified
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
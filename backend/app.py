@@ -1,9 +1,16 @@
 from __future__ import annotations
 from flask import Flask, jsonify
 from config import Config, ensure_dirs
-from services.model import RandomForestPredictor
+from services.model import ModelRegistry, parse_model_specs
 from api.predict import bp_predict
 from api.satellite import bp_sat
+from api.predictions import bp_predictions
+from api.stations import bp_stations
+from services.prediction_snapshot import SnapshotStore
+from services.satellite_images import TileCache
+from services.station_catalog import StationCatalogStore
+from src import http_client
+from src.station_index import load_station_index
 
 def create_app() -> Flask:
     cfg = Config()
@@ -15,20 +22,47 @@ def create_app() -> Flask:
         MODEL_VERSION=cfg.MODEL_VERSION,
         IMAGE_DIR=cfg.IMAGE_DIR,
         MAX_CONTENT_LENGTH=cfg.MAX_CONTENT_LENGTH,
+        STATIONS_DIR=cfg.STATIONS_DIR,
+        BATCH_MAX_STATIONS=cfg.BATCH_MAX_STATIONS,
+        BATCH_MAX_WORKERS=cfg.BATCH_MAX_WORKERS,
     )
 
-    # Load predictor (lazy-load model file on first use)
-    app.extensions["rf_predictor"] = RandomForestPredictor(
-        model_path=app.config["MODEL_PATH"],
-        model_version=app.config["MODEL_VERSION"],
-    )
+    # Load and warm up every model before the first request; artifacts are hot-reloaded on change
+    models = {cfg.MODEL_VERSION: cfg.MODEL_PATH}
+    models.update(parse_model_specs(cfg.EXTRA_MODELS))
+    registry = ModelRegistry(models, default=cfg.MODEL_VERSION)
+    registry.start(reload_seconds=cfg.MODEL_RELOAD_SECONDS)
+    app.extensions["model_registry"] = registry
+
+    # Nearest-station lookups for lat/lon requests, answered locally instead of via /points
+    try:
+        app.extensions["station_index"] = load_station_index(cfg.STATION_INDEX_CSVS.split(","))
+    except (OSError, ValueError) as e:
+        print(f"Station index unavailable, lat/lon requests will use /points: {e}")
+        app.extensions["station_index"] = None
+
+    app.extensions["tile_cache"] = TileCache(cfg.IMAGE_DIR, max_bytes=cfg.TILE_CACHE_MAX_BYTES)
+
+    # Station catalog served to the map by /stations; reloaded when STATIONS_DIR changes
+    app.extensions["station_catalog"] = StationCatalogStore(cfg.STATIONS_DIR)
+
+    # Latest sweep output, held in memory and swapped when a new CSV lands
+    snapshots = SnapshotStore(cfg.PREDICTIONS_DIR, refresh_seconds=cfg.SNAPSHOT_REFRESH_SECONDS)
+    snapshots.start()
+    app.extensions["prediction_snapshots"] = snapshots
 
     app.register_blueprint(bp_predict)
     app.register_blueprint(bp_sat)
+    app.register_blueprint(bp_predictions)
+    app.register_blueprint(bp_stations)
 
     @app.get("/health")
     def health():
-        return jsonify({"status": "ok"}), 200
+        return jsonify({"status": "ok",
+                        "http": http_client.connection_stats(),
+                        "models": app.extensions["model_registry"].stats(),
+                        "tile_cache": app.extensions["tile_cache"].stats()
+                        }), 200
 
     return app
 
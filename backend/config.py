@@ -4,11 +4,28 @@ from pathlib import Path
 
 @dataclass(frozen=True)
 class Config:
-    MODEL_PATH: Path = Path(os.getenv("MODEL_PATH", "data/models/rf.joblib"))
-    MODEL_VERSION: str = os.getenv("MODEL_VERSION", "rf_timeseries")
+    # Default model; served when a request doesn't name one
+    MODEL_PATH: Path = Path(os.getenv("MODEL_PATH", "data/models/unbalanced_xgb_model.joblib"))
+    MODEL_VERSION: str = os.getenv("MODEL_VERSION", "unbalanced_xgb")
+    # Extra versions kept loaded next to the default, as "name=path,name=path"
+    EXTRA_MODELS: str = os.getenv("EXTRA_MODELS", "balanced_xgb=data/models/balanced_xgb_model.joblib")
+    # How often artifacts are checked for changes (0 disables hot reload)
+    MODEL_RELOAD_SECONDS: float = float(os.getenv("MODEL_RELOAD_SECONDS", "30"))
 
     IMAGE_DIR: Path = Path(os.getenv("IMAGE_DIR", "data/images"))
+    # Satellite tiles are cached in IMAGE_DIR; least recently used tiles are evicted past this size
+    TILE_CACHE_MAX_BYTES: int = int(os.getenv("TILE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))  # 256MB
     STATIONS_DIR: Path = Path(os.getenv("STATIONS_DIR", "data/weather_stations.csv"))
+    # Station CSVs (comma separated) indexed for lat/lon -> nearest station lookups
+    STATION_INDEX_CSVS: str = os.getenv("STATION_INDEX_CSVS", "src/weather_stations_all_states_valid.csv")
+
+    # Batch prediction endpoint: max stations per request and concurrent upstream fetches
+    BATCH_MAX_STATIONS: int = int(os.getenv("BATCH_MAX_STATIONS", "200"))
+    BATCH_MAX_WORKERS: int = int(os.getenv("BATCH_MAX_WORKERS", "8"))
+
+    # Precomputed sweep output served by /api/v1/predictions/*; polled for new files
+    PREDICTIONS_DIR: Path = Path(os.getenv("PREDICTIONS_DIR", "data/model_predictions"))
+    SNAPSHOT_REFRESH_SECONDS: float = float(os.getenv("SNAPSHOT_REFRESH_SECONDS", "60"))
     
     # Flask limits (protects you from huge payloads)
     MAX_CONTENT_LENGTH: int = int(os.getenv("MAX_CONTENT_LENGTH", str(2 * 1024 * 1024)))  # 2MB
@@ -0,0 +1,72 @@
+"""
+Per-row connect/commit vs. pooled bulk insert for a statewide sweep.
+
+Runs against the SQLite stand-in so it works without a MySQL server:
+
+    DB_BACKEND=sqlite python benchmark_database.py [n_rows]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("DB_SQLITE_PATH", str(Path(tempfile.mkdtemp()) / "benchmark.sqlite3"))
+
+import sqlite3
+from data.database_manager import DatabaseManager, PREDICTION_COLUMNS
+
+
+def make_rows(n: int):
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    return [
+        (f"K{i:04d}", f"Station {i}", 40.0 + i * 1e-3, -111.0 - i * 1e-3, now, i % 1000,
+         {"temperature": 20.0, "relativeHumidity": 30.0})
+        for i in range(n)
+    ]
+
+
+def insert_one_connection_per_row(rows) -> None:
+    # What src/main.insert_prediction used to do: a fresh connection and commit per row
+    sql = (f"INSERT INTO wildfire_location_prediction ({', '.join(PREDICTION_COLUMNS)}) "
+           f"VALUES ({', '.join('?' * len(PREDICTION_COLUMNS))})")
+    for row in rows:
+        conn = sqlite3.connect(str(DatabaseManager.SQLITE_PATH))
+        conn.execute(sql, row[:-1] + (str(row[-1]),))
+        conn.commit()
+        conn.close()
+
+
+def count_rows() -> int:
+    conn = DatabaseManager.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM wildfire_location_prediction")
+        return cursor.fetchone()[0]
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    DatabaseManager.create_database()
+    DatabaseManager.create_tables()
+    rows = make_rows(n)
+
+    start = time.perf_counter()
+    insert_one_connection_per_row(rows)
+    per_row = time.perf_counter() - start
+
+    start = time.perf_counter()
+    inserted = DatabaseManager.insert_predictions(rows)
+    bulk = time.perf_counter() - start
+
+    print(f"{n} rows into {DatabaseManager.SQLITE_PATH}")
+    print(f"  connect/commit per row: {per_row:.3f}s ({per_row / n * 1e3:.3f} ms/row)")
+    print(f"  pooled bulk insert:     {bulk:.3f}s ({bulk / n * 1e3:.3f} ms/row), {per_row / bulk:.0f}x faster")
+    print(f"  rows in table: {count_rows()} (expected {2 * n}, bulk inserted {inserted})")
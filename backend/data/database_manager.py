@@ -1,7 +1,96 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
 from pathlib import Path
 
+INSERT_BATCH_SIZE = 1000  # rows per executemany; keeps MySQL packets well under max_allowed_packet
+
+PREDICTION_COLUMNS = (
+    "station_id", "station_name", "latitude", "longitude", "timestamp", "confidence", "weather_json"
+)
+
+# One schema for both backends; only the auto-increment key and the JSON column type differ
+CREATE_TABLES = (
+    """
+    CREATE TABLE IF NOT EXISTS wildfire_location_prediction (
+        id {id_column},
+        station_id VARCHAR(10) NOT NULL,
+        station_name VARCHAR(100) NOT NULL,
+        latitude FLOAT NOT NULL,
+        longitude FLOAT NOT NULL,
+        timestamp DATETIME NOT NULL,
+        confidence INT NOT NULL,
+        weather_json {json_type}
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS satellite_image (
+        id {id_column},
+        prediction_id INT NOT NULL,
+        image_path VARCHAR(255) NOT NULL,
+        captured_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (prediction_id)
+            REFERENCES wildfire_location_prediction(id)
+            ON DELETE CASCADE
+    )
+    """,
+)
+MYSQL_DDL = {"id_column": "INT AUTO_INCREMENT PRIMARY KEY", "json_type": "JSON"}
+SQLITE_DDL = {"id_column": "INTEGER PRIMARY KEY AUTOINCREMENT", "json_type": "TEXT"}
+
+# Driver errors from either backend
+DB_ERRORS = (Error, sqlite3.Error)
+
+
+class _SQLitePool:
+    """Fixed-size pool of SQLite connections, mirroring MySQLConnectionPool.get_connection()."""
+
+    def __init__(self, path: Path, pool_size: int):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._idle = queue.Queue()
+        for _ in range(pool_size):
+            conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._idle.put(conn)
+
+    def get_connection(self):
+        return _PooledSQLiteConnection(self, self._idle.get())
+
+    def release(self, conn) -> None:
+        self._idle.put(conn)
+
+
+class _PooledSQLiteConnection:
+    """sqlite3 connection whose close() hands it back to the pool, like a pooled MySQL connection."""
+
+    def __init__(self, pool: _SQLitePool, conn: sqlite3.Connection):
+        self._pool = pool
+        self._conn = conn
+
+    def cursor(self):
+        return self._conn.cursor()
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def is_connected(self):
+        return self._conn is not None
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.rollback()  # never return a connection with a half-finished transaction
+            self._pool.release(self._conn)
+            self._conn = None
+
+
 class DatabaseManager:
     DATABASE_NAME = None
     USER = None
@@ -9,24 +98,41 @@ class DatabaseManager:
     HOST = None
     PORT = None
 
+    # "mysql" (default) or "sqlite" for running offline without a MySQL server.
+    # DB_BACKEND / DB_SQLITE_PATH override db.properties (db.backend / db.path).
+    BACKEND = os.getenv("DB_BACKEND", "").lower() or None
+    SQLITE_PATH = Path(os.getenv("DB_SQLITE_PATH", Path(__file__).parent / "cache" / "rincon.sqlite3"))
+    POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+
+    _pool = None
+    _pool_lock = threading.Lock()
+
     try:
         props_path = Path(__file__).parent / "db.properties"
 
-        if not props_path.exists():
+        if props_path.exists():
+            with open(props_path, encoding="utf-8") as f:
+                properties = dict(
+                    line.strip().split("=", 1)
+                    for line in f
+                    if line.strip() and not line.startswith("#")
+                )
+        elif BACKEND == "sqlite":
+            properties = {}
+        else:
             raise FileNotFoundError("Unable to load db.properties")
 
-        with open(props_path, encoding="utf-8") as f:
-            properties = dict(
-                line.strip().split("=", 1)
-                for line in f
-                if line.strip() and not line.startswith("#")
-            )
-
+        BACKEND = BACKEND or properties.get("db.backend", "mysql").lower()
+        if BACKEND == "sqlite":
+            if "db.path" in properties and "DB_SQLITE_PATH" not in os.environ:
+                SQLITE_PATH = Path(properties["db.path"])
+        else:
             DATABASE_NAME = properties["db.name"]
             USER = properties["db.user"]
             PASSWORD = properties["db.password"]
             HOST = properties["db.host"]
             PORT = int(properties["db.port"])
+        POOL_SIZE = int(properties.get("db.pool_size", POOL_SIZE))
 
     except Exception as ex:
         raise RuntimeError(f"Unable to process db.properties: {ex}") from ex
@@ -35,6 +141,10 @@ class DatabaseManager:
     @staticmethod
     def create_database():
         """Create the database if it doesn't exist"""
+        if DatabaseManager.BACKEND == "sqlite":
+            # The file is created on first connect
+            return
+
         conn = None
         cursor = None
         try:
@@ -56,19 +166,36 @@ class DatabaseManager:
                 conn.close()
 
 
+    @staticmethod
+    def _get_pool():
+        if DatabaseManager._pool is None:
+            with DatabaseManager._pool_lock:
+                if DatabaseManager._pool is None:
+                    if DatabaseManager.BACKEND == "sqlite":
+                        DatabaseManager._pool = _SQLitePool(DatabaseManager.SQLITE_PATH, DatabaseManager.POOL_SIZE)
+                    else:
+                        DatabaseManager._pool = pooling.MySQLConnectionPool(
+                            pool_name="rincon_fire",
+                            pool_size=DatabaseManager.POOL_SIZE,
+                            pool_reset_session=True,
+                            host=DatabaseManager.HOST,
+                            port=DatabaseManager.PORT,
+                            user=DatabaseManager.USER,
+                            password=DatabaseManager.PASSWORD,
+                            database=DatabaseManager.DATABASE_NAME,
+                        )
+        return DatabaseManager._pool
+
+
     @staticmethod
     def get_connection():
-        """Get a connection to the database."""
+        """
+        Get a connection from the pool. Calling close() on it returns it to
+        the pool instead of tearing down the socket.
+        """
         try:
-            conn = mysql.connector.connect(
-                host=DatabaseManager.HOST,
-                port=DatabaseManager.PORT,
-                user=DatabaseManager.USER,
-                password=DatabaseManager.PASSWORD,
-                database=DatabaseManager.DATABASE_NAME,
-            )
-            return conn
-        except Error as e:
+            return DatabaseManager._get_pool().get_connection()
+        except DB_ERRORS as e:
             raise Exception(e)
 
 
@@ -81,34 +208,13 @@ class DatabaseManager:
             conn = DatabaseManager.get_connection()
             cursor = conn.cursor()
 
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS wildfire_location_prediction (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    station_id VARCHAR(10) NOT NULL,
-                    station_name VARCHAR(100) NOT NULL,
-                    latitude FLOAT NOT NULL,
-                    longitude FLOAT NOT NULL,
-                    timestamp DATETIME NOT NULL,
-                    confidence INT NOT NULL,
-                    weather_json JSON
-                )
-            """)
-
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS satellite_image (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    prediction_id INT NOT NULL,
-                    image_path VARCHAR(255) NOT NULL,
-                    captured_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (prediction_id)
-                        REFERENCES wildfire_location_prediction(id)
-                        ON DELETE CASCADE
-                )
-            """)
+            dialect = SQLITE_DDL if DatabaseManager.BACKEND == "sqlite" else MYSQL_DDL
+            for statement in CREATE_TABLES:
+                cursor.execute(statement.format(**dialect))
 
             conn.commit()
 
-        except Error as e:
+        except DB_ERRORS as e:
             raise Exception(e)
         finally:
             if cursor:
@@ -116,3 +222,49 @@ class DatabaseManager:
             if conn and conn.is_connected():
                 conn.close()
 
+
+    @staticmethod
+    def insert_predictions(rows) -> int:
+        """
+        Insert many wildfire_location_prediction rows in one transaction.
+
+        rows are dicts keyed by PREDICTION_COLUMNS (weather_json may be a dict)
+        or tuples in that order. Uses one pooled connection and executemany in
+        INSERT_BATCH_SIZE chunks, then commits once; on any error the whole
+        batch is rolled back. Returns the number of rows inserted.
+        """
+        values = []
+        for row in rows:
+            if isinstance(row, dict):
+                row = tuple(row.get(col) for col in PREDICTION_COLUMNS)
+            row = tuple(row)
+            weather = row[-1]
+            if weather is not None and not isinstance(weather, str):
+                row = row[:-1] + (json.dumps(weather),)
+            values.append(row)
+        if not values:
+            return 0
+
+        placeholder = "?" if DatabaseManager.BACKEND == "sqlite" else "%s"
+        sql = (
+            f"INSERT INTO wildfire_location_prediction ({', '.join(PREDICTION_COLUMNS)}) "
+            f"VALUES ({', '.join([placeholder] * len(PREDICTION_COLUMNS))})"
+        )
+
+        conn = DatabaseManager.get_connection()
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            for i in range(0, len(values), INSERT_BATCH_SIZE):
+                # mysql-connector rewrites executemany INSERTs into multi-row INSERT statements
+                cursor.executemany(sql, values[i:i + INSERT_BATCH_SIZE])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            if conn and conn.is_connected():
+                conn.close()
+        return len(values)
@@ -1,8 +1,10 @@
 import os
 import sys
 import time
+from functools import partial
 from datetime import datetime, timezone
 from pathlib import Path
+import numpy as np
 import pandas as pd
 import joblib
 
@@ -11,7 +13,10 @@ from sklearn.metrics import accuracy_score
 
 ROOT = Path(__file__).resolve().parents[2]
 sys.path.append(str(ROOT))
-from src.api_helpers import get_formatted_weather_data
+from src.api_helpers import get_seven_day_observations
+from src.features import build_feature_matrix
+from src.prediction_sink import PredictionSink
+from src.sweep import run_sweep, DEFAULT_MAX_WORKERS, DEFAULT_REQUESTS_PER_SECOND
 
 
 class WildfireXGBoostModel:
@@ -41,6 +46,8 @@ class WildfireXGBoostModel:
             random_state=42,
         )
         self.feature_columns = None
+        # XGBClassifier.predict labels at 0.5; predict_batch uses the same cut-off by default
+        self.threshold = 0.5
 
     # -------------------------
     # TRAIN
@@ -107,62 +114,116 @@ class WildfireXGBoostModel:
     # -------------------------
     # PREDICT
     # -------------------------
-    def predict(self):
+    def predict(self, weather_stations_path="updated_utah_valid_weather_stations.csv",
+                max_workers=DEFAULT_MAX_WORKERS, requests_per_second=DEFAULT_REQUESTS_PER_SECOND, windowed=True,
+                cache=None):
+        feature_matrix, station_index = self.collect_features(
+            weather_stations_path,
+            max_workers=max_workers,
+            requests_per_second=requests_per_second,
+            windowed=windowed,
+            cache=cache,
+        )
+
+        print("\nPredicting wildfire risk for weather stations...\n")
+        scored = self.predict_batch(feature_matrix, station_index)
+        print(f"Scored {len(scored)} stations, {int(scored['has_fire'].sum())} predicted has_fire.")
+
+        return self.write_predictions(scored)
+
+    def collect_features(self, weather_stations_path="updated_utah_valid_weather_stations.csv",
+                         max_workers=DEFAULT_MAX_WORKERS, requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+                         windowed=True, cache=None):
+        """
+        Phase one of predict(): fetch every station and stack the feature rows.
+
+        Returns (feature_matrix, station_index) where feature_matrix is a
+        contiguous float32 array in self.feature_columns order and
+        station_index holds station_url/latitude/longitude/timestamp for each row.
+        windowed=False uses the original 500-row page scan, for comparing I/O.
+        cache is an optional src.observation_cache.ObservationCache shared by all workers.
+        weather_stations_path may also be a DataFrame of stations, e.g. one shard of a larger list.
+        """
         # Ensure model is loaded
         if self.feature_columns is None:
             raise RuntimeError("Model has not been trained/loaded (feature_columns is None).")
-        
-        print("Loading weather stations for prediction...\n")
-        weather_stations_path = "updated_utah_valid_weather_stations.csv"
-        weather_stations_df = pd.read_csv(weather_stations_path)
-
-        results = []
-
-        print("Predicting wildfire risk for weather stations...\n")
-        count = 1
-        for _, row in weather_stations_df.iterrows():
-            station = row["station_url"]
-            latitude = row["latitude"]
-            longitude = row["longitude"]
-
-            print(f"{count}/1032 Processing station: {station}")
-
-            try:
-                formatted_weather_df = get_formatted_weather_data(station)
-            except Exception as e:
-                print(f"Error fetching data for station {station}: {e}\n")
-                count += 1
-                continue
-
-            # Ensure numeric + fill
-            for c in self.feature_columns:
-                formatted_weather_df[c] = pd.to_numeric(formatted_weather_df[c], errors="coerce")
-            formatted_weather_df = formatted_weather_df.fillna(0)
-
-            prediction = int(self.model.predict(formatted_weather_df[self.feature_columns])[0])
-            probability = float(self.model.predict_proba(formatted_weather_df[self.feature_columns])[0][1])
-            print(f"Predicted has_fire: {prediction} with probability {probability:.4f}\n")
-
-            results.append({
-                "station_url": station,
-                "latitude": latitude,
-                "longitude": longitude,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "fire_probability": probability
-            })
-
-            count += 1
-            # if count > 5:
-            #     break
-
-        now = datetime.now(timezone.utc)
-        date_str = now.strftime("%Y-%m-%d_%H")
-        output_path = Path(f"model_predictions/fire_predictions_{date_str}.csv")
-
-        results_df = pd.DataFrame(results, columns=["station_url", "latitude", "longitude", "timestamp", "fire_probability"])
-        
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        results_df.to_csv(output_path, index=False)
+
+        if isinstance(weather_stations_path, pd.DataFrame):
+            weather_stations_df = weather_stations_path
+        else:
+            print("Loading weather stations for prediction...\n")
+            weather_stations_df = pd.read_csv(weather_stations_path)
+
+        print(f"Fetching weather for {len(weather_stations_df)} stations "
+              f"({max_workers} workers, {requests_per_second} req/s)...\n")
+        station_results, report = run_sweep(
+            weather_stations_df,
+            partial(get_seven_day_observations, windowed=windowed, cache=cache),
+            max_workers=max_workers,
+            requests_per_second=requests_per_second,
+        )
+        print(report.summary())
+        if cache is not None:
+            print(f"Observation cache: {cache.stats()}")
+
+        ok_results = [r for r in station_results if r.ok]
+        # Missing observation values are filled with 0, same as training
+        feature_matrix = build_feature_matrix(
+            [r.data for r in ok_results], self.feature_columns, dtype=np.float32, fill_value=0
+        )
+
+        station_index = pd.DataFrame(
+            [(r.station_url, r.latitude, r.longitude, r.timestamp) for r in ok_results],
+            columns=["station_url", "latitude", "longitude", "timestamp"],
+        )
+        return feature_matrix, station_index
+
+    def predict_batch(self, feature_matrix, station_index, threshold=None):
+        """
+        Score every row of feature_matrix with a single predict_proba call.
+
+        feature_matrix: shape (n_stations, n_features) in self.feature_columns order
+        station_index: DataFrame (or list of station URLs) with one entry per row
+        Returns a copy of station_index with fire_probability and has_fire columns.
+        """
+        if self.feature_columns is None:
+            raise RuntimeError("Model has not been trained/loaded (feature_columns is None).")
+
+        X = np.ascontiguousarray(feature_matrix, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != len(self.feature_columns):
+            raise ValueError(f"Expected {len(self.feature_columns)} features per station, got {X.shape[1]}.")
+
+        if isinstance(station_index, pd.DataFrame):
+            scored = station_index.reset_index(drop=True).copy()
+        else:
+            scored = pd.DataFrame({"station_url": list(station_index)})
+        if len(scored) != X.shape[0]:
+            raise ValueError(f"station_index has {len(scored)} entries for {X.shape[0]} feature rows.")
+
+        threshold = self.threshold if threshold is None else threshold
+        if X.shape[0] == 0:
+            probabilities = np.empty(0, dtype=np.float32)
+        else:
+            probabilities = self.model.predict_proba(X)[:, 1]
+
+        scored["fire_probability"] = probabilities.astype(float)
+        scored["has_fire"] = (probabilities >= threshold).astype(int)
+        return scored
+
+    def write_predictions(self, scored, output_path=None):
+        if output_path is None:
+            now = datetime.now(timezone.utc)
+            date_str = now.strftime("%Y-%m-%d_%H")
+            output_path = Path(f"model_predictions/fire_predictions_{date_str}.csv")
+        output_path = Path(output_path)
+
+        columns = ["station_url", "latitude", "longitude", "timestamp", "fire_probability"]
+        results_df = scored.reindex(columns=columns)
+
+        with PredictionSink(output_path, fieldnames=columns, overwrite=True) as sink:
+            sink.write_many(results_df.to_dict(orient="records"))
 
         print(f"\nSaved predictions to {output_path.resolve()}")
         
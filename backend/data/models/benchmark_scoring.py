@@ -0,0 +1,63 @@
+"""
+Compares per-station scoring cost of the old one-row predict + predict_proba
+loop against a single WildfireXGBoostModel.predict_batch call.
+
+Run from backend/data/models with:
+    python benchmark_scoring.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+
+from data.models.XG_boost import WildfireXGBoostModel
+
+BASE_DIR = Path(__file__).resolve().parent
+MODEL_PATH = BASE_DIR / "unbalanced_xgb_model.joblib"
+
+BATCH_SIZES = [1_000, 10_000, 100_000]
+# The per-row loop is slow enough that timing a sample and extrapolating is plenty
+LOOP_SAMPLE = 200
+
+
+def random_features(n_rows: int, n_features: int, seed: int = 42) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.normal(loc=10.0, scale=20.0, size=(n_rows, n_features)).astype(np.float32)
+
+
+def time_per_station_loop(model: WildfireXGBoostModel, X: np.ndarray) -> float:
+    n = min(LOOP_SAMPLE, len(X))
+    start = time.perf_counter()
+    for i in range(n):
+        row_df = pd.DataFrame([X[i]], columns=model.feature_columns)
+        int(model.model.predict(row_df[model.feature_columns])[0])
+        float(model.model.predict_proba(row_df[model.feature_columns])[0][1])
+    return (time.perf_counter() - start) / n
+
+
+def time_batch(model: WildfireXGBoostModel, X: np.ndarray) -> float:
+    station_index = [f"station_{i}" for i in range(len(X))]
+    start = time.perf_counter()
+    model.predict_batch(X, station_index)
+    return (time.perf_counter() - start) / len(X)
+
+
+if __name__ == "__main__":
+    model = WildfireXGBoostModel()
+    model.load(str(MODEL_PATH))
+
+    # Warm up so the first timing doesn't include one-off setup cost
+    model.predict_batch(random_features(10, len(model.feature_columns)), [f"w{i}" for i in range(10)])
+
+    print(f"{'stations':>10} | {'per-station loop':>18} | {'predict_batch':>15} | {'speedup':>8}")
+    print("-" * 62)
+    for n in BATCH_SIZES:
+        X = random_features(n, len(model.feature_columns))
+        loop_cost = time_per_station_loop(model, X)
+        batch_cost = time_batch(model, X)
+        print(f"{n:>10} | {loop_cost * 1e6:>15.1f} us | {batch_cost * 1e6:>12.2f} us | {loop_cost / batch_cost:>7.0f}x")
@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+from models.XG_boost import WildfireXGBoostModel
+from src.observation_cache import ObservationCache
+from src.prediction_history import PredictionHistory
+from src.prediction_sink import PredictionSink
+from src.sharding import (SHARD_COLUMNS, assign_shards, merge_shard_outputs, select_shard, shard_output_path,
+                          shard_summary, write_shard_manifest)
+from src.sweep import DEFAULT_MAX_WORKERS, DEFAULT_REQUESTS_PER_SECOND
+
+# Sweep a large station list in shards, on a local process pool or across
+# several machines. Run from backend/data like run_system.py.
+#
+#   python run_sharded_sweep.py
+#       every shard on a local process pool, then merge
+#   SWEEP_SHARD_INDEX=3 SWEEP_RUN_ID=2026-03-19_00 python run_sharded_sweep.py
+#       only shard 3 (one node of many; give every node the same run id)
+#   SWEEP_MERGE_ONLY=1 SWEEP_RUN_ID=2026-03-19_00 python run_sharded_sweep.py
+#       merge the finished shards into model_predictions/fire_predictions_<run id>.csv
+#
+# Shards go to model_predictions/shards/<run id>/part-NNNN-of-NNNN.csv, each with
+# a .json manifest written once the CSV is complete. Rerunning a run id skips
+# shards that already have one.
+
+STATIONS_CSV = Path(os.getenv("SWEEP_STATIONS", str(ROOT / "src" / "weather_stations_all_states_valid.csv")))
+MODEL_PATH = Path(os.getenv("SWEEP_MODEL", "models/unbalanced_xgb_model.joblib"))
+PREDICTIONS_DIR = Path(os.getenv("SWEEP_PREDICTIONS_DIR", "model_predictions"))
+N_SHARDS = int(os.getenv("SWEEP_SHARDS", "8"))
+SHARD_BY = os.getenv("SWEEP_SHARD_BY", "hash")  # "hash" or "state"
+PROCESSES = int(os.getenv("SWEEP_PROCESSES", str(min(N_SHARDS, os.cpu_count() or 1))))
+# api.weather.gov limits per client IP, so the budget is split across local processes
+REQUESTS_PER_SECOND = float(os.getenv("SWEEP_REQUESTS_PER_SECOND", str(DEFAULT_REQUESTS_PER_SECOND)))
+MAX_WORKERS = int(os.getenv("SWEEP_MAX_WORKERS", str(DEFAULT_MAX_WORKERS)))
+
+
+def run_shard(index: int, n_shards: int, run_id: str, requests_per_second: float,
+              stations: Optional[pd.DataFrame] = None) -> dict:
+    """
+    Fetch and score one shard and write its part file; returns the manifest.
+    stations is the shard's slice of STATIONS_CSV, selected here when not given.
+    """
+    output_path = shard_output_path(PREDICTIONS_DIR, run_id, index, n_shards)
+    done = shard_summary(PREDICTIONS_DIR, run_id, n_shards)[index]
+    if done is not None:
+        print(f"[shard {index}] already finished for run {run_id}, skipping")
+        return done
+
+    start = time.perf_counter()
+    if stations is None:
+        stations = select_shard(pd.read_csv(STATIONS_CSV), index, n_shards, by=SHARD_BY)
+    print(f"[shard {index}/{n_shards}] {len(stations)} stations at {requests_per_second:.2f} req/s")
+
+    model = WildfireXGBoostModel()
+    model.load(str(MODEL_PATH))
+    feature_matrix, station_index = model.collect_features(
+        stations, max_workers=MAX_WORKERS, requests_per_second=requests_per_second, cache=ObservationCache()
+    )
+    scored = model.predict_batch(feature_matrix, station_index)
+    model.write_predictions(scored, output_path=output_path)
+
+    manifest = {
+        "run_id": run_id,
+        "shard": index,
+        "shards": n_shards,
+        "shard_by": SHARD_BY,
+        "stations": len(stations),
+        "scored": len(scored),
+        "seconds": round(time.perf_counter() - start, 2),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+    }
+    write_shard_manifest(output_path, **manifest)
+    return manifest
+
+
+def merge(run_id: str, n_shards: int) -> Path:
+    """Merge a run's shards into one fire_predictions CSV and record it in the prediction history."""
+    merged = merge_shard_outputs(PREDICTIONS_DIR, run_id, n_shards)
+    output_path = PREDICTIONS_DIR / f"fire_predictions_{run_id}.csv"
+    with PredictionSink(output_path, fieldnames=SHARD_COLUMNS, overwrite=True) as sink:
+        sink.write_many(merged.reindex(columns=SHARD_COLUMNS).to_dict(orient="records"))
+    PredictionHistory().append(merged, run_id=run_id, source=output_path.name)
+    print(f"Merged {n_shards} shards ({len(merged)} stations) into {output_path.resolve()}")
+    return output_path
+
+
+if __name__ == "__main__":
+    run_id = os.getenv("SWEEP_RUN_ID") or datetime.now(timezone.utc).strftime("%Y-%m-%d_%H")
+    shard_index = os.getenv("SWEEP_SHARD_INDEX")
+
+    if os.getenv("SWEEP_MERGE_ONLY"):
+        merge(run_id, N_SHARDS)
+    elif shard_index is not None:
+        # One node of a multi-machine sweep: this shard only, merged later
+        print(run_shard(int(shard_index), N_SHARDS, run_id, REQUESTS_PER_SECOND))
+    else:
+        start = time.perf_counter()
+        per_process_rate = REQUESTS_PER_SECOND / max(1, PROCESSES)
+        failed = []
+        # Assign shards once here rather than in every worker (state sharding loads the boundary file)
+        all_stations = pd.read_csv(STATIONS_CSV)
+        shards = assign_shards(all_stations, N_SHARDS, by=SHARD_BY)
+        with ProcessPoolExecutor(max_workers=max(1, PROCESSES)) as pool:
+            futures = {
+                pool.submit(run_shard, i, N_SHARDS, run_id, per_process_rate,
+                            all_stations[shards == i].reset_index(drop=True)): i
+                for i in range(N_SHARDS)
+            }
+            for future in as_completed(futures):
+                try:
+                    manifest = future.result()
+                    print(f"[shard {manifest['shard']}] {manifest['scored']}/{manifest['stations']} stations "
+                          f"scored in {manifest['seconds']}s")
+                except Exception as e:
+                    failed.append(futures[future])
+                    print(f"[shard {futures[future]}] failed: {e}")
+        if failed:
+            print(f"{len(failed)} shards failed ({sorted(failed)}); rerun with SWEEP_RUN_ID={run_id} to retry them")
+        else:
+            merge(run_id, N_SHARDS)
+        print(f"Sharded sweep finished in {time.perf_counter() - start:.2f}s")
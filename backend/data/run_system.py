@@ -2,20 +2,52 @@ import time
 from pathlib import Path
 from datetime import datetime, timezone
 
+import pandas as pd
+
 from models.XG_boost import WildfireXGBoostModel
+from src.incremental_sweep import SweepState, model_key, plan_incremental
+from src.observation_cache import ObservationCache
+from src.prediction_history import PredictionHistory, run_id_for
 from satellite_images.satellite_images import SatelliteManager
 
+MODEL_PATH = "models/unbalanced_xgb_model.joblib"
+STATIONS_CSV = "updated_utah_valid_weather_stations.csv"
+# Only rescore stations that reported something since the last run; the rest keep their prediction
+INCREMENTAL = True
+
 if __name__ == "__main__":
     # 1. Initialize and Load Model
     print("Loading model...")
     model = WildfireXGBoostModel()
-    model.load("models/unbalanced_xgb_model.joblib")
+    model.load(MODEL_PATH)
 
     # 2. Run Predictions
     print("Starting prediction pipeline...")
     start = time.perf_counter()
-    prediction_file = model.predict()
+    # Hourly reruns only download observations newer than what is already cached
+    observation_cache = ObservationCache()
+    stations = pd.read_csv(STATIONS_CSV)
+    if INCREMENTAL:
+        sweep_state = SweepState()
+        key = model_key(MODEL_PATH)
+        stations, carried, observed_at, incremental = plan_incremental(stations, sweep_state, key)
+    feature_matrix, station_index = model.collect_features(stations, cache=observation_cache)
+    fetched = time.perf_counter()
+    scored = model.predict_batch(feature_matrix, station_index)
+    scored_at = time.perf_counter()
+    n_scored = len(scored)
+    if INCREMENTAL:
+        sweep_state.record(scored, observed_at, key)
+        scored = pd.concat([scored, carried], ignore_index=True) if len(carried) else scored
+        incremental.rescored = n_scored
+        incremental.fetch_failed = len(stations) - n_scored
+        print(incremental.summary())
+    prediction_file = model.write_predictions(scored)
+    # Keep every run queryable by station/time without re-reading old CSVs
+    PredictionHistory().append(scored, run_id=run_id_for(prediction_file), source=Path(prediction_file).name)
     end = time.perf_counter()
+    print(f"Fetch time: {fetched - start:.6f} seconds | "
+          f"scoring time for {n_scored} stations: {scored_at - fetched:.6f} seconds")
     print(f"Prediction execution time: {end - start:.6f} seconds\n")
 
     # 3. Download Satellite Images for Top Probabilities
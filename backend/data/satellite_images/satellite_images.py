@@ -1,20 +1,29 @@
 from __future__ import annotations
 import os
+import sys
+import json
 import math
-import requests
+import time
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import BytesIO
 from pathlib import Path
 from PIL import Image
 from dataclasses import dataclass
 from datetime import datetime, timezone
 
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+from src import http_client
+
 @dataclass(frozen=True)
 class SatelliteManager:
     input_filepath: str
     output_dir: Path = Path("images")
     zoom: int = 8
     fmt: str = 'png'
+    # Concurrent tile downloads; matches the api.highsight.dev pool size in src.http_client
+    max_workers: int = 8
 
     def _latlon_to_tile(self, lat_deg: float, lon_deg: float, z: int) -> tuple[int, int]:
         lat_rad = math.radians(lat_deg)
@@ -24,12 +33,15 @@ class SatelliteManager:
         return x_tile, y_tile
 
     def get_satellite_image_bytes(self, lat: float, lon: float) -> bytes:
+        x, y = self._latlon_to_tile(lat, lon, self.zoom)
+        return self.get_tile_bytes(x, y)
+
+    def get_tile_bytes(self, x: int, y: int) -> bytes:
         api_key = os.getenv("HIGHSIGHT_API_KEY", "oGVK5TFmsM9QdYArq8UiXZGgGsHXqTcw")
 
-        x, y = self._latlon_to_tile(lat, lon, self.zoom)
         url = f"https://api.highsight.dev/v1/satellite/{self.zoom}/{x}/{y}?key={api_key}"
 
-        resp = requests.get(url, timeout=20)
+        resp = http_client.get_session().get(url, timeout=20)
         if resp.status_code != 200:
             raise RuntimeError(f"Highsight request failed ({resp.status_code}): {resp.text[:200]}")
 
@@ -46,27 +58,100 @@ class SatelliteManager:
         ts = datetime.now(timezone.utc).strftime("utchourminute%H-%M")
         return f"{lat:.2f}_{lon:.2f}_z{self.zoom}_{ts}.{self.fmt.lower()}"
 
+    def build_tile_filename(self, x: int, y: int) -> str:
+        ts = datetime.now(timezone.utc).strftime("utchourminute%H-%M")
+        return f"z{self.zoom}_{x}_{y}_{ts}.{self.fmt.lower()}"
+
     def save_image_bytes(self, filename: str, data: bytes) -> Path:
         self.output_dir.mkdir(parents=True, exist_ok=True)
         out_path = self.output_dir / filename
         out_path.write_bytes(data)
         return out_path
 
-    def run(self, number_of_images: int = 1):
+    def _download_tile(self, x: int, y: int) -> tuple[Path, float]:
+        start = time.perf_counter()
+        img_bytes = self.get_tile_bytes(x, y)
+        elapsed = time.perf_counter() - start
+        return self.save_image_bytes(self.build_tile_filename(x, y), img_bytes), elapsed
+
+    def run(self, number_of_images: int = 1) -> Path:
+        """
+        Download imagery for the top-N stations by fire_probability.
+
+        Nearby stations usually share a tile at this zoom, so stations are
+        grouped by (z, x, y) and each unique tile is downloaded once, up to
+        max_workers at a time. manifest.json in output_dir maps every station
+        to its tile file. Returns the manifest path.
+        """
+        start = time.perf_counter()
         df = pd.read_csv(self.input_filepath)
         top_rows = df.nlargest(number_of_images, 'fire_probability')
-        
+
+        stations = []
+        tiles: dict[tuple[int, int], list[int]] = {}
         for i, row in top_rows.iterrows():
             lat, lon = float(row['latitude']), float(row['longitude'])
-            conf = float(row['fire_probability'])
-
-            try:
-                img_bytes = self.get_satellite_image_bytes(lat, lon)
-                filename = self.build_filename(lat, lon)
-                out_path = self.save_image_bytes(filename, img_bytes)
-                print(f"[{i}] Saved {out_path.name} (confidence={conf:.4f})")
-            except Exception as exc:
-                print(f"[{i}] Failed for ({lat}, {lon}): {exc}")
+            x, y = self._latlon_to_tile(lat, lon, self.zoom)
+            tiles.setdefault((x, y), []).append(len(stations))
+            stations.append({
+                "station_url": row.get('station_url'),
+                "latitude": lat,
+                "longitude": lon,
+                "fire_probability": float(row['fire_probability']),
+                "tile": [self.zoom, x, y],
+                "file": None,
+            })
+
+        tile_files: dict[tuple[int, int], str] = {}
+        tile_errors: dict[tuple[int, int], str] = {}
+        latencies = []
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as pool:
+            futures = {pool.submit(self._download_tile, x, y): (x, y) for x, y in tiles}
+            for future in as_completed(futures):
+                x, y = futures[future]
+                n = len(tiles[(x, y)])
+                try:
+                    out_path, elapsed = future.result()
+                except Exception as exc:
+                    tile_errors[(x, y)] = str(exc)
+                    print(f"[z{self.zoom}/{x}/{y}] Failed for {n} station(s): {exc}")
+                    continue
+                latencies.append(elapsed)
+                tile_files[(x, y)] = out_path.name
+                print(f"[z{self.zoom}/{x}/{y}] Saved {out_path.name} ({n} station(s))")
+
+        for (x, y), indices in tiles.items():
+            for idx in indices:
+                stations[idx]["file"] = tile_files.get((x, y))
+                if (x, y) in tile_errors:
+                    stations[idx]["error"] = tile_errors[(x, y)]
+
+        wall_clock = time.perf_counter() - start
+        manifest = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "source": str(self.input_filepath),
+            "zoom": self.zoom,
+            "format": self.fmt.lower(),
+            "stations": stations,
+            "tiles": [
+                {"tile": [self.zoom, x, y], "file": tile_files.get((x, y)),
+                 "stations": len(indices), "error": tile_errors.get((x, y))}
+                for (x, y), indices in tiles.items()
+            ],
+        }
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.output_dir / "manifest.json"
+        manifest_path.write_text(json.dumps(manifest, indent=2))
+
+        # The old loop downloaded one tile per station, one after another
+        mean_latency = sum(latencies) / len(latencies) if latencies else 0.0
+        sequential_estimate = mean_latency * len(stations)
+        print(f"{len(stations)} stations -> {len(tiles)} unique tiles "
+              f"({len(tile_files)} saved, {len(tile_errors)} failed) in {wall_clock:.2f}s; "
+              f"per-station sequential download est. {sequential_estimate:.2f}s, "
+              f"saved ~{max(0.0, sequential_estimate - wall_clock):.2f}s")
+        print(f"Manifest written to {manifest_path}")
+        return manifest_path
 
 if __name__ == "__main__":
     manager = SatelliteManager(
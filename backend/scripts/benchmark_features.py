@@ -0,0 +1,84 @@
+"""
+Microbenchmark for building the 56-value station feature row.
+
+Compares the original extract_weather + iterrows/concat assembly with
+src.features.build_feature_row / build_feature_matrix, and checks that both
+produce the same values.
+
+Run with:
+    python scripts/benchmark_features.py
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from src.api_helpers import extract_weather
+from src.features import FEATURE_COLUMNS, OBSERVATION_FIELDS, build_feature_matrix, build_feature_row
+
+N_STATIONS = [1, 100, 1_000]
+
+
+def fake_observations(seed: int) -> list[dict]:
+    """Seven newest-first observation properties with some missing values, like the real API."""
+    rng = random.Random(seed)
+    out = []
+    for day in range(7):
+        props = {"timestamp": f"2026-03-{18 - day:02d}T23:53:00+00:00"}
+        for field in OBSERVATION_FIELDS:
+            value = None if rng.random() < 0.2 else round(rng.uniform(-20, 1000), 2)
+            props[field] = {"unitCode": "wmoUnit:x", "value": value}
+        out.append(props)
+    return out
+
+
+def legacy_feature_row(weather_data: list[dict]) -> pd.DataFrame:
+    """The pre-feature-builder body of get_formatted_weather_data."""
+    weather_data = extract_weather(weather_data)
+    weather_row = pd.Series([])
+    weather_data = weather_data.drop('date', axis=1)
+    for i, weather_day in weather_data.iterrows():
+        weather_row = pd.concat([weather_day, weather_row])
+    weather_row = weather_row.to_numpy()
+    return pd.DataFrame([weather_row], columns=FEATURE_COLUMNS)
+
+
+def check_identical(stations: list[list[dict]]) -> None:
+    for observations in stations:
+        legacy = legacy_feature_row(observations).apply(pd.to_numeric, errors="coerce").to_numpy()[0]
+        new = build_feature_row(observations, FEATURE_COLUMNS)
+        if not np.array_equal(legacy, new, equal_nan=True):
+            raise AssertionError("Feature builder output differs from the legacy row")
+
+
+def timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    check_identical([fake_observations(seed) for seed in range(200)])
+    print("Outputs identical for 200 random stations.\n")
+
+    print(f"{'stations':>9} | {'legacy':>12} | {'build_feature_row':>18} | {'build_feature_matrix':>21}")
+    print("-" * 70)
+    for n in N_STATIONS:
+        stations = [fake_observations(seed) for seed in range(n)]
+        legacy = timed(lambda: [legacy_feature_row(obs) for obs in stations])
+        rows = timed(lambda: [build_feature_row(obs, FEATURE_COLUMNS) for obs in stations])
+        matrix = timed(lambda: build_feature_matrix(stations, FEATURE_COLUMNS))
+        print(f"{n:>9} | {legacy / n * 1e6:>9.1f} us | {rows / n * 1e6:>15.1f} us | {matrix / n * 1e6:>18.1f} us")
+    print("\n(times are per station)")
@@ -0,0 +1,65 @@
+"""
+Benchmark for the /stations catalog queries as the catalog grows.
+
+Times a Utah-sized map view (bbox page, and zoomed-out clusters) against the
+Utah station list (~1k) and the all-states list (~36k), next to a plain
+pandas full-scan filter of the same view.
+
+Run with:
+    python scripts/benchmark_stations.py
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from services.station_catalog import BBox, StationCatalog
+
+CATALOGS = {
+    "utah": ROOT / "data" / "weather_stations_utah_valid.csv",
+    "all states": ROOT / "src" / "weather_stations_all_states_valid.csv",
+}
+VIEWS = {
+    "Salt Lake valley": BBox(40.4, 41.0, -112.2, -111.6),
+    "Utah": BBox(37.0, 42.0, -114.05, -109.04),
+}
+PAGE = 500
+ZOOM = 6
+REPEAT = 200
+
+
+def timed(fn, repeat: int = REPEAT) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def pandas_scan(df: pd.DataFrame, bbox: BBox) -> list:
+    view = df[df["latitude"].between(bbox.min_lat, bbox.max_lat) & df["longitude"].between(bbox.min_lon, bbox.max_lon)]
+    return view.head(PAGE).to_dict("records")
+
+
+if __name__ == "__main__":
+    print(f"{'catalog':>10} | {'stations':>8} | {'view':>16} | {'in view':>7} | {'pandas scan':>11} | "
+          f"{'bbox page':>9} | {'clusters':>8}")
+    print("-" * 90)
+    for name, path in CATALOGS.items():
+        catalog = StationCatalog.load(path)
+        df = pd.read_csv(path, usecols=["station_url", "latitude", "longitude"])
+        for view_name, bbox in VIEWS.items():
+            in_view = len(catalog.select(bbox))
+            scan = timed(lambda: pandas_scan(df, bbox))
+            page = timed(lambda: catalog.stations(catalog.select(bbox)[:PAGE]))
+            clusters = timed(lambda: catalog.clusters(catalog.select(bbox), ZOOM))
+            print(f"{name:>10} | {len(catalog):>8} | {view_name:>16} | {in_view:>7} | {scan * 1e3:>8.2f} ms | "
+                  f"{page * 1e3:>6.2f} ms | {clusters * 1e3:>5.2f} ms")
@@ -1,8 +1,13 @@
-import time
+import sys
+from pathlib import Path
 from pprint import pprint
 from typing import Any, Dict, List, Optional
 import requests
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+from src import http_client
+
 
 USER_AGENT = "RinconFire/1.0 (contact: youremail@example.com)"  # set a real contact if you can
 DEFAULT_TIMEOUT = 5  # seconds
@@ -18,25 +23,9 @@ def _get(url: str, *, headers: Optional[Dict[str, str]] = None, params: Optional
     if headers:
         hdrs.update(headers)
 
-    for attempt in range(max_retries):
-        try:
-            resp = requests.get(url, headers=hdrs, params=params, timeout=timeout)
-            if resp.status_code == 429 or 500 <= resp.status_code < 600:
-                wait = backoff ** attempt
-                print(f"[{resp.status_code}] Retrying {url} in {wait:.1f}s...")
-                time.sleep(wait)
-                continue
-            if not resp.ok:
-                print(f"[{resp.status_code}] GET {url} failed: {resp.text[:200]}")
-                return None
-            return resp.json()
-        except requests.RequestException as e:
-            wait = backoff ** attempt
-            print(f"[EXC] {e}; retrying in {wait:.1f}s...")
-            time.sleep(wait)
-
-    print(f"[ERR] Max retries exceeded for {url}")
-    return None
+    resp = http_client.get(url, headers=hdrs, params=params, timeout=timeout,
+                           max_retries=max_retries, backoff=backoff)
+    return resp.json() if resp is not None else None
 
 def simplify_weather_json(weather_json: dict, latitude: float, longitude: float) -> dict:
     props = weather_json.get("properties", {})
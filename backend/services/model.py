@@ -1,9 +1,17 @@
 from __future__ import annotations
+import threading
+import time
+import tracemalloc
 from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
 import joblib
 import numpy as np
 
+# tracemalloc is process-wide: concurrent loads must not stop each other's tracing
+_LOAD_TRACE_LOCK = threading.Lock()
+
 @dataclass(frozen=True)
 class PredictionResult:
     wildfire_probability: float
@@ -11,15 +19,89 @@ class PredictionResult:
     threshold: float
     model_version: str
 
+@dataclass(frozen=True)
+class ModelLoadInfo:
+    load_seconds: float
+    warmup_seconds: float
+    file_bytes: int
+    memory_bytes: int  # Python heap allocated by the load (tracemalloc); native booster memory is not included
+    mtime_ns: int
+    loaded_at: str
+
 class RandomForestPredictor:
-    def __init__(self, model_path: Path, model_version: str):
-        self.model_path = model_path
+    """
+    Wraps one model artifact. Artifacts are either a bare estimator or the
+    {"model": estimator, "features": [...]} dicts written by the training
+    scripts (e.g. unbalanced_xgb_model.joblib).
+    """
+
+    def __init__(self, model_path: Path, model_version: str, feature_columns: Optional[Sequence[str]] = None):
+        self.model_path = Path(model_path)
         self.model_version = model_version
+        self._feature_columns = list(feature_columns) if feature_columns is not None else None
         self._model = None
+        self.load_info: Optional[ModelLoadInfo] = None
+
+    @property
+    def feature_columns(self) -> Optional[List[str]]:
+        self.load()
+        return self._feature_columns
 
     def load(self) -> None:
-        if self._model is None:
-            self._model = joblib.load(self.model_path)
+        if self._model is not None:
+            return
+
+        stat = self.model_path.stat()
+        with _LOAD_TRACE_LOCK:
+            tracing = tracemalloc.is_tracing()
+            if not tracing:
+                tracemalloc.start()
+            try:
+                before = tracemalloc.get_traced_memory()[0]
+                start = time.perf_counter()
+                artifact = joblib.load(self.model_path)
+                load_seconds = time.perf_counter() - start
+                memory_bytes = max(0, tracemalloc.get_traced_memory()[0] - before)
+            finally:
+                if not tracing:
+                    tracemalloc.stop()
+
+        if isinstance(artifact, dict):
+            model = artifact["model"]
+            features = artifact.get("features")
+        else:
+            model = artifact
+            features = getattr(model, "feature_names_in_", None)
+        if self._feature_columns is None and features is not None:
+            self._feature_columns = list(features)
+        self._model = model
+
+        self.load_info = ModelLoadInfo(
+            load_seconds=load_seconds,
+            warmup_seconds=0.0,
+            file_bytes=stat.st_size,
+            memory_bytes=memory_bytes,
+            mtime_ns=stat.st_mtime_ns,
+            loaded_at=datetime.now(timezone.utc).isoformat(),
+        )
+
+    def warm_up(self) -> None:
+        """Run one throwaway inference so the first real request skips lazy init."""
+        self.load()
+        n_features = len(self._feature_columns) if self._feature_columns else getattr(self._model, "n_features_in_", None)
+        if not n_features:
+            return
+        start = time.perf_counter()
+        self._model.predict_proba(np.zeros((1, n_features), dtype=np.float32))
+        info = self.load_info
+        self.load_info = ModelLoadInfo(
+            load_seconds=info.load_seconds,
+            warmup_seconds=time.perf_counter() - start,
+            file_bytes=info.file_bytes,
+            memory_bytes=info.memory_bytes,
+            mtime_ns=info.mtime_ns,
+            loaded_at=info.loaded_at,
+        )
 
     def predict_proba_one(self, features: np.ndarray, threshold: float = 0.8) -> PredictionResult:
         """
@@ -39,3 +121,153 @@ class RandomForestPredictor:
             threshold=threshold,
             model_version=self.model_version,
         )
+
+    def predict_proba_batch(self, features: np.ndarray, threshold: float = 0.8) -> list[PredictionResult]:
+        """
+        features: shape (n_stations, n_features); scored with one predict_proba call
+        """
+        self.load()
+        x = np.asarray(features)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        if x.shape[0] == 0:
+            return []
+
+        probas = self._model.predict_proba(x)[:, 1]
+        return [
+            PredictionResult(
+                wildfire_probability=float(proba),
+                label=int(proba >= threshold),
+                threshold=threshold,
+                model_version=self.model_version,
+            )
+            for proba in probas
+        ]
+
+def parse_model_specs(spec: str) -> Dict[str, Path]:
+    """Parse "name=path,name=path" into {name: Path}. Blank entries are ignored."""
+    models = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, sep, path = entry.partition("=")
+        if not sep or not name.strip() or not path.strip():
+            raise ValueError(f"Model spec '{entry}' should look like name=path")
+        models[name.strip()] = Path(path.strip())
+    return models
+
+class ModelRegistry:
+    """
+    Keeps several named model versions loaded and warmed up.
+
+    Requests call get(name) and score with the predictor they got back. A
+    reload builds the replacement predictor off to the side and swaps the
+    dict entry under a lock, so requests already holding the old predictor
+    finish on it and new requests pick up the new one.
+    """
+
+    def __init__(self, models: Dict[str, Path], default: Optional[str] = None):
+        if not models:
+            raise ValueError("ModelRegistry needs at least one model")
+        self.paths = {name: Path(path) for name, path in models.items()}
+        self.default = default if default is not None else next(iter(self.paths))
+        if self.default not in self.paths:
+            raise ValueError(f"Default model '{self.default}' is not one of {sorted(self.paths)}")
+        self._predictors: Dict[str, RandomForestPredictor] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _load(self, name: str) -> Optional[RandomForestPredictor]:
+        predictor = RandomForestPredictor(self.paths[name], model_version=name)
+        try:
+            predictor.load()
+            predictor.warm_up()
+        except Exception as e:
+            print(f"[ERR] loading model '{name}' from {self.paths[name]}: {e}")
+            with self._lock:
+                self._errors[name] = str(e)
+            return None
+
+        info = predictor.load_info
+        print(f"Loaded model '{name}' in {info.load_seconds * 1000:.1f} ms "
+              f"(warm-up {info.warmup_seconds * 1000:.1f} ms, {info.file_bytes / 1024:.0f} kB on disk, "
+              f"{info.memory_bytes / 1024:.0f} kB heap)")
+        with self._lock:
+            self._predictors[name] = predictor
+            self._errors.pop(name, None)
+        return predictor
+
+    def load_all(self) -> None:
+        """Eagerly load and warm up every configured model."""
+        for name in self.paths:
+            self._load(name)
+
+    def get(self, name: Optional[str] = None) -> RandomForestPredictor:
+        name = name or self.default
+        with self._lock:
+            predictor = self._predictors.get(name)
+        if predictor is not None:
+            return predictor
+        if name not in self.paths:
+            raise KeyError(f"Unknown model '{name}', expected one of {sorted(self.paths)}")
+        # Failed (or skipped) at startup; try again now rather than failing every request
+        predictor = self._load(name)
+        if predictor is None:
+            raise RuntimeError(f"Model '{name}' could not be loaded: {self._errors.get(name)}")
+        return predictor
+
+    def check_for_updates(self) -> List[str]:
+        """Reload any model whose artifact changed on disk. Returns the names swapped in."""
+        reloaded = []
+        for name, path in self.paths.items():
+            with self._lock:
+                current = self._predictors.get(name)
+            try:
+                mtime_ns = path.stat().st_mtime_ns
+            except OSError:
+                continue
+            if current is not None and current.load_info.mtime_ns == mtime_ns:
+                continue
+            if self._load(name) is not None:
+                reloaded.append(name)
+        return reloaded
+
+    def start(self, reload_seconds: float = 30.0) -> None:
+        """Load everything now, then watch the artifacts for changes on a daemon thread."""
+        self.load_all()
+        if reload_seconds <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=(reload_seconds,), name="model-reload", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self, reload_seconds: float) -> None:
+        while not self._stop.wait(reload_seconds):
+            self.check_for_updates()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            predictors = dict(self._predictors)
+            errors = dict(self._errors)
+        models = {}
+        for name, path in self.paths.items():
+            entry: Dict[str, Any] = {"path": str(path), "loaded": name in predictors}
+            if name in predictors:
+                info = predictors[name].load_info
+                entry.update({
+                    "n_features": len(predictors[name].feature_columns or []),
+                    "load_ms": round(info.load_seconds * 1000, 2),
+                    "warmup_ms": round(info.warmup_seconds * 1000, 2),
+                    "file_bytes": info.file_bytes,
+                    "memory_bytes": info.memory_bytes,
+                    "loaded_at": info.loaded_at,
+                })
+            if name in errors:
+                entry["error"] = errors[name]
+            models[name] = entry
+        return {"default": self.default, "models": models}
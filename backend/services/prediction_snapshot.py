@@ -0,0 +1,122 @@
+from __future__ import annotations
+import math
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+PREDICTION_GLOB = "fire_predictions_*.csv"
+
+
+@dataclass(frozen=True)
+class PredictionSnapshot:
+    """One prediction CSV, pre-indexed for lookups. Never mutated after load."""
+    source: str
+    as_of: str
+    loaded_at: str
+    ranked: List[Dict[str, Any]] = field(repr=False)  # highest fire_probability first
+    by_station: Dict[str, Dict[str, Any]] = field(repr=False)
+
+    def top(self, limit: Optional[int] = None, min_probability: float = 0.0) -> List[Dict[str, Any]]:
+        out = self.ranked if limit is None else self.ranked[:limit]
+        if min_probability > 0:
+            out = [r for r in out if r["fire_probability"] >= min_probability]
+        return out
+
+
+def _clean(value):
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def latest_prediction_file(predictions_dir: Path) -> Optional[Path]:
+    # File names are fire_predictions_<YYYY-MM-DD>[_<HH>].csv, so name order is time order
+    files = sorted(Path(predictions_dir).glob(PREDICTION_GLOB))
+    return files[-1] if files else None
+
+
+def load_snapshot(path: Path) -> PredictionSnapshot:
+    df = pd.read_csv(path)
+    df = df.dropna(subset=["station_url", "fire_probability"])
+    df = df.drop_duplicates("station_url", keep="last")
+    df = df.sort_values("fire_probability", ascending=False)
+
+    ranked = [
+        {key: _clean(value) for key, value in record.items()}
+        for record in df.to_dict(orient="records")
+    ]
+
+    # The sweep stamps each row; the newest stamp is when the snapshot was computed
+    as_of = None
+    if "timestamp" in df.columns and len(df):
+        newest = pd.to_datetime(df["timestamp"], utc=True, errors="coerce").max()
+        if not pd.isna(newest):
+            as_of = newest.isoformat()
+    if as_of is None:
+        as_of = datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc).isoformat()
+
+    return PredictionSnapshot(
+        source=path.name,
+        as_of=as_of,
+        loaded_at=datetime.now(timezone.utc).isoformat(),
+        ranked=ranked,
+        by_station={r["station_url"]: r for r in ranked},
+    )
+
+
+class SnapshotStore:
+    """
+    Holds the current PredictionSnapshot and swaps in a new one when a newer
+    (or rewritten) prediction CSV shows up.
+
+    Readers just take `store.current`; a refresh builds the new snapshot off to
+    the side and replaces the reference in one assignment, so reads never block.
+    """
+
+    def __init__(self, predictions_dir: Path, refresh_seconds: float = 60.0):
+        self.predictions_dir = Path(predictions_dir)
+        self.refresh_seconds = refresh_seconds
+        self.current: Optional[PredictionSnapshot] = None
+        self._loaded_key = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> bool:
+        """Load the newest prediction file if it changed. Returns True if a new snapshot was swapped in."""
+        with self._refresh_lock:
+            path = latest_prediction_file(self.predictions_dir)
+            if path is None:
+                return False
+            stat = path.stat()
+            key = (str(path), stat.st_mtime_ns, stat.st_size)
+            if key == self._loaded_key:
+                return False
+            try:
+                snapshot = load_snapshot(path)
+            except Exception as e:
+                print(f"[ERR] loading prediction snapshot {path}: {e}")
+                return False
+            self.current = snapshot
+            self._loaded_key = key
+            print(f"Loaded prediction snapshot {snapshot.source} ({len(snapshot.ranked)} stations, as of {snapshot.as_of})")
+            return True
+
+    def start(self) -> None:
+        """Load now, then poll for new files on a daemon thread."""
+        self.refresh()
+        if self.refresh_seconds <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="prediction-snapshot-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_seconds):
+            self.refresh()
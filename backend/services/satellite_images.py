@@ -1,15 +1,18 @@
 from __future__ import annotations
 import math
 import os
+import re
+import threading
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from io import BytesIO
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
-import requests
 from PIL import Image
 
+from src import http_client
+
 @dataclass(frozen=True)
 class SatelliteRequest:
     lat: float
@@ -18,6 +21,26 @@ class SatelliteRequest:
     fmt: str
 
 
+@dataclass(frozen=True)
+class TileKey:
+    z: int
+    x: int
+    y: int
+    fmt: str
+    date: str  # imagery date (UTC, YYYY-MM-DD); highsight refreshes tiles at most daily
+
+    @property
+    def filename(self) -> str:
+        return f"sat_z{self.z}_{self.x}_{self.y}_{self.date}.{self.fmt}"
+
+
+# PIL format names for the formats the API accepts
+_PIL_FORMATS = {"png": "PNG", "jpg": "JPEG", "jpeg": "JPEG"}
+_TILE_FILE_RE = re.compile(r"^sat_z(\d+)_(\d+)_(\d+)_(\d{4}-\d{2}-\d{2})\.(png|jpg)$")
+
+DEFAULT_TILE_CACHE_BYTES = 256 * 1024 * 1024
+
+
 def _latlon_to_tile(lat_deg: float, lon_deg: float, z: int) -> tuple[int, int]:
     """Convert latitude/longitude to XYZ tile coordinates (Web Mercator)."""
     lat_rad = math.radians(lat_deg)
@@ -27,36 +50,144 @@ def _latlon_to_tile(lat_deg: float, lon_deg: float, z: int) -> tuple[int, int]:
     return x_tile, y_tile
 
 
-def get_satellite_image_bytes(req: SatelliteRequest) -> bytes:
-    """
-    Fetch a satellite tile from highsight.dev and return the raw image bytes.
-    """
+def tile_key(req: SatelliteRequest, date: Optional[str] = None) -> TileKey:
+    x, y = _latlon_to_tile(req.lat, req.lon, req.zoom)
+    fmt = "jpg" if req.fmt.lower() == "jpeg" else req.fmt.lower()
+    return TileKey(z=req.zoom, x=x, y=y, fmt=fmt,
+                   date=date or datetime.now(timezone.utc).strftime("%Y-%m-%d"))
+
+
+def _download_tile(z: int, x: int, y: int) -> bytes:
     api_key = os.getenv("HIGHSIGHT_API_KEY", "oGVK5TFmsM9QdYArq8UiXZGgGsHXqTcw")
     if not api_key:
         raise RuntimeError("HIGHSIGHT_API_KEY not set")
 
-    x, y = _latlon_to_tile(req.lat, req.lon, req.zoom)
-    url = f"https://api.highsight.dev/v1/satellite/{req.zoom}/{x}/{y}?key={api_key}"
+    url = f"https://api.highsight.dev/v1/satellite/{z}/{x}/{y}?key={api_key}"
 
-    resp = requests.get(url, timeout=20)
+    resp = http_client.get_session().get(url, timeout=20)
     if resp.status_code != 200:
         raise RuntimeError(f"Highsight request failed ({resp.status_code}): {resp.text[:200]}")
+    return resp.content
 
-    # Validate image and normalize format
+
+def _normalize_image(data: bytes, fmt: str) -> bytes:
+    """
+    Return the image in the requested format. Image.open only reads the
+    header, so when upstream already sent that format the bytes pass straight
+    through without a decode/encode round trip.
+    """
     try:
-        img = Image.open(BytesIO(resp.content))
+        img = Image.open(BytesIO(data))
     except Exception as exc:  # pragma: no cover - defensive
         raise RuntimeError(f"Failed to parse image from highsight: {exc}") from exc
 
-    # Re-encode in requested format to ensure consistency
-    fmt = req.fmt.lower()
+    target = _PIL_FORMATS[fmt.lower()]
+    if img.format == target:
+        return data
+
+    if target == "JPEG" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
     buf = BytesIO()
-    img.save(buf, format="JPEG" if fmt == "jpeg" else fmt.upper())
+    img.save(buf, format=target)
     return buf.getvalue()
 
+
+def get_satellite_image_bytes(req: SatelliteRequest) -> bytes:
+    """
+    Fetch a satellite tile from highsight.dev and return the image bytes in req.fmt.
+    """
+    x, y = _latlon_to_tile(req.lat, req.lon, req.zoom)
+    return _normalize_image(_download_tile(req.zoom, x, y), req.fmt)
+
+
+class TileCache:
+    """
+    On-disk tile store keyed by (z, x, y, format, imagery date), bounded to
+    max_bytes with least-recently-used eviction.
+
+    Files live directly in cache_dir under TileKey.filename, so the existing
+    GET /api/v1/satellite/image/<filename> route serves them as-is. Only
+    files matching that naming scheme are indexed or evicted. Recency is kept
+    in each file's mtime so it survives restarts.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_TILE_CACHE_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, int]] = {}  # filename -> (last used, size)
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        for path in self.cache_dir.iterdir():
+            if _TILE_FILE_RE.match(path.name):
+                stat = path.stat()
+                self._entries[path.name] = (stat.st_mtime, stat.st_size)
+        self._evict()
+
+    def get(self, key: TileKey) -> Optional[Path]:
+        path = self.cache_dir / key.filename
+        with self._lock:
+            entry = self._entries.get(key.filename)
+            if entry is None or not path.exists():
+                self._entries.pop(key.filename, None)
+                self.misses += 1
+                return None
+            now = datetime.now(timezone.utc).timestamp()
+            os.utime(path, (now, now))
+            self._entries[key.filename] = (now, entry[1])
+            self.hits += 1
+        return path
+
+    def put(self, key: TileKey, data: bytes) -> Path:
+        path = self.cache_dir / key.filename
+        # Write then rename so a concurrent reader never sees a partial tile
+        tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._entries[key.filename] = (path.stat().st_mtime, len(data))
+            self._evict()
+        return path
+
+    def _evict(self) -> None:
+        total = sum(size for _, size in self._entries.values())
+        if total <= self.max_bytes:
+            return
+        for filename, (_, size) in sorted(self._entries.items(), key=lambda item: item[1][0]):
+            if total <= self.max_bytes:
+                break
+            (self.cache_dir / filename).unlink(missing_ok=True)
+            del self._entries[filename]
+            total -= size
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "tiles": len(self._entries),
+                "bytes": sum(size for _, size in self._entries.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+
+def get_satellite_tile(req: SatelliteRequest, cache: TileCache) -> Tuple[Path, bool]:
+    """
+    Path of the cached tile for req, downloading it on a miss.
+    Returns (path, cache_hit); a hit makes no network call.
+    """
+    key = tile_key(req)
+    path = cache.get(key)
+    if path is not None:
+        return path, True
+    data = _normalize_image(_download_tile(key.z, key.x, key.y), key.fmt)
+    return cache.put(key, data), False
+
 def build_filename(req: SatelliteRequest) -> str:
-    ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-    return f"sat_{req.lat:.6f}_{req.lon:.6f}_z{req.zoom}_{ts}.{req.fmt.lower()}"
+    # Same tile, format and day -> same name, so repeat requests reuse the file
+    return tile_key(req).filename
 
 def save_image_bytes(image_dir: Path, filename: str, data: bytes) -> Path:
     image_dir.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,152 @@
+from __future__ import annotations
+import hashlib
+import math
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Stations are bucketed into cells this many degrees wide for bbox lookups
+GRID_DEGREES = 1.0
+# Past this many cells a bbox is answered with one vectorized scan instead
+MAX_GRID_CELLS = 2048
+# Map zoom at and above which individual stations are returned instead of clusters
+CLUSTER_MAX_ZOOM = 9
+# Clusters are roughly this fraction of a 256px map tile wide
+CLUSTERS_PER_TILE = 4
+
+
+@dataclass(frozen=True)
+class BBox:
+    min_lat: float
+    max_lat: float
+    min_lon: float
+    max_lon: float
+
+
+class StationCatalog:
+    """
+    Station catalog held as parallel NumPy columns, sorted by grid cell.
+
+    A bbox query only visits the cells it overlaps. The work done tracks the
+    number of stations in view, not the size of the catalog.
+    """
+
+    def __init__(self, stations: pd.DataFrame, source: str, last_modified: datetime, version: str):
+        stations = stations.dropna(subset=["latitude", "longitude"]).drop_duplicates("station_url")
+        lat = stations["latitude"].to_numpy(dtype=np.float64)
+        lon = stations["longitude"].to_numpy(dtype=np.float64)
+        cell_lat = np.floor(lat / GRID_DEGREES).astype(np.int64)
+        cell_lon = np.floor(lon / GRID_DEGREES).astype(np.int64)
+        order = np.lexsort((cell_lon, cell_lat))
+
+        self.station_urls = stations["station_url"].str.rstrip("/").to_numpy(dtype=object)[order]
+        self.latitudes = lat[order]
+        self.longitudes = lon[order]
+        self.source = source
+        self.last_modified = last_modified
+        self.version = version
+
+        # (cell_lat, cell_lon) -> [start, end) into the sorted columns
+        keys = list(zip(cell_lat[order].tolist(), cell_lon[order].tolist()))
+        self._cells: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        for i, key in enumerate(keys):
+            start, _ = self._cells.get(key, (i, i))
+            self._cells[key] = (start, i + 1)
+
+    @classmethod
+    def load(cls, path: Path) -> "StationCatalog":
+        path = Path(path)
+        stat = path.stat()
+        stations = pd.read_csv(path, usecols=["station_url", "latitude", "longitude"])
+        version = hashlib.sha1(f"{path.resolve()}:{stat.st_mtime_ns}:{stat.st_size}".encode()).hexdigest()[:16]
+        last_modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+        return cls(stations, source=path.name, last_modified=last_modified, version=version)
+
+    def __len__(self) -> int:
+        return len(self.station_urls)
+
+    def select(self, bbox: Optional[BBox] = None) -> np.ndarray:
+        """Positions of the stations inside bbox (all stations without one), in catalog order."""
+        if bbox is None:
+            return np.arange(len(self))
+        lat_cells = range(math.floor(bbox.min_lat / GRID_DEGREES), math.floor(bbox.max_lat / GRID_DEGREES) + 1)
+        lon_cells = range(math.floor(bbox.min_lon / GRID_DEGREES), math.floor(bbox.max_lon / GRID_DEGREES) + 1)
+        if len(lat_cells) * len(lon_cells) > MAX_GRID_CELLS:
+            candidates = np.arange(len(self))
+        else:
+            spans = [self._cells[(a, b)] for a in lat_cells for b in lon_cells if (a, b) in self._cells]
+            if not spans:
+                return np.empty(0, dtype=np.int64)
+            candidates = np.concatenate([np.arange(start, end) for start, end in spans])
+        lat, lon = self.latitudes[candidates], self.longitudes[candidates]
+        inside = ((lat >= bbox.min_lat) & (lat <= bbox.max_lat)
+                  & (lon >= bbox.min_lon) & (lon <= bbox.max_lon))
+        return np.sort(candidates[inside])
+
+    def stations(self, positions: np.ndarray) -> List[Dict[str, Any]]:
+        urls = self.station_urls[positions].tolist()
+        return [{"station_url": url, "station_id": url.rsplit("/", 1)[-1], "latitude": lat, "longitude": lon}
+                for url, lat, lon in zip(urls, self.latitudes[positions].tolist(),
+                                         self.longitudes[positions].tolist())]
+
+    def clusters(self, positions: np.ndarray, zoom: int) -> List[Dict[str, Any]]:
+        """
+        Group stations into square cells sized for the map zoom. A cluster of
+        one carries its station_url; bigger ones only a count and centroid.
+        """
+        if not len(positions):
+            return []
+        cell = 360.0 / (2 ** zoom) / CLUSTERS_PER_TILE
+        lat, lon = self.latitudes[positions], self.longitudes[positions]
+        keys = np.stack([np.floor(lat / cell), np.floor(lon / cell)], axis=1)
+        _, first, inverse, counts = np.unique(keys, axis=0, return_index=True, return_inverse=True,
+                                              return_counts=True)
+        inverse = inverse.ravel()
+        mean_lat = np.bincount(inverse, weights=lat) / counts
+        mean_lon = np.bincount(inverse, weights=lon) / counts
+        out = []
+        for i, (count, la, lo) in enumerate(zip(counts.tolist(), mean_lat.tolist(), mean_lon.tolist())):
+            cluster = {"latitude": la, "longitude": lo, "count": count}
+            if count == 1:
+                cluster["station_url"] = self.station_urls[positions[first[i]]]
+            out.append(cluster)
+        return out
+
+
+class StationCatalogStore:
+    """Holds the current StationCatalog and reloads it when the CSV changes on disk."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._mtime_ns: Optional[int] = None
+        self._catalog: Optional[StationCatalog] = None
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """Reload if the file changed since the last load; returns True when it did."""
+        try:
+            mtime_ns = self.path.stat().st_mtime_ns
+        except OSError as e:
+            if self._catalog is None:
+                print(f"Station catalog unavailable: {e}")
+            return False
+        if mtime_ns == self._mtime_ns:
+            return False
+        with self._lock:
+            if mtime_ns == self._mtime_ns:
+                return False
+            catalog = StationCatalog.load(self.path)
+            self._catalog, self._mtime_ns = catalog, mtime_ns
+        print(f"Loaded station catalog {catalog.source} ({len(catalog)} stations)")
+        return True
+
+    @property
+    def current(self) -> Optional[StationCatalog]:
+        self.refresh()
+        return self._catalog
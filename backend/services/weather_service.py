@@ -1,15 +1,30 @@
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache
 import pandas as pd
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import requests
 from config import Config
+from src import http_client
+from src.observations import FetchStats, fetch_windowed_observations, select_daily_observations
 
 USER_AGENT = "RinconFire/1.0 (contact: youremail@example.com)"  # set a real contact if you can
 DEFAULT_TIMEOUT = 15  # seconds
 BASE = "https://api.weather.gov"
 WEATHER_STATIONS_CSV = Config().STATIONS_DIR
 
+# Defaults for missing observation values, applied before the model sees them
+WEATHER_FILL_VALUES = {
+    "temperature": 22.2,
+    "dewpoint": 5.6,
+    "relativeHumidity": 39.0,
+    "barometricPressure": 1014.9,
+    "precipitationLast3Hours": 0,
+    "windDirection": 0,
+    "windSpeed": 0,
+    "windGust": 0
+}
+
 def _get(url: str, *, headers: Optional[Dict[str, str]] = None, params: Optional[Dict[str, Any]] = None,
          timeout: int = DEFAULT_TIMEOUT, max_retries: int = 3, backoff: float = 1.5) -> Optional[requests.Response]:
     hdrs = {
@@ -19,27 +34,21 @@ def _get(url: str, *, headers: Optional[Dict[str, str]] = None, params: Optional
     if headers:
         hdrs.update(headers)
 
-    for attempt in range(max_retries):
-        try:
-            resp = requests.get(url, headers=hdrs, params=params, timeout=timeout)
-            if resp.status_code == 429 or 500 <= resp.status_code < 600:
-                wait = backoff ** attempt
-                print(f"[{resp.status_code}] Retrying {url} in {wait:.1f}s...")
-                time.sleep(wait)
-                continue
-            if not resp.ok:
-                print(f"[{resp.status_code}] GET {url} failed: {resp.text[:200]}")
-                return None
-            return resp  # .json()
-        except requests.RequestException as e:
-            wait = backoff ** attempt
-            print(f"[EXC] {e}; retrying in {wait:.1f}s...")
-            time.sleep(wait)
-
-    print(f"[ERR] Max retries exceeded for {url}")
-    return None
-
-def request_seven_day_observations(station_id_url: str):
+    resp = http_client.get(url, headers=hdrs, params=params, timeout=timeout,
+                           max_retries=max_retries, backoff=backoff)
+    return resp  # .json()
+
+def request_seven_day_observations(station_id_url: str, windowed: bool = True, stats: Optional[FetchStats] = None):
+    """Same fetch modes as src.api_helpers.request_seven_day_observations."""
+    stats = stats if stats is not None else FetchStats()
+    if windowed:
+        features = fetch_windowed_observations(station_id_url, _get, stats=stats)
+        if features is None:
+            return None
+        out = select_daily_observations(features)
+        if len(out) >= 7:
+            return out
+
     # Iterate through pages and then grab only dates/times that we want
     out = []
     has_next_page = True
@@ -53,6 +62,7 @@ def request_seven_day_observations(station_id_url: str):
             return None
         try:
             data = resp.json()
+            stats.add_page(resp, len(data['features']))
             for item in data['features']:
                 sid = item["id"]
                 timestamp = item['properties']['timestamp']
@@ -78,6 +88,40 @@ def request_seven_day_observations(station_id_url: str):
             return None
     return out
 
+def fetch_observations_concurrently(station_urls: List[str], max_workers: int = 8
+                                    ) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, str]]:
+    """
+    Fetch 7 days of observations for many stations on a thread pool.
+
+    Returns ({station_url: observations}, {station_url: error message}); a
+    failing station lands in the second dict instead of raising.
+    """
+    def fetch(station_url):
+        observations = request_seven_day_observations(station_url)
+        if observations is None:
+            raise RuntimeError("No observations returned by api.weather.gov")
+        if len(observations) < 7:
+            raise ValueError(f"Only {len(observations)} of 7 daily observations available")
+        return observations
+
+    observations: Dict[str, List[Dict[str, Any]]] = {}
+    errors: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(fetch, url): url for url in station_urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                observations[url] = future.result()
+            except Exception as e:
+                errors[url] = str(e) or type(e).__name__
+    return observations, errors
+
+@lru_cache(maxsize=4)
+def load_station_catalog(path: str = str(WEATHER_STATIONS_CSV)) -> pd.DataFrame:
+    """station_url/latitude/longitude for every known station, indexed by station_url."""
+    catalog = pd.read_csv(path, usecols=["station_url", "latitude", "longitude"])
+    return catalog.drop_duplicates("station_url").set_index("station_url")
+
 def extract_weather(weather_data):
     extracted_weather_data = []
     for observation in weather_data:
@@ -130,22 +174,10 @@ def prepare_weather_week(df):
     df["date"] = pd.to_datetime(df["date"])
     df = df.sort_values("date", ascending=True).reset_index(drop=True)
 
-    # 2. Define the filling logic
-    fill_values = {
-        "temperature": 22.2,
-        "dewpoint": 5.6,
-        "relativeHumidity": 39.0,
-        "barometricPressure": 1014.9,
-        "precipitationLast3Hours": 0,
-        "windDirection": 0,
-        "windSpeed": 0,
-        "windGust": 0
-    }
-
-    # 3. Apply the fills (handles None/NaN)
-    df = df.fillna(value=fill_values)
+    # 2. Apply the fills (handles None/NaN)
+    df = df.fillna(value=WEATHER_FILL_VALUES)
 
-    # 4. Define features and pivot
+    # 3. Define features and pivot
     feature_cols = [
         "temperature", "dewpoint", "relativeHumidity", "precipitationLast3Hours",
         "windDirection", "windSpeed", "windGust", "barometricPressure",
@@ -161,7 +193,7 @@ def prepare_weather_week(df):
         .unstack()
     )
 
-    # 5. Rename columns to feature_day0, feature_day1...
+    # 4. Rename columns to feature_day0, feature_day1...
     X_weather.columns = [
         f"{feature}_day{day}"
         for feature, day in X_weather.columns
@@ -4,9 +4,24 @@ from typing import Any, Dict, List, Optional
 import pandas as pd
 from datetime import datetime
 
+try:
+    from src import http_client
+    from src.observations import FetchStats, fetch_windowed_observations, select_daily_observations, window_start
+    from src.observation_cache import ObservationCache
+    from src.features import FEATURE_COLUMNS, N_DAYS, build_feature_row
+    from src.station_index import StationIndex, load_station_index
+except ModuleNotFoundError:
+    import http_client
+    from observations import FetchStats, fetch_windowed_observations, select_daily_observations, window_start
+    from observation_cache import ObservationCache
+    from features import FEATURE_COLUMNS, N_DAYS, build_feature_row
+    from station_index import StationIndex, load_station_index
+
 USER_AGENT = "RinconFire/1.0 (contact: user)"  # set a real contact if you can
 DEFAULT_TIMEOUT = 5  # seconds
 BASE = "https://api.weather.gov"
+# Points with no indexed station this close fall back to the /points lookup
+MAX_STATION_KM = 50.0
 
 def _get(url: str, *, headers: Optional[Dict[str, str]] = None, params: Optional[Dict[str, Any]] = None,
          timeout: int = DEFAULT_TIMEOUT, max_retries: int = 3, backoff: float = 1.5) -> Optional[requests.Response]:
@@ -17,25 +32,9 @@ def _get(url: str, *, headers: Optional[Dict[str, str]] = None, params: Optional
     if headers:
         hdrs.update(headers)
 
-    for attempt in range(max_retries):
-        try:
-            resp = requests.get(url, headers=hdrs, params=params, timeout=timeout)
-            if resp.status_code == 429 or 500 <= resp.status_code < 600:
-                wait = backoff ** attempt
-                print(f"[{resp.status_code}] Retrying {url} in {wait:.1f}s...")
-                time.sleep(wait)
-                continue
-            if not resp.ok:
-                print(f"[{resp.status_code}] GET {url} failed: {resp.text[:200]}")
-                return None
-            return resp
-        except requests.RequestException as e:
-            wait = backoff ** attempt
-            print(f"[EXC] {e}; retrying in {wait:.1f}s...")
-            time.sleep(wait)
-
-    print(f"[ERR] Max retries exceeded for {url}")
-    return None
+    resp = http_client.get(url, headers=hdrs, params=params, timeout=timeout,
+                           max_retries=max_retries, backoff=backoff)
+    return resp
 
 def get_station_list(limit: int = 200) -> Optional[List[str]]:
     """Return a list of station IDs (URLs) from /stations. Limit keeps it reasonable."""
@@ -61,7 +60,52 @@ def request_observations(station_id_url: str, latest_only: bool = True) -> Optio
     resp = _get(url)
     return resp.json() if resp else None
 
-def request_seven_day_observations(station_id_url: str):
+def latest_observation_time(station_id_url: str, stats: Optional[FetchStats] = None) -> str:
+    """Timestamp of a station's newest observation from /observations/latest (one small request)."""
+    resp = _get(station_id_url.rstrip("/") + "/observations/latest")
+    if not resp:
+        raise RuntimeError(f"No latest observation returned for {station_id_url}")
+    data = resp.json()
+    if stats is not None:
+        stats.add_page(resp, 1)
+    timestamp = data.get("properties", {}).get("timestamp")
+    if not timestamp:
+        raise ValueError(f"Latest observation for {station_id_url} has no timestamp")
+    return timestamp
+
+def request_seven_day_observations(station_id_url: str, windowed: bool = True, stats: Optional[FetchStats] = None,
+                                   cache: Optional[ObservationCache] = None):
+    """
+    Return one observation per day for the last 7 days at the hour of the newest observation.
+
+    windowed=True asks the API for just the last 7 days (start/end) and picks the
+    hours in one vectorized pass; stations that don't have 7 matching days in that
+    window fall back to the original page scan. Pass a FetchStats to get the
+    pages and bytes downloaded.
+
+    With an ObservationCache, only observations newer than the latest cached
+    one are downloaded and the rest of the window is read back from disk.
+    """
+    stats = stats if stats is not None else FetchStats()
+    if windowed:
+        if cache is None:
+            features = fetch_windowed_observations(station_id_url, _get, stats=stats)
+            if features is None:
+                return None
+        else:
+            new_features = []
+            if not cache.is_fresh(station_id_url):
+                new_features = fetch_windowed_observations(
+                    station_id_url, _get, stats=stats, start=cache.latest_timestamp(station_id_url)
+                )
+                if new_features is None:
+                    return None
+                cache.put(station_id_url, new_features)
+            features = cache.features_since(station_id_url, window_start(), downloaded=len(new_features))
+        out = select_daily_observations(features)
+        if len(out) >= 7:
+            return out
+
     # Iterate through pages and then grab only dates/times that we want
     out = []
     has_next_page = True
@@ -74,6 +118,7 @@ def request_seven_day_observations(station_id_url: str):
             return None
         try:
             data = resp.json()
+            stats.add_page(resp, len(data['features']))
             for item in data['features']:
                 sid = item["id"]
                 timestamp = item['properties']['timestamp']
@@ -99,7 +144,8 @@ def request_seven_day_observations(station_id_url: str):
     return out
 
 
-def request_seven_day_weather(lat: float, lon: float):
+def points_station_url(lat: float, lon: float) -> Optional[str]:
+    """First observation station api.weather.gov lists for a point (/points, then observationStations)."""
     points_url = f"{BASE}/points/{lat},{lon}"
     resp = _get(points_url)
     if not resp:
@@ -130,6 +176,31 @@ def request_seven_day_weather(lat: float, lon: float):
     except Exception as e:
         print(f"[ERR] parsing stations list for point: {e}")
         return None
+    return first_station
+
+def nearest_station_url(lat: float, lon: float, index: Optional[StationIndex] = None,
+                        max_km: float = MAX_STATION_KM, fallback: bool = True) -> Optional[str]:
+    """
+    Station URL for a point from the local station index, with no upstream
+    requests. Points with no indexed station within max_km (or when the
+    station CSVs can't be read) go through points_station_url if fallback is set.
+    """
+    try:
+        if index is None:
+            index = load_station_index()
+        nearest = index.nearest(lat, lon, k=1, max_km=max_km)
+    except (OSError, ValueError) as e:
+        print(f"[WARN] station index unavailable: {e}")
+        nearest = []
+    if nearest:
+        return nearest[0][0]
+    return points_station_url(lat, lon) if fallback else None
+
+
+def request_seven_day_weather(lat: float, lon: float):
+    first_station = nearest_station_url(lat, lon)
+    if not first_station:
+        return None
 
     # Iterate through pages and then grab only dates/times that we want
     out = []
@@ -188,30 +259,22 @@ def extract_weather(weather_data):
 
     return weather_df
 
-def get_formatted_weather_data(station_url: str):
-    weather_data = request_seven_day_observations(station_url)
+def get_seven_day_observations(station_url: str, windowed: bool = True, stats: Optional[FetchStats] = None,
+                               cache: Optional[ObservationCache] = None) -> List[Dict[str, Any]]:
+    """Like request_seven_day_observations, but raises instead of returning None or fewer than 7 days."""
+    observations = request_seven_day_observations(station_url, windowed=windowed, stats=stats, cache=cache)
+    if observations is None:
+        raise RuntimeError(f"No observations returned for {station_url}")
+    if len(observations) < N_DAYS:
+        raise ValueError(f"Only {len(observations)} of {N_DAYS} daily observations available for {station_url}")
+    return observations
+
+def get_formatted_weather_data(station_url: str, windowed: bool = True, stats: Optional[FetchStats] = None,
+                               cache: Optional[ObservationCache] = None):
+    weather_data = get_seven_day_observations(station_url, windowed=windowed, stats=stats, cache=cache)
     # print(weather_data)
-    weather_data = extract_weather(weather_data)
-
-    date = weather_data.iloc[0]['date']
-    weather_row = pd.Series([])
-
-    weather_data = weather_data.drop('date', axis=1)
-
-    for i, weather_day in weather_data.iterrows():
-        weather_row = pd.concat([weather_day, weather_row])
-
-    # weather_row = pd.concat([pd.Series([date]), weather_row])
-
-    cols = ['temperature', 'dewpoint', 'relative_humidity', 'precipitation', 'wind_direction', 'wind_speed',
-            'wind_gust', 'air_pressure']
-
-    final_cols = []
-    for i in range(1, 8):
-        for col in cols:
-            final_cols.append(col + '_' + str(i))
-    weather_row = weather_row.to_numpy()
-    formatted_data_df = pd.DataFrame([weather_row], columns=final_cols)
+    weather_row = build_feature_row(weather_data, FEATURE_COLUMNS)
+    formatted_data_df = pd.DataFrame([weather_row], columns=FEATURE_COLUMNS)
     return formatted_data_df
 
 
@@ -229,38 +292,11 @@ def get_all_station_observations(station_id_list: List[str], latest_only: bool =
 
 def request_weather(lat: float, lon: float) -> Optional[Dict[str, Any]]:
     """
-    Given a latitude/longitude, use /points to find nearby stations and return
-    the latest observation from the first available station.
+    Given a latitude/longitude, find the nearest station (local index, /points
+    as a fallback) and return its latest observation.
     """
-    points_url = f"{BASE}/points/{lat},{lon}"
-    resp = _get(points_url)
-    if not resp:
-        return None
-    try:
-        points = resp.json()
-        stations_url = points.get("properties", {}).get("observationStations")
-        if not stations_url:
-            print("[WARN] No observationStations link in points payload.")
-            return None
-    except Exception as e:
-        print(f"[ERR] parsing points: {e}")
-        return None
-
-    resp2 = _get(stations_url)
-    if not resp2:
-        return None
-    try:
-        stations_payload = resp2.json()
-        features = stations_payload.get("features", [])
-        if not features:
-            print("[WARN] No stations found near the provided coordinates.")
-            return None
-        first_station = features[0].get("id")
-        if not first_station:
-            print("[WARN] First station has no id.")
-            return None
-    except Exception as e:
-        print(f"[ERR] parsing stations list for point: {e}")
+    first_station = nearest_station_url(lat, lon)
+    if not first_station:
         return None
 
     latest = request_observations(first_station, latest_only=True)
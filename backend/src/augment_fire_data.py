@@ -1,86 +1,71 @@
-from urllib.error import URLError
-from meteostat import Point, Hourly
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List
+
 import pandas as pd
-from datetime import datetime, timedelta
-import os
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+from src.dataset_builder import (FireRecord, PlannedFetcher, build_dataset, fetch_hourly, merge_shards,
+                                 read_fire_records, same_hour_week)
 
 # for each fire date, lat and long
 #   add fire_index to be able to associate each entry to the same fire
 #   add day [1-7]
-#   request data for date and time then loop through subtracting 1 from day (plan for potential month change or disregard)
-#   request the same series of time 1 year earlier labeled as no fire
-    
-base_dir = os.getcwd()
-
-fire_data = pd.read_csv(base_dir + '\\..\\data\\fires.csv')
-
-augmented_data = []
-
-for i, row in fire_data.iterrows():
-    try:
-        if(int(i) >= 20000):
-            break
-        if(int(i) < 10000):
-            continue
-
-        object_id = row['OBJECTID']
-
-        date, time = row['attr_FireDiscoveryDateTime'].split(" ")
-        date = date.split("/")
-
-        time = time.split(":")
-        hour = int(time[0])
-
-
-        # label to make more readable
-        month = int(date[0])
-        day = int(date[1])
-        year = int(date[2])
-
-        lat = float(row['attr_InitialLatitude'])
-        long = float(row['attr_InitialLongitude'])
-
-        # Retrieve week-long fire data
-        fire_date = datetime(year, month, day, hour)
-        fire_week_before_date = fire_date - timedelta(days=6)
-        fire_loc = Point(lat, long)
-
-        weather = Hourly(fire_loc, fire_week_before_date, fire_date)
-        weather_data = weather.fetch()
-        weather_data = pd.DataFrame(weather_data)
-
-        # If data is retrieved, filter for same hour every day of the past week
-        if not weather_data.empty:
-            daily_data = weather_data.loc[weather_data.index.hour == hour]
-            previous_year_end_date = fire_date - timedelta(days=365)
-            previous_year_start_date = fire_week_before_date - timedelta(days=365)
-            previous_year_weather = Hourly(fire_loc, previous_year_start_date, previous_year_end_date)
-            previous_year_weather_data = previous_year_weather.fetch()
-
-            # If data for a year earlier is retrieved, filter for one entry per day at the same hour
-            if not previous_year_weather_data.empty:
-                previous_year_daily_data = previous_year_weather_data.loc[previous_year_weather_data.index.hour == hour]
-
-                # make time a normal column rather than the index
-                daily_data = daily_data.reset_index()
-                for index, daily_row in daily_data.iterrows():
-                    augmented_row = pd.concat([pd.Series([object_id]), pd.Series([index + 1]), daily_data.iloc[index], pd.Series([1])])
-                    augmented_data.append(augmented_row.to_numpy())
-
-                previous_year_daily_data = previous_year_daily_data.reset_index()
-                for index, daily_row in previous_year_daily_data.iterrows():
-                    augmented_row = pd.concat([pd.Series([object_id]), pd.Series([index + 1]), previous_year_daily_data.iloc[index], pd.Series([0])])
-                    augmented_data.append(augmented_row.to_numpy())
-
-                print(int(i))
-    except URLError as e:
-        print(e)
-        break
-
-
-# temp,dwpt,rhum,prcp,snow,wdir,wspd,wpgt,pres,tsun,coco,hasFire
-cols = ['object_id', 'day', 'date_time', 'temperature', 'dewpoint', 'relative_humidity', 'precipitation', 'snow', 'wind_direction', 'wind_speed', 'wind_gust', 'air_pressure', 'sunshine', 'weather_code', 'fire']
-
-augmented_data_df = pd.DataFrame(augmented_data, columns=cols)
-
-augmented_data_df.to_csv(base_dir + '\\..\\data\\fires_week_long_10000_19999.csv',index_label='id')
+#   request the week leading up to the fire (fire = 1)
+#   request the same week 1 year earlier labeled as no fire (fire = 0)
+
+DATA_DIR = ROOT / "data"
+INPUT_CSV = DATA_DIR / "fires.csv"
+FIRST_ROW, LAST_ROW = 10000, 19999
+BUILD_DIR = DATA_DIR / "build" / f"fires_week_long_{FIRST_ROW}_{LAST_ROW}"
+OUTPUT_CSV = DATA_DIR / f"fires_week_long_{FIRST_ROW}_{LAST_ROW}.csv"
+
+# Meteostat parameter -> column name, in output order
+WEATHER = {
+    "temp": "temperature",
+    "dwpt": "dewpoint",
+    "rhum": "relative_humidity",
+    "prcp": "precipitation",
+    "snwd": "snow",
+    "wdir": "wind_direction",
+    "wspd": "wind_speed",
+    "wpgt": "wind_gust",
+    "pres": "air_pressure",
+    "tsun": "sunshine",
+    "coco": "weather_code",
+}
+COLUMNS = ["object_id", "day", "date_time", *WEATHER.values(), "fire"]
+
+
+def week_windows(record: FireRecord) -> List[pd.Timestamp]:
+    return [record.discovery, record.discovery - pd.Timedelta(days=365)]
+
+
+def week_long_rows(record: FireRecord, fetch=fetch_hourly) -> List[Dict[str, Any]]:
+    """7 daily rows for the fire week plus 7 for the same week a year earlier; nothing if either is empty."""
+    fire_week = same_hour_week(record.latitude, record.longitude, record.discovery, list(WEATHER), fetch=fetch)
+    if fire_week.isna().all().all():
+        return []
+    control_week = same_hour_week(record.latitude, record.longitude,
+                                  record.discovery - pd.Timedelta(days=365), list(WEATHER), fetch=fetch)
+    if control_week.isna().all().all():
+        return []
+
+    rows = []
+    for week, fire in ((fire_week, 1), (control_week, 0)):
+        week = week.rename(columns=WEATHER)
+        for day, (date_time, values) in enumerate(week.iterrows(), start=1):
+            rows.append({"object_id": record.object_id, "day": day, "date_time": date_time,
+                         **values.to_dict(), "fire": fire})
+    return rows
+
+
+if __name__ == "__main__":
+    # Select by CSV row, not list position: rows with a missing date or location are already dropped
+    records = [r for r in read_fire_records(INPUT_CSV) if FIRST_ROW <= int(r.key) <= LAST_ROW]
+    fetcher = PlannedFetcher(records, week_windows, list(WEATHER))
+    print(fetcher.report.summary())
+    build_dataset(records, partial(week_long_rows, fetch=fetcher), COLUMNS, BUILD_DIR)
+    merge_shards(BUILD_DIR, OUTPUT_CSV)
@@ -0,0 +1,527 @@
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_SHARD_ROWS = 1000     # output rows per part-NNNNN.csv
+DEFAULT_MAX_RETRIES = 3
+# Fires farther than this from any Meteostat station are fetched by exact point instead
+DEFAULT_SNAP_RADIUS_KM = 50.0
+# Windows for one station closer than this are fetched as a single range...
+DEFAULT_MERGE_GAP = timedelta(days=1)
+# ...as long as the merged range stays under this long
+DEFAULT_MAX_RANGE = timedelta(days=120)
+EARTH_RADIUS_KM = 6371.0
+PROGRESS_FILE = "progress.jsonl"
+KEY_COLUMN = "source_key"
+
+# Meteostat hourly parameters -> training CSV names (fire_weather_utah.csv layout)
+TRAINING_WEATHER = {
+    "temp": "temperature",
+    "dwpt": "dewpoint",
+    "rhum": "relative_humidity",
+    "prcp": "precipitation",
+    "snwd": "snow",
+    "wdir": "wind_direction",
+    "wspd": "wind_speed",
+    "wpgt": "wind_gust",
+    "pres": "air_pressure",
+}
+
+
+@dataclass(frozen=True)
+class FireRecord:
+    key: str                     # stable id for checkpointing (row position in the input CSV)
+    object_id: Any
+    discovery: pd.Timestamp      # floored to the hour
+    latitude: float
+    longitude: float
+
+
+def read_fire_records(path: Path) -> List[FireRecord]:
+    """Parse a fires CSV (attr_FireDiscoveryDateTime, attr_InitialLatitude/Longitude) in one vectorized pass."""
+    fires = pd.read_csv(path)
+    discovery = pd.to_datetime(fires["attr_FireDiscoveryDateTime"], format="%m/%d/%Y %H:%M", errors="coerce")
+    lat = pd.to_numeric(fires["attr_InitialLatitude"], errors="coerce")
+    lon = pd.to_numeric(fires["attr_InitialLongitude"], errors="coerce")
+    object_ids = fires["OBJECTID"] if "OBJECTID" in fires.columns else pd.Series(range(len(fires)))
+
+    valid = discovery.notna() & lat.notna() & lon.notna()
+    if (~valid).any():
+        print(f"Skipping {(~valid).sum()} fires with a missing date or location")
+    return [
+        FireRecord(key=str(i), object_id=oid, discovery=ts.floor("h"), latitude=float(la), longitude=float(lo))
+        for i, oid, ts, la, lo, ok in zip(range(len(fires)), object_ids, discovery, lat, lon, valid)
+        if ok
+    ]
+
+
+def fetch_hourly(lat: float, lon: float, start, end, parameters: Sequence[str]) -> pd.DataFrame:
+    """Meteostat hourly data for a point, indexed by time."""
+    from meteostat import Parameter, Point, hourly
+
+    data = hourly(Point(lat, lon), start, end, parameters=[Parameter(p) for p in parameters]).fetch()
+    if data is None or len(data) == 0:
+        return pd.DataFrame(columns=list(parameters))
+    if isinstance(data.index, pd.MultiIndex):
+        data = data.droplevel(0)
+    return data
+
+
+def load_meteostat_stations() -> pd.DataFrame:
+    """Meteostat's station catalog (id, latitude, longitude), read once from its local database."""
+    from meteostat import stations
+
+    return stations.query("SELECT id, latitude, longitude FROM stations").reset_index(drop=True)
+
+
+def snap_to_stations(latitudes: Sequence[float], longitudes: Sequence[float], station_catalog: pd.DataFrame,
+                     radius_km: float = DEFAULT_SNAP_RADIUS_KM) -> List[Optional[str]]:
+    """Nearest station id for each point (haversine BallTree), or None if none is within radius_km."""
+    from sklearn.neighbors import BallTree
+
+    if station_catalog.empty or not len(latitudes):
+        return [None] * len(latitudes)
+    tree = BallTree(np.radians(station_catalog[["latitude", "longitude"]].to_numpy(dtype=float)), metric="haversine")
+    query = np.radians(np.column_stack([latitudes, longitudes]).astype(float))
+    distance, index = tree.query(query, k=1)
+    ids = station_catalog["id"].to_numpy()
+    within = distance[:, 0] * EARTH_RADIUS_KM <= radius_km
+    return [str(ids[i]) if ok else None for i, ok in zip(index[:, 0], within)]
+
+
+def merge_ranges(windows: Sequence[Tuple[datetime, datetime]], gap: timedelta = DEFAULT_MERGE_GAP,
+                 max_range: timedelta = DEFAULT_MAX_RANGE) -> List[Tuple[datetime, datetime]]:
+    """Merge overlapping (or nearly touching) [start, end] windows, keeping each merged range under max_range."""
+    merged: List[List[datetime]] = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1] + gap and max(end, merged[-1][1]) - merged[-1][0] <= max_range:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+@dataclass
+class FetchPlanReport:
+    windows: int = 0           # fetches the naive one-call-per-window approach makes
+    planned: int = 0           # station-range fetches in the plan
+    fetched: int = 0           # planned ranges actually downloaded so far
+    snapped: int = 0           # windows served from a nearby station rather than the exact point
+
+    @property
+    def saved(self) -> int:
+        return self.windows - self.planned
+
+    def summary(self) -> str:
+        pct = self.saved / self.windows * 100 if self.windows else 0.0
+        return (f"{self.windows} per-fire fetches -> {self.planned} station-range fetches "
+                f"({self.saved} saved, {pct:.0f}%); {self.snapped} windows snapped to a station")
+
+
+class PlannedFetcher:
+    """
+    Drop-in `fetch` for same_hour_week that serves windows out of a fetch plan.
+
+    Records are snapped to their nearest Meteostat station and every window a
+    builder will ask for is merged per station into as few ranges as
+    possible. Each range is downloaded once, on first use, and sliced for
+    every window inside it. A range's frame is released once all of its
+    windows have been served.
+    """
+
+    def __init__(self, records: Sequence[FireRecord], window_ends: Callable[[FireRecord], Sequence[pd.Timestamp]],
+                 parameters: Sequence[str], station_catalog: Optional[pd.DataFrame] = None,
+                 radius_km: float = DEFAULT_SNAP_RADIUS_KM, gap: timedelta = DEFAULT_MERGE_GAP,
+                 max_range: timedelta = DEFAULT_MAX_RANGE, fetch_range: Optional[Callable[..., pd.DataFrame]] = None):
+        self.parameters = list(parameters)
+        self.fetch_range = fetch_range or self._fetch_meteostat
+        if station_catalog is None:
+            try:
+                station_catalog = load_meteostat_stations()
+            except Exception as e:
+                print(f"Meteostat station catalog unavailable, grouping by exact point only: {e}")
+                station_catalog = pd.DataFrame(columns=["id", "latitude", "longitude"])
+
+        station_ids = snap_to_stations([r.latitude for r in records], [r.longitude for r in records],
+                                       station_catalog, radius_km)
+        # Location key -> what to fetch: a station id, or the exact point when none is close enough
+        self._location: Dict[Tuple[float, float], str] = {}
+        windows_by_source: Dict[str, List[Tuple[datetime, datetime]]] = {}
+        self.report = FetchPlanReport()
+        for record, station_id in zip(records, station_ids):
+            point = (record.latitude, record.longitude)
+            source = station_id or f"point:{record.latitude:.5f},{record.longitude:.5f}"
+            self._location[point] = source
+            for end in window_ends(record):
+                end = pd.Timestamp(end).to_pydatetime()
+                windows_by_source.setdefault(source, []).append((end - timedelta(days=6), end))
+                self.report.windows += 1
+                self.report.snapped += station_id is not None
+
+        self._ranges: Dict[str, List[Tuple[datetime, datetime]]] = {}
+        self._pending: Dict[Tuple[str, int], int] = {}
+        for source, windows in windows_by_source.items():
+            ranges = merge_ranges(windows, gap, max_range)
+            self._ranges[source] = ranges
+            for start, end in windows:
+                key = (source, self._range_index(source, start, end))
+                self._pending[key] = self._pending.get(key, 0) + 1
+        self.report.planned = sum(len(r) for r in self._ranges.values())
+
+        self._frames: Dict[Tuple[str, int], pd.DataFrame] = {}
+        self._locks: Dict[Tuple[str, int], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _range_index(self, source: str, start: datetime, end: datetime) -> int:
+        for i, (range_start, range_end) in enumerate(self._ranges[source]):
+            if range_start <= start and end <= range_end:
+                return i
+        raise KeyError(f"[{start}, {end}] is not in the fetch plan for {source}")
+
+    def _fetch_meteostat(self, source: str, start: datetime, end: datetime) -> pd.DataFrame:
+        if source.startswith("point:"):
+            lat, lon = (float(v) for v in source[len("point:"):].split(","))
+            return fetch_hourly(lat, lon, start, end, self.parameters)
+
+        from meteostat import Parameter, hourly
+
+        data = hourly(source, start, end, parameters=[Parameter(p) for p in self.parameters]).fetch()
+        if data is None or len(data) == 0:
+            return pd.DataFrame(columns=self.parameters)
+        if isinstance(data.index, pd.MultiIndex):
+            data = data.droplevel(0)
+        return data
+
+    def _frame(self, key: Tuple[str, int]) -> pd.DataFrame:
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                return frame
+            lock = self._locks.setdefault(key, threading.Lock())
+        # One download per range even when several workers want it at once
+        with lock:
+            with self._lock:
+                frame = self._frames.get(key)
+            if frame is None:
+                source, i = key
+                start, end = self._ranges[source][i]
+                frame = self.fetch_range(source, start, end).sort_index()
+                with self._lock:
+                    self._frames[key] = frame
+                    self.report.fetched += 1
+        return frame
+
+    def __call__(self, lat: float, lon: float, start: datetime, end: datetime,
+                 parameters: Sequence[str]) -> pd.DataFrame:
+        source = self._location.get((lat, lon))
+        if source is None:
+            # Not in the plan (e.g. a builder asking for an extra window): fetch directly
+            return fetch_hourly(lat, lon, start, end, parameters)
+        key = (source, self._range_index(source, start, end))
+        window = self._frame(key).loc[start:end].reindex(columns=list(parameters))
+        with self._lock:
+            self._pending[key] -= 1
+            if self._pending[key] <= 0:
+                self._frames.pop(key, None)
+                self._locks.pop(key, None)
+        return window
+
+
+def same_hour_week(lat: float, lon: float, end: pd.Timestamp, parameters: Sequence[str],
+                   fetch: Callable[..., pd.DataFrame] = fetch_hourly) -> pd.DataFrame:
+    """
+    One observation per day at end.hour for the 7 days ending at `end`,
+    oldest first. Always 7 rows; days with no data are NaN.
+    """
+    start = end - timedelta(days=6)
+    weather = fetch(lat, lon, start.to_pydatetime(), end.to_pydatetime(), parameters)
+    expected = pd.date_range(start=start, end=end, freq="D")
+    if weather.empty:
+        return pd.DataFrame(index=expected, columns=list(parameters), dtype=float)
+    weather = weather[weather.index.hour == end.hour].reindex(columns=list(parameters))
+    return weather.reindex(expected)
+
+
+def training_columns(label: str = "has_fire") -> List[str]:
+    columns = ["date_time"]
+    for day in range(1, 8):
+        columns.extend(f"{name}_{day}" for name in TRAINING_WEATHER.values())
+    return columns + [label]
+
+
+def training_rows(record: FireRecord, label: int = 1, label_column: str = "has_fire",
+                  fetch: Callable[..., pd.DataFrame] = fetch_hourly) -> List[Dict[str, Any]]:
+    """
+    One wide row in the fire_weather_utah.csv layout (day 1 = oldest).
+    Returns no rows when Meteostat has nothing for the whole week.
+    """
+    week = same_hour_week(record.latitude, record.longitude, record.discovery, list(TRAINING_WEATHER), fetch=fetch)
+    if week.isna().all().all():
+        return []
+    row: Dict[str, Any] = {"date_time": record.discovery}
+    values = week.to_numpy()
+    for day in range(7):
+        for j, name in enumerate(TRAINING_WEATHER.values()):
+            value = values[day, j]
+            row[f"{name}_{day + 1}"] = None if pd.isna(value) else float(value)
+    row[label_column] = label
+    return [row]
+
+
+@dataclass
+class StationSamples:
+    """All negative samples drawn for one station; `key` is the station's row index."""
+    key: str
+    latitude: float
+    longitude: float
+    times: np.ndarray
+
+
+def draw_negative_samples(stations: pd.DataFrame, n_samples: int, start: datetime, end: datetime,
+                          seed: int = 0) -> List[StationSamples]:
+    """
+    Draw n_samples (station, hour) pairs uniformly in one go and group them
+    by station, times sorted. The same seed always gives the same samples.
+    """
+    rng = np.random.default_rng(seed)
+    station_idx = rng.integers(0, len(stations), n_samples)
+    hours = int((end - start) / timedelta(hours=1))
+    times = np.datetime64(start, "h") + rng.integers(0, hours + 1, n_samples).astype("timedelta64[h]")
+
+    order = np.lexsort((times, station_idx))
+    station_idx, times = station_idx[order], times[order]
+    groups, bounds = np.unique(station_idx, return_index=True)
+    latitudes = stations["latitude"].to_numpy(dtype=float)
+    longitudes = stations["longitude"].to_numpy(dtype=float)
+    return [StationSamples(key=str(i), latitude=latitudes[i], longitude=longitudes[i], times=chunk)
+            for i, chunk in zip(groups, np.split(times, bounds[1:]))]
+
+
+def same_hour_windows(history: pd.DataFrame, times: np.ndarray, parameters: Sequence[str]) -> np.ndarray:
+    """
+    The same_hour_week window for every time at once, as a (len(times), 7, len(parameters)) array
+    (day 0 = oldest), by laying history on an hourly grid and indexing it 24 hours apart.
+    """
+    times = np.asarray(times, dtype="datetime64[h]")
+    first = times.min() - np.timedelta64(6 * 24, "h")
+    grid = pd.date_range(pd.Timestamp(first), pd.Timestamp(times.max()), freq="h")
+    history = history[~history.index.duplicated()]
+    values = history.reindex(index=grid, columns=list(parameters)).to_numpy(dtype=float)
+    positions = (times - first).astype(int)
+    return values[positions[:, None] + 24 * np.arange(-6, 1)]
+
+
+def negative_rows(samples: StationSamples, label: int = 0, label_column: str = "has_fire",
+                  fetch: Callable[..., pd.DataFrame] = fetch_hourly) -> List[Dict[str, Any]]:
+    """
+    training_rows for every sample of one station, from a single fetch of the
+    station's whole sampled range. Samples with no data for the week are dropped.
+    """
+    times = np.asarray(samples.times, dtype="datetime64[h]")
+    start = pd.Timestamp(times.min()) - timedelta(days=6)
+    parameters = list(TRAINING_WEATHER)
+    history = fetch(samples.latitude, samples.longitude, start.to_pydatetime(),
+                    pd.Timestamp(times.max()).to_pydatetime(), parameters)
+    if history.empty:
+        return []
+
+    windows = same_hour_windows(history, times, parameters).reshape(len(times), -1)
+    keep = ~np.isnan(windows).all(axis=1)
+    frame = pd.DataFrame(windows[keep], columns=training_columns(label_column)[1:-1])
+    frame = frame.astype(object).where(frame.notna(), None)
+    frame.insert(0, "date_time", pd.DatetimeIndex(times[keep]))
+    frame[label_column] = label
+    return frame.to_dict("records")
+
+
+@dataclass
+class BuildReport:
+    total: int = 0
+    skipped_done: int = 0
+    completed: int = 0
+    empty: int = 0
+    failed: int = 0
+    rows_written: int = 0
+    shards: List[str] = field(default_factory=list)
+    wall_clock: float = 0.0
+
+
+def _read_progress(output_dir: Path) -> Dict[str, Dict[str, Any]]:
+    progress: Dict[str, Dict[str, Any]] = {}
+    path = output_dir / PROGRESS_FILE
+    if not path.exists():
+        return progress
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn final line from a crash
+            progress[entry["key"]] = entry
+    return progress
+
+
+def _shard_paths(output_dir: Path) -> List[Path]:
+    return sorted(output_dir.glob("part-*.csv"))
+
+
+def _repair_last_shard(output_dir: Path, progress: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Rows are written before their progress line, so a crash can leave rows in
+    the newest shard that were never checkpointed. Drop them; they will be
+    rebuilt on this run.
+    """
+    shards = _shard_paths(output_dir)
+    if not shards:
+        return
+    last = shards[-1]
+    try:
+        df = pd.read_csv(last, dtype={KEY_COLUMN: str})
+    except (pd.errors.EmptyDataError, pd.errors.ParserError):
+        last.unlink()
+        return
+    keep = df[KEY_COLUMN].map(lambda k: progress.get(k, {}).get("status") == "ok")
+    if keep.all():
+        return
+    tmp = last.with_suffix(".tmp")
+    df[keep].to_csv(tmp, index=False)
+    os.replace(tmp, last)
+    print(f"Dropped {(~keep).sum()} uncheckpointed rows from {last.name}")
+
+
+def _format_eta(seconds: float) -> str:
+    return str(timedelta(seconds=int(seconds))) if seconds == seconds and seconds != float("inf") else "?"
+
+
+def build_dataset(records: Sequence[FireRecord], row_builder: Callable[[FireRecord], List[Dict[str, Any]]],
+                  columns: Sequence[str], output_dir: Path, max_workers: int = DEFAULT_MAX_WORKERS,
+                  shard_rows: int = DEFAULT_SHARD_ROWS, max_retries: int = DEFAULT_MAX_RETRIES) -> BuildReport:
+    """
+    Build a dataset by running row_builder over records (anything with a unique
+    `key`) on a thread pool.
+
+    Output goes to output_dir/part-NNNNN.csv shards as results arrive, and
+    every finished record is appended to progress.jsonl right after its rows
+    are flushed. Rerunning with the same output_dir skips records already
+    marked ok/empty, so a crash only loses the records that were in flight.
+    Failed records (after max_retries with backoff) are retried on resume.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    start_time = time.perf_counter()
+
+    progress = _read_progress(output_dir)
+    _repair_last_shard(output_dir, progress)
+    done = {key for key, entry in progress.items() if entry.get("status") in ("ok", "empty")}
+    todo = [r for r in records if r.key not in done]
+    report = BuildReport(total=len(records), skipped_done=len(records) - len(todo))
+    if report.skipped_done:
+        print(f"Resuming: {report.skipped_done}/{len(records)} records already done")
+
+    fieldnames = [KEY_COLUMN] + list(columns)
+    shard_index = len(_shard_paths(output_dir))
+    shard_handle = None
+    writer = None
+    shard_rows_written = 0
+    progress_handle = (output_dir / PROGRESS_FILE).open("a", encoding="utf-8")
+
+    def open_shard():
+        nonlocal shard_handle, writer, shard_index, shard_rows_written
+        if shard_handle is not None:
+            shard_handle.close()
+        path = output_dir / f"part-{shard_index:05d}.csv"
+        shard_index += 1
+        shard_rows_written = 0
+        shard_handle = path.open("w", newline="", encoding="utf-8")
+        writer = csv.DictWriter(shard_handle, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        report.shards.append(path.name)
+
+    def run_one(record: FireRecord):
+        for attempt in range(max_retries):
+            try:
+                return record, row_builder(record), None
+            except Exception as e:
+                if attempt == max_retries - 1:
+                    return record, None, f"{type(e).__name__}: {e}"
+                time.sleep(2 ** attempt)
+
+    last_report = 0.0
+    processed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            pending = set()
+            queue = iter(todo)
+            while True:
+                # Keep a bounded number of records in flight
+                for record in queue:
+                    pending.add(pool.submit(run_one, record))
+                    if len(pending) >= max_workers * 4:
+                        break
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record, rows, error = future.result()
+                    processed += 1
+                    if error is not None:
+                        report.failed += 1
+                        entry = {"key": record.key, "status": "failed", "error": error}
+                    elif not rows:
+                        report.empty += 1
+                        entry = {"key": record.key, "status": "empty"}
+                    else:
+                        if writer is None or shard_rows_written >= shard_rows:
+                            open_shard()
+                        writer.writerows({KEY_COLUMN: record.key, **row} for row in rows)
+                        shard_handle.flush()
+                        shard_rows_written += len(rows)
+                        report.rows_written += len(rows)
+                        report.completed += 1
+                        entry = {"key": record.key, "status": "ok", "rows": len(rows),
+                                 "shard": report.shards[-1]}
+                    progress_handle.write(json.dumps(entry) + "\n")
+                    progress_handle.flush()
+
+                now = time.perf_counter()
+                if now - last_report >= 1.0 or not pending:
+                    last_report = now
+                    elapsed = now - start_time
+                    rate = processed / elapsed if elapsed else 0.0
+                    eta = (len(todo) - processed) / rate if rate else float("inf")
+                    print(f"\r[build] {processed + report.skipped_done}/{len(records)} records | "
+                          f"{rate:.1f} rec/s | {report.rows_written} rows | {report.failed} failed | "
+                          f"ETA {_format_eta(eta)}   ", end="", flush=True)
+    finally:
+        if shard_handle is not None:
+            shard_handle.close()
+        progress_handle.close()
+
+    report.wall_clock = time.perf_counter() - start_time
+    print(f"\nBuilt {report.completed} records ({report.rows_written} rows, {report.empty} empty, "
+          f"{report.failed} failed) in {report.wall_clock:.1f}s into {output_dir}")
+    return report
+
+
+def merge_shards(output_dir: Path, out_path: Path, index_label: Optional[str] = "id") -> int:
+    """Concatenate the shards in input order into one CSV. Returns the row count."""
+    shards = _shard_paths(Path(output_dir))
+    if not shards:
+        print(f"No shards in {output_dir}")
+        return 0
+    df = pd.concat((pd.read_csv(p, dtype={KEY_COLUMN: str}) for p in shards), ignore_index=True)
+    df = df.sort_values(KEY_COLUMN, key=lambda k: k.astype(int), kind="stable").drop(columns=[KEY_COLUMN])
+    df.reset_index(drop=True).to_csv(out_path, index=index_label is not None, index_label=index_label)
+    print(f"Merged {len(shards)} shards ({len(df)} rows) into {out_path}")
+    return len(df)
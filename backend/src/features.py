@@ -0,0 +1,116 @@
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+N_DAYS = 7
+
+# Observation properties, in the order the training CSVs lay them out per day
+OBSERVATION_FIELDS = [
+    "temperature",
+    "dewpoint",
+    "relativeHumidity",
+    "precipitationLast3Hours",
+    "windDirection",
+    "windSpeed",
+    "windGust",
+    "barometricPressure",
+]
+
+# Training CSV column prefixes (temperature_1 ... air_pressure_7)
+TRAINING_FIELD_NAMES = [
+    "temperature",
+    "dewpoint",
+    "relative_humidity",
+    "precipitation",
+    "wind_direction",
+    "wind_speed",
+    "wind_gust",
+    "air_pressure",
+]
+
+_FIELD_INDEX = {name: i for i, name in enumerate(OBSERVATION_FIELDS)}
+_FIELD_INDEX.update({name: i for i, name in enumerate(TRAINING_FIELD_NAMES)})
+
+# "temperature_1" (1 = oldest day) or "temperature_day0" (0 = oldest day)
+_COLUMN_RE = re.compile(r"^(?P<field>.+?)_(?:day(?P<day0>\d+)|(?P<day1>\d+))$")
+
+# Feature columns produced by get_formatted_weather_data, oldest day first
+FEATURE_COLUMNS = [f"{name}_{day}" for day in range(1, N_DAYS + 1) for name in TRAINING_FIELD_NAMES]
+
+
+def feature_layout(feature_columns: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Map each feature column to (observation field index, day index), with
+    day 0 being the oldest of the 7 days.
+    """
+    return _feature_layout(tuple(feature_columns))
+
+
+@lru_cache(maxsize=16)
+def _feature_layout(feature_columns: Tuple[str, ...]) -> Tuple[np.ndarray, np.ndarray]:
+    fields = np.empty(len(feature_columns), dtype=np.intp)
+    days = np.empty(len(feature_columns), dtype=np.intp)
+    for i, column in enumerate(feature_columns):
+        match = _COLUMN_RE.match(column)
+        if not match or match.group("field") not in _FIELD_INDEX:
+            raise ValueError(f"Don't know how to build feature column '{column}'")
+        fields[i] = _FIELD_INDEX[match.group("field")]
+        days[i] = int(match.group("day0")) if match.group("day0") is not None else int(match.group("day1")) - 1
+        if not 0 <= days[i] < N_DAYS:
+            raise ValueError(f"Feature column '{column}' is outside the {N_DAYS}-day window")
+    return fields, days
+
+
+def observation_values(observations: List[Dict[str, Any]], out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    (7, len(OBSERVATION_FIELDS)) array of raw values, oldest day first.
+
+    observations are newest-first properties dicts as returned by
+    request_seven_day_observations. Missing values become NaN.
+    """
+    if len(observations) != N_DAYS:
+        raise ValueError(f"Expected {N_DAYS} daily observations, got {len(observations)}")
+
+    values = out if out is not None else np.empty((N_DAYS, len(OBSERVATION_FIELDS)), dtype=np.float64)
+    for day, props in enumerate(reversed(observations)):
+        for j, field in enumerate(OBSERVATION_FIELDS):
+            value = (props.get(field) or {}).get("value")
+            values[day, j] = np.nan if value is None else value
+    return values
+
+
+def build_feature_row(observations: List[Dict[str, Any]], feature_columns: Sequence[str] = FEATURE_COLUMNS,
+                      out: Optional[np.ndarray] = None, dtype=np.float64) -> np.ndarray:
+    """One station's feature vector in feature_columns order."""
+    fields, days = feature_layout(feature_columns)
+    values = observation_values(observations)
+    row = out if out is not None else np.empty(len(feature_columns), dtype=dtype)
+    row[:] = values[days, fields]
+    return row
+
+
+def build_feature_matrix(observation_lists: Sequence[List[Dict[str, Any]]],
+                         feature_columns: Sequence[str] = FEATURE_COLUMNS,
+                         dtype=np.float32,
+                         fill_value: Optional[Union[float, Dict[str, float]]] = None) -> np.ndarray:
+    """
+    Stack many stations into one preallocated (n_stations, n_features) matrix.
+
+    NaNs are replaced with fill_value when one is given: either a single number
+    or a dict of per-field defaults keyed by observation property name
+    (e.g. {"temperature": 22.2}); fields missing from the dict stay NaN.
+    """
+    fields, days = feature_layout(feature_columns)
+    matrix = np.empty((len(observation_lists), len(feature_columns)), dtype=dtype)
+    scratch = np.empty((N_DAYS, len(OBSERVATION_FIELDS)), dtype=np.float64)
+    for i, observations in enumerate(observation_lists):
+        matrix[i] = observation_values(observations, out=scratch)[days, fields]
+    if isinstance(fill_value, dict):
+        defaults = np.array([fill_value.get(field, np.nan) for field in OBSERVATION_FIELDS], dtype=dtype)[fields]
+        missing = np.isnan(matrix)
+        matrix[missing] = np.broadcast_to(defaults, matrix.shape)[missing]
+    elif fill_value is not None:
+        np.nan_to_num(matrix, copy=False, nan=fill_value)
+    return matrix
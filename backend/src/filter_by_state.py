@@ -1,19 +1,58 @@
-from shapely.geometry import Point
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence
+
 import geopandas as gpd
+import numpy as np
 import pandas as pd
-import os
+import shapely
+from shapely.geometry import Point
 
-# Load once at module import
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+STATES_URL = "https://www2.census.gov/geo/tiger/TIGER2023/STATE/tl_2023_us_state.zip"
+# Just the state codes and outlines, written after the first download
+BOUNDARY_CACHE = ROOT / "data" / "cache" / "tl_2023_us_state.gpkg"
+
+# Load once per process
+_states: Optional[gpd.GeoDataFrame] = None
 _state_polygons = {}
 
+
+def _load_states() -> gpd.GeoDataFrame:
+    """All state boundaries (STUSPS, geometry), from the local cache or downloaded once and cached."""
+    global _states
+    if _states is None:
+        if BOUNDARY_CACHE.exists():
+            _states = gpd.read_file(BOUNDARY_CACHE)
+        else:
+            states = gpd.read_file(STATES_URL)[["STUSPS", "geometry"]]
+            BOUNDARY_CACHE.parent.mkdir(parents=True, exist_ok=True)
+            # Write aside and swap in, so concurrent first loads never leave a half-written cache
+            tmp_path = BOUNDARY_CACHE.with_name(f"{BOUNDARY_CACHE.stem}.{os.getpid()}.tmp{BOUNDARY_CACHE.suffix}")
+            states.to_file(tmp_path, driver="GPKG")
+            os.replace(tmp_path, BOUNDARY_CACHE)
+            _states = states
+    return _states
+
+
+def _select_states(state_abbrs: Iterable[str]) -> gpd.GeoDataFrame:
+    state_abbrs = list(state_abbrs)
+    states = _load_states()
+    selected = states[states["STUSPS"].isin(state_abbrs)]
+    unknown = set(state_abbrs) - set(selected["STUSPS"])
+    if unknown:
+        raise ValueError(f"Unknown state abbreviation: {', '.join(sorted(unknown))}")
+    return selected
+
+
 def _load_state_polygon(state_abbr: str):
     if state_abbr not in _state_polygons:
-        url = "https://www2.census.gov/geo/tiger/TIGER2023/STATE/tl_2023_us_state.zip"
-        states = gpd.read_file(url)
-        state = states.loc[states["STUSPS"] == state_abbr]
-        if state.empty:
-            raise ValueError(f"Unknown state abbreviation: {state_abbr}")
-        _state_polygons[state_abbr] = state.geometry.union_all()
+        polygon = _select_states([state_abbr]).geometry.union_all()
+        shapely.prepare(polygon)
+        _state_polygons[state_abbr] = polygon
     return _state_polygons[state_abbr]
 
 
@@ -22,16 +61,41 @@ def is_in_state(lat: float, lon: float, state_abbr: str) -> bool:
     Returns True if the given latitude and longitude
     fall within the given state.
     """
-    utah_polygon = _load_state_polygon(state_abbr)
+    polygon = _load_state_polygon(state_abbr)
     point = Point(lon, lat)  # shapely uses (lon, lat)
-    return utah_polygon.covers(point)
+    return polygon.covers(point)
+
+
+def _join_points(lats: Sequence[float], lons: Sequence[float], state_abbrs: Iterable[str]) -> pd.DataFrame:
+    """(point position, STUSPS) for every state covering each point, via one STRtree-backed spatial join."""
+    states = _select_states(state_abbrs)
+    points = gpd.GeoDataFrame(geometry=gpd.points_from_xy(lons, lats), crs=states.crs)
+    # "intersects" includes the boundary, matching polygon.covers(point)
+    return gpd.sjoin(points, states, how="inner", predicate="intersects")[["STUSPS"]]
+
+
+def states_for_points(lats: Sequence[float], lons: Sequence[float], state_abbrs: Iterable[str]) -> np.ndarray:
+    """State abbreviation covering each point (or None). Points on a shared border get the first match."""
+    joined = _join_points(lats, lons, state_abbrs)
+    joined = joined[~joined.index.duplicated(keep="first")]
+    result = np.full(len(lats), None, dtype=object)
+    result[joined.index.to_numpy()] = joined["STUSPS"].to_numpy()
+    return result
+
+
+def filter_by_states(df: pd.DataFrame, state_abbrs: Iterable[str], lat_col: str = "attr_InitialLatitude",
+                     lon_col: str = "attr_InitialLongitude") -> Dict[str, pd.DataFrame]:
+    """Rows of df inside each requested state, in one pass. Border points land in every state covering them."""
+    state_abbrs = list(state_abbrs)
+    joined = _join_points(df[lat_col].to_numpy(dtype=float), df[lon_col].to_numpy(dtype=float), state_abbrs)
+    return {abbr: df.iloc[np.sort(joined.index[joined["STUSPS"] == abbr].to_numpy())] for abbr in state_abbrs}
 
 
 if __name__ == "__main__":
-    # Filter fires.csv in data directory to only include fires in Utah
-    base_dir = os.getcwd()
-    fire_data = pd.read_csv(base_dir + '\\..\\data\\fires.csv')
-    state_abbr = "UT" # Change this to the desired state abbreviation
-    fire_data['in_state'] = fire_data.apply(lambda row: is_in_state(row['attr_InitialLatitude'], row['attr_InitialLongitude'], state_abbr), axis=1)
-    filtered_data = fire_data[fire_data['in_state']]
-    filtered_data.to_csv(base_dir + '\\..\\data\\fires_utah.csv', index=False)
+    # Filter fires.csv in data directory to only include fires in the listed states
+    data_dir = ROOT / "data"
+    fire_data = pd.read_csv(data_dir / "fires.csv")
+    outputs = {"UT": data_dir / "fires_utah.csv"}  # Add states (abbreviation -> output CSV) to split more at once
+    for state_abbr, filtered_data in filter_by_states(fire_data, outputs).items():
+        filtered_data.to_csv(outputs[state_abbr], index=False)
+        print(f"{state_abbr}: {len(filtered_data)} fires -> {outputs[state_abbr]}")
@@ -0,0 +1,379 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from src.prompt_gemini import FEW_SHOT_PREFIX, TASK_PROMPT, get_client
+except ModuleNotFoundError:
+    from prompt_gemini import FEW_SHOT_PREFIX, TASK_PROMPT, get_client
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+# Per-request budget for the station rows (the cached few-shot prefix is not counted)
+DEFAULT_MAX_BATCH_TOKENS = 8000
+DEFAULT_MAX_BATCH_ROWS = 100
+DEFAULT_CACHE_TTL = "3600s"
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_MEMO_DIR = Path(__file__).resolve().parents[1] / "data" / "cache" / "gemini"
+DEFAULT_MEMO_MAX_AGE = 7 * 24 * 3600  # seconds; older answers are asked again
+DEFAULT_MEMO_MAX_ENTRIES = 5000       # oldest answers are dropped beyond this
+
+# Jittered exponential backoff between failed attempts: uniform(0, min(cap, base * 2**attempt))
+DEFAULT_MAX_RETRIES = 4
+BACKOFF_BASE = 2.0
+BACKOFF_CAP = 60.0
+
+CHARS_PER_TOKEN = 4  # rough estimate for JSON-ish weather rows; real counts come back in usage metadata
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _format_rows(rows: Sequence[Dict[str, Any]]) -> str:
+    # Same rendering ask_gemini has always used for {weather_data}
+    return TASK_PROMPT.format(weather_data=list(rows))
+
+
+@dataclass
+class BatchResult:
+    rows: List[Dict[str, Any]]
+    text: str
+    prompt_tokens: int
+    cached_tokens: int
+    output_tokens: int
+    latency: float
+    memoized: bool = False
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Full-jitter backoff so concurrent batches that fail together don't retry in lockstep."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class ResponseMemo:
+    """
+    On-disk memo of Gemini answers keyed by a hash of the backend, prompt and
+    serialized batch, so rerunning over unchanged observations is free.
+    Entries expire after max_age seconds and at most max_entries are kept.
+    """
+
+    def __init__(self, directory: Path = DEFAULT_MEMO_DIR, max_age: float = DEFAULT_MEMO_MAX_AGE,
+                 max_entries: int = DEFAULT_MEMO_MAX_ENTRIES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self.prune()
+
+    @staticmethod
+    def key(backend: str, rows: Sequence[Dict[str, Any]]) -> str:
+        payload = json.dumps(
+            {"model": backend, "prefix": FEW_SHOT_PREFIX, "task": TASK_PROMPT, "rows": list(rows)},
+            sort_keys=True, default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, check: Optional[Callable[[str], None]] = None) -> Optional[Dict[str, Any]]:
+        """Stored answer for key, or None if absent, expired, or rejected by check (which raises ValueError)."""
+        path = self.directory / f"{key}.json"
+        try:
+            if time.time() - path.stat().st_mtime > self.max_age:
+                raise ValueError("expired")
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            if check is not None:
+                check(entry["text"])
+        except (OSError, KeyError, ValueError):
+            path.unlink(missing_ok=True)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, text: str, usage: Dict[str, int]) -> None:
+        path = self.directory / f"{key}.json"
+        tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({"text": text, "usage": usage}), encoding="utf-8")
+        os.replace(tmp, path)
+        with self._lock:
+            self._puts += 1
+            due = self._puts % 100 == 0  # an occasional directory scan keeps long runs under the cap
+        if due:
+            self.prune()
+
+    def prune(self) -> int:
+        """Drop expired entries, then the oldest ones beyond max_entries. Returns how many were removed."""
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        entries.sort(reverse=True)
+        cutoff = time.time() - self.max_age
+        stale = [path for i, (mtime, path) in enumerate(entries) if mtime < cutoff or i >= self.max_entries]
+        for path in stale:
+            path.unlink(missing_ok=True)
+        return len(stale)
+
+
+class GeminiBackend:
+    """generate_content against the real API, with the few-shot prefix in an explicit context cache."""
+
+    def __init__(self, api_key: str, model: str = DEFAULT_MODEL, cache_ttl: str = DEFAULT_CACHE_TTL):
+        self.client = get_client(api_key)
+        self.model = model
+        self.name = model  # memo namespace
+        self.cache_ttl = cache_ttl
+        self._cache_name: Optional[str] = None
+        self._cache_expires = 0.0
+        self._cache_lock = threading.Lock()
+
+    def _prefix_cache(self) -> Optional[str]:
+        from google.genai import types
+
+        with self._cache_lock:
+            # Recreate a little before the provider-side TTL runs out
+            if self._cache_name and time.time() < self._cache_expires:
+                return self._cache_name
+            try:
+                cache = self.client.caches.create(
+                    model=self.model,
+                    config=types.CreateCachedContentConfig(
+                        display_name="rincon-fire-few-shot",
+                        contents=[FEW_SHOT_PREFIX],
+                        ttl=self.cache_ttl,
+                    ),
+                )
+            except Exception as e:
+                # Too small for explicit caching, or unsupported: send the prefix inline
+                # (2.5 models still get implicit prefix caching since it always comes first)
+                print(f"[gemini] context cache unavailable, sending prefix inline: {e}")
+                self._cache_name = None
+                self._cache_expires = time.time() + 600
+                return None
+            self._cache_name = cache.name
+            self._cache_expires = time.time() + float(self.cache_ttl.rstrip("s")) * 0.9
+            print(f"[gemini] created context cache {cache.name} for the few-shot prefix")
+            return self._cache_name
+
+    def generate(self, task_prompt: str, rows: Sequence[Dict[str, Any]] = ()) -> Tuple[str, Dict[str, int]]:
+        from google.genai import types
+
+        cache_name = self._prefix_cache()
+        if cache_name:
+            resp = self.client.models.generate_content(
+                model=self.model,
+                contents=task_prompt,
+                config=types.GenerateContentConfig(cached_content=cache_name),
+            )
+        else:
+            resp = self.client.models.generate_content(
+                model=self.model,
+                contents=FEW_SHOT_PREFIX + "\n" + task_prompt,
+            )
+
+        usage = getattr(resp, "usage_metadata", None)
+        return getattr(resp, "text", "").strip(), {
+            "prompt_tokens": getattr(usage, "prompt_token_count", None) or 0,
+            "cached_tokens": getattr(usage, "cached_content_token_count", None) or 0,
+            "output_tokens": getattr(usage, "candidates_token_count", None) or 0,
+        }
+
+
+class FakeGeminiBackend:
+    """
+    Offline stand-in: scores rows with a simple dry/windy rule and returns
+    the same JSON shape the prompt asks Gemini for. Token counts are estimates.
+    """
+
+    name = "fake"  # memo namespace: rule-based answers never stand in for real ones
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def generate(self, task_prompt: str, rows: Sequence[Dict[str, Any]] = ()) -> Tuple[str, Dict[str, int]]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        scores = []
+        for row in rows:
+            humidity = row.get("relativeHumidity") or row.get("relative_humidity") or 100
+            wind = row.get("windSpeed") or row.get("wind_speed") or 0
+            scores.append(int(humidity < 25 and wind > 15))
+        text = json.dumps({"scores": scores})
+        return text, {
+            "prompt_tokens": estimate_tokens(FEW_SHOT_PREFIX) + estimate_tokens(task_prompt),
+            "cached_tokens": estimate_tokens(FEW_SHOT_PREFIX),
+            "output_tokens": estimate_tokens(text),
+        }
+
+
+class GeminiBatcher:
+    """
+    Packs weather rows into as few Gemini requests as fit a token budget.
+
+    Rows are added greedily until the estimated size of the batch reaches
+    max_batch_tokens or max_batch_rows. Each request only carries the task
+    and the rows; the fixed few-shot table goes through the backend's
+    context cache. Set GEMINI_FAKE=1 (or pass fake=True) to run offline.
+
+    Answers are memoized on disk (memo_dir=None disables it), keyed by the
+    backend so fake and real answers never mix. validate(text, rows) should
+    raise ValueError for an unusable answer: that attempt counts as failed
+    and the answer is not memoized. Failed calls are retried with jittered
+    exponential backoff. ask_batch is thread-safe.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, model: str = DEFAULT_MODEL,
+                 max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS, max_batch_rows: int = DEFAULT_MAX_BATCH_ROWS,
+                 fake: Optional[bool] = None, backend=None, memo_dir: Optional[Path] = DEFAULT_MEMO_DIR,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 validate: Optional[Callable[[str, List[Dict[str, Any]]], None]] = None):
+        self.model = model
+        self.validate = validate
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_rows = max_batch_rows
+        self.max_retries = max_retries
+        self.memo = ResponseMemo(memo_dir) if memo_dir else None
+        if fake is None:
+            fake = os.getenv("GEMINI_FAKE", "").lower() in ("1", "true", "yes")
+        if backend is not None:
+            self.backend = backend
+        elif fake:
+            self.backend = FakeGeminiBackend()
+        else:
+            if not api_key:
+                raise ValueError("api_key is required unless running with the fake model")
+            self.backend = GeminiBackend(api_key, model=model)
+        self.batches_sent = 0
+        self.total_prompt_tokens = 0
+        self.total_cached_tokens = 0
+        self._stats_lock = threading.Lock()
+        self._task_overhead = estimate_tokens(_format_rows([]))
+
+    def row_tokens(self, row: Dict[str, Any]) -> int:
+        return estimate_tokens(repr(row)) + 1
+
+    def is_full(self, rows: Sequence[Dict[str, Any]]) -> bool:
+        """True once rows fill a batch, so callers can stream rows in and flush when this flips."""
+        if len(rows) >= self.max_batch_rows:
+            return True
+        return self._task_overhead + sum(self.row_tokens(r) for r in rows) >= self.max_batch_tokens
+
+    def plan_batches(self, rows: Sequence[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        batches: List[List[Dict[str, Any]]] = []
+        current: List[Dict[str, Any]] = []
+        used = self._task_overhead
+        for row in rows:
+            cost = self.row_tokens(row)
+            if current and (used + cost > self.max_batch_tokens or len(current) >= self.max_batch_rows):
+                batches.append(current)
+                current, used = [], self._task_overhead
+            current.append(row)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _generate_with_retries(self, task_prompt: str, rows: List[Dict[str, Any]]) -> Tuple[str, Dict[str, int]]:
+        for attempt in range(self.max_retries):
+            try:
+                text, usage = self.backend.generate(task_prompt, rows)
+                if self.validate is not None:
+                    self.validate(text, rows)
+                return text, usage
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    raise
+                wait = backoff_delay(attempt)
+                print(f"[gemini] {e}; retrying in {wait:.1f}s...")
+                time.sleep(wait)
+        raise RuntimeError("max_retries must be at least 1")
+
+    def ask_batch(self, rows: Sequence[Dict[str, Any]]) -> BatchResult:
+        rows = list(rows)
+        start = time.perf_counter()
+
+        key = ResponseMemo.key(getattr(self.backend, "name", self.model), rows) if self.memo is not None else None
+        check = (lambda text: self.validate(text, rows)) if self.validate is not None else None
+        entry = self.memo.get(key, check) if key else None
+        memoized = entry is not None
+        if memoized:
+            text, usage = entry["text"], {"prompt_tokens": 0, "cached_tokens": 0, "output_tokens": 0}
+        else:
+            text, usage = self._generate_with_retries(_format_rows(rows), rows)
+            if key:
+                self.memo.put(key, text, usage)
+        latency = time.perf_counter() - start
+
+        with self._stats_lock:
+            self.batches_sent += 0 if memoized else 1
+            self.total_prompt_tokens += usage["prompt_tokens"]
+            self.total_cached_tokens += usage["cached_tokens"]
+        if memoized:
+            print(f"[gemini] memo hit: {len(rows)} rows, no request sent")
+        else:
+            print(f"[gemini] batch: {len(rows)} rows, "
+                  f"prompt {usage['prompt_tokens']} tok (cached {usage['cached_tokens']}), "
+                  f"output {usage['output_tokens']} tok, {latency:.2f}s")
+        return BatchResult(rows=rows, text=text, latency=latency, memoized=memoized, **usage)
+
+    def ask(self, rows: Sequence[Dict[str, Any]]) -> Iterator[BatchResult]:
+        for batch in self.plan_batches(rows):
+            yield self.ask_batch(batch)
+
+
+class GeminiDispatcher:
+    """
+    Runs Gemini batches in the background so the caller can keep fetching
+    stations. At most max_in_flight batches are outstanding; submit() blocks
+    once that many are queued, which keeps memory bounded if Gemini falls
+    behind. on_result runs on the worker thread for each finished batch.
+    """
+
+    def __init__(self, batcher: GeminiBatcher, on_result: Callable[[BatchResult], Any],
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        self.batcher = batcher
+        self.on_result = on_result
+        self.failed = 0
+        self._slots = threading.BoundedSemaphore(max(1, max_in_flight))
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix="gemini")
+        self._failed_lock = threading.Lock()
+
+    def _run(self, rows: List[Dict[str, Any]]) -> None:
+        try:
+            self.on_result(self.batcher.ask_batch(rows))
+        except Exception as e:
+            with self._failed_lock:
+                self.failed += 1
+            print(f"[gemini] batch of {len(rows)} stations failed: {e}")
+        finally:
+            self._slots.release()
+
+    def submit(self, rows: Sequence[Dict[str, Any]]) -> Future:
+        self._slots.acquire()
+        return self._pool.submit(self._run, list(rows))
+
+    def close(self) -> None:
+        """Wait for every submitted batch to finish."""
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self) -> "GeminiDispatcher":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
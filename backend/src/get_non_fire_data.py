@@ -1,79 +1,39 @@
-import random
-from urllib.error import URLError
-
-from meteostat import Point, Hourly
-import pandas as pd
+import sys
 from datetime import datetime, timedelta
-import os
-import random
-
-# for n times (1000 probably)
-# pick random station in utah
-# pick random time 2020-present
-# get and store data
-
-
-base_dir = os.getcwd()
-
-stations = pd.read_csv(base_dir + '\\weather_stations_utah_valid.csv')
-
-
-augmented_data = []
-n_stations = len(stations)
-n_rows = 100000
-
-i = 0
-while i < n_rows:
-    try:
-        # label to make more readable
-        station_idx = random.randint(0, n_stations - 1)
-        s = stations.iloc[station_idx]
-        lat = float(s['latitude'])
-        long = float(s['longitude'])
-
-        # Retrieve week-long fire data
-        fire_date = datetime(2020, 1, 1, 0)
-        # up until roughly 2 weeks ago
-        hour = random.randint(1, 23)
-        fire_date += timedelta(days=random.randint(0, 2230), hours=hour)
+from pathlib import Path
 
-        fire_week_before_date = fire_date - timedelta(days=6)
-        fire_loc = Point(lat, long)
-
-        weather = Hourly(fire_loc, fire_week_before_date, fire_date)
-        weather_data = weather.fetch()
-        weather_data = pd.DataFrame(weather_data)
-
-        # If data is retrieved, filter for same hour every day of the past week
-        if not weather_data.empty:
-            daily_data = weather_data.loc[weather_data.index.hour == hour]
-
-            daily_data = daily_data.reset_index()
-            augmented_row = pd.Series([fire_date])
-            daily_data = daily_data.drop('coco', axis = 1)
-            daily_data = daily_data.drop('time', axis = 1)
-            daily_data = daily_data.drop('tsun', axis = 1)
-            for index, daily_row in daily_data.iterrows():
-                augmented_row = pd.concat([augmented_row, daily_data.iloc[index]])
-            augmented_row = pd.concat([augmented_row, pd.Series([0])])
-            augmented_data.append(augmented_row.to_numpy())
-
-            i += 1
-            print(i)
-    except URLError as e:
-        print(e)
-        break
-
-
-# temp,dwpt,rhum,prcp,snow,wdir,wspd,wpgt,pres,tsun,coco,hasFire
-cols = ['temperature', 'dewpoint', 'relative_humidity', 'precipitation', 'snow', 'wind_direction', 'wind_speed', 'wind_gust', 'air_pressure']
-
-final_cols = ['date_time']
-for i in range(1, 8):
-    for col in cols:
-        final_cols.append(col + '_' + str(i))
-final_cols.append('has_fire')
-
-augmented_data_df = pd.DataFrame(augmented_data, columns=final_cols)
+import pandas as pd
 
-augmented_data_df.to_csv(base_dir + '\\..\\data\\non_fire_weather_utah_unbalanced.csv', index_label='id')
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+from src.dataset_builder import build_dataset, draw_negative_samples, merge_shards, negative_rows, training_columns
+
+# Random (station, hour) negatives for training: has_fire=0 rows in the same
+# layout as fire_weather_utah.csv.
+#
+# All samples are drawn up front from SEED and grouped by station. Each station's
+# sampled range is fetched from Meteostat once and every 7-day window is cut out
+# of it in one go. One station is one unit of work for the checkpointed builder,
+# so shards stream to data/build/non_fire_weather_utah/ and a rerun resumes.
+# Samples whose whole week is empty are dropped, so the output can come up a
+# little short of N_SAMPLES.
+
+DATA_DIR = ROOT / "data"
+STATIONS_CSV = DATA_DIR / "weather_stations_utah_valid.csv"
+BUILD_DIR = DATA_DIR / "build" / "non_fire_weather_utah"
+OUTPUT_CSV = DATA_DIR / "non_fire_weather_utah_unbalanced.csv"
+
+N_SAMPLES = 100000
+SEED = 42
+START = datetime(2020, 1, 1)
+# up until roughly 2 weeks ago
+END = START + timedelta(days=2230, hours=23)
+
+if __name__ == "__main__":
+    stations = pd.read_csv(STATIONS_CSV)
+    samples = draw_negative_samples(stations, N_SAMPLES, START, END, seed=SEED)
+    print(f"Drew {N_SAMPLES} samples across {len(samples)} stations (seed {SEED})")
+    report = build_dataset(samples, negative_rows, training_columns(), BUILD_DIR)
+    if report.failed:
+        print(f"{report.failed} stations failed; rerun to retry them before training on the output")
+    merge_shards(BUILD_DIR, OUTPUT_CSV)
@@ -1,9 +1,14 @@
-from urllib.error import URLError
-from meteostat import Point, hourly
-import pandas as pd
-from datetime import timedelta
+import sys
+from functools import partial
 from pathlib import Path
 
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+from src.dataset_builder import (FireRecord, PlannedFetcher, build_dataset, fetch_hourly, merge_shards,
+                                 read_fire_records, same_hour_week)
+
 
 WEATHER_VARS = [
     "temp",   # temperature (°C)
@@ -29,36 +34,17 @@ RENAME = {
 }
 
 
-def _fetch_7days_same_hour(lat: float, lon: float, end_dt: pd.Timestamp) -> pd.DataFrame:
+def _fetch_7days_same_hour(lat: float, lon: float, end_dt: pd.Timestamp, fetch=fetch_hourly) -> pd.DataFrame:
     """
     Fetch hourly data from Meteostat for the 7 days ending at end_dt,
     then keep only rows matching end_dt.hour, and return exactly 7 rows
     (with NaNs if missing).
     """
-    start_dt = end_dt - timedelta(days=6)
-    loc = Point(lat, lon)
-
-    # Fetch hourly range
-    weather = hourly(loc, start_dt.to_pydatetime(), end_dt.to_pydatetime()).fetch()
-
-    if weather is None or len(weather) == 0:
+    weather = same_hour_week(lat, lon, end_dt, WEATHER_VARS, fetch=fetch)
+    if weather.isna().all().all():
         # Return empty; caller decides what to do
         return pd.DataFrame()
 
-    # Keep only the hour-of-day matching discovery hour
-    hour = end_dt.hour
-    weather = weather.loc[weather.index.hour == hour, WEATHER_VARS].copy()
-
-    # Build an expected 7-day date index at that hour (one per day)
-    expected = pd.date_range(
-        start=start_dt.normalize() + pd.Timedelta(hours=hour),
-        end=end_dt.normalize() + pd.Timedelta(hours=hour),
-        freq="D",
-    )
-
-    # Reindex so we always have 7 rows (NaNs if Meteostat missing)
-    weather = weather.reindex(expected)
-
     # Rename to your schema and return
     weather = weather.rename(columns=RENAME)
     weather.index.name = "date_time"
@@ -100,6 +86,7 @@ def build_rows_for_fire(
     lat: float,
     lon: float,
     include_previous_year_control: bool = True,
+    fetch=fetch_hourly,
 ) -> list[dict]:
     """
     Returns a list of row dicts: [fire_row] plus optionally [control_row].
@@ -107,7 +94,7 @@ def build_rows_for_fire(
     rows = []
 
     # Fire row (fire_presence = 1)
-    w7 = _fetch_7days_same_hour(lat, lon, discovery_dt)
+    w7 = _fetch_7days_same_hour(lat, lon, discovery_dt, fetch=fetch)
     row_fire = {
         "OBJECTID": object_id,
         "date_time": discovery_dt,
@@ -121,7 +108,7 @@ def build_rows_for_fire(
     if include_previous_year_control:
         # Control row: same location, same 7-day window, 1 year earlier (fire_presence = 0)
         control_dt = discovery_dt - pd.Timedelta(days=365)
-        w7c = _fetch_7days_same_hour(lat, lon, control_dt)
+        w7c = _fetch_7days_same_hour(lat, lon, control_dt, fetch=fetch)
         row_ctrl = {
             "OBJECTID": object_id,
             "date_time": control_dt,
@@ -135,49 +122,41 @@ def build_rows_for_fire(
     return rows
 
 
-if __name__ == "__main__":
-    base_dir = Path.cwd()
-    in_path = base_dir / ".." / "data" / "fires_utah.csv"
-    out_path = base_dir / ".." / "data" / "fires_utah_week_wide.csv"
+def wide_columns() -> list[str]:
+    columns = ["OBJECTID", "date_time", "latitude", "longitude", "fire_presence"]
+    for base in RENAME.values():
+        columns.extend(f"{base}_d{d}" for d in range(1, 8))
+    return columns
+
 
-    fires = pd.read_csv(in_path)
+def wide_windows(record: FireRecord) -> list[pd.Timestamp]:
+    """Window end times wide_rows asks for: the fire and its previous-year control."""
+    return [record.discovery, record.discovery - pd.Timedelta(days=365)]
 
-    # Parse "6/27/2020 18:51" safely
-    fires["attr_FireDiscoveryDateTime"] = pd.to_datetime(
-        fires["attr_FireDiscoveryDateTime"], errors="coerce"
+
+def wide_rows(record: FireRecord, fetch=fetch_hourly) -> list[dict]:
+    return build_rows_for_fire(
+        object_id=record.object_id,
+        discovery_dt=record.discovery,
+        lat=record.latitude,
+        lon=record.longitude,
+        include_previous_year_control=True,  # set False if you only want fire rows
+        fetch=fetch,
     )
 
-    rows_out = []
-    for i, r in fires.iterrows():
-        try:
-            dt = r["attr_FireDiscoveryDateTime"]
-            if pd.isna(dt):
-                continue
-
-            lat = float(r["attr_InitialLatitude"])
-            lon = float(r["attr_InitialLongitude"])
-            object_id = r.get("OBJECTID", i)
-
-            rows_out.extend(
-                build_rows_for_fire(
-                    object_id=object_id,
-                    discovery_dt=dt,
-                    lat=lat,
-                    lon=lon,
-                    include_previous_year_control=True,  # set False if you only want fire rows
-                )
-            )
-
-            if i % 100 == 0:
-                print(f"Processed {i}/{len(fires)}")
-
-        except URLError as e:
-            print(e)
-            break
-        except Exception as e:
-            # Keep going on bad rows
-            print(f"Row {i} skipped: {e}")
-
-    out_df = pd.DataFrame(rows_out)
-    out_df.to_csv(out_path, index=False)
+
+if __name__ == "__main__":
+    data_dir = ROOT / "data"
+    in_path = data_dir / "fires_utah.csv"
+    build_dir = data_dir / "build" / "fires_utah_week_wide"
+    out_path = data_dir / "fires_utah_week_wide.csv"
+
+    # Parallel, checkpointed build; rerun to resume after a crash
+    records = read_fire_records(in_path)
+    # Snap fires to Meteostat stations and fetch each station's merged range once
+    fetcher = PlannedFetcher(records, wide_windows, WEATHER_VARS)
+    print(fetcher.report.summary())
+    build_dataset(records, partial(wide_rows, fetch=fetcher), wide_columns(), build_dir)
+    print(f"Downloaded {fetcher.report.fetched} of {fetcher.report.planned} planned ranges")
+    merge_shards(build_dir, out_path, index_label=None)
     print(f"Wrote: {out_path}")
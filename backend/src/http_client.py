@@ -0,0 +1,164 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+DEFAULT_TIMEOUT = 15  # seconds
+DEFAULT_POOL_SIZE = 10
+
+# Max keep-alive connections held open per host. api.weather.gov gets the most
+# since the station sweep hits it from every worker thread.
+POOL_SIZES = {
+    "api.weather.gov": 32,
+    "api.highsight.dev": 8,
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+# Optional shared limiter (see src.sweep.RateLimiter); None means unthrottled
+_rate_limiter = None
+
+
+class _ConnectionStats:
+    """Counts requests sent and TCP/TLS connections opened, per host."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.opened: Dict[str, int] = {}
+
+    def record_request(self, host: str) -> None:
+        with self._lock:
+            self.requests[host] = self.requests.get(host, 0) + 1
+
+    def record_open(self, host: str) -> None:
+        with self._lock:
+            self.opened[host] = self.opened.get(host, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            hosts = sorted(set(self.requests) | set(self.opened))
+            by_host = {}
+            for host in hosts:
+                sent = self.requests.get(host, 0)
+                opened = self.opened.get(host, 0)
+                by_host[host] = {
+                    "requests": sent,
+                    "connections_opened": opened,
+                    "connections_reused": max(0, sent - opened),
+                }
+        return {
+            "requests": sum(h["requests"] for h in by_host.values()),
+            "connections_opened": sum(h["connections_opened"] for h in by_host.values()),
+            "connections_reused": sum(h["connections_reused"] for h in by_host.values()),
+            "by_host": by_host,
+        }
+
+
+_stats = _ConnectionStats()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _stats.record_open(self.host)
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _stats.record_open(self.host)
+        return super()._new_conn()
+
+
+class _PooledAdapter(HTTPAdapter):
+    def send(self, request, *args, **kwargs):
+        _stats.record_request(urlsplit(request.url).hostname or "")
+        return super().send(request, *args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.update({"Accept-Encoding": "gzip, deflate"})
+
+    default_adapter = _PooledAdapter(pool_connections=DEFAULT_POOL_SIZE, pool_maxsize=DEFAULT_POOL_SIZE)
+    session.mount("http://", default_adapter)
+    session.mount("https://", default_adapter)
+    for host, size in POOL_SIZES.items():
+        session.mount(f"https://{host}/", _PooledAdapter(pool_connections=1, pool_maxsize=size))
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide keep-alive session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def set_pool_size(host: str, size: int) -> None:
+    """Resize the connection pool for one host (takes effect on the next get_session())."""
+    global _session
+    POOL_SIZES[host] = size
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def set_rate_limiter(limiter):
+    """Install a limiter that every get() attempt waits on. Returns the previous one."""
+    global _rate_limiter
+    previous = _rate_limiter
+    _rate_limiter = limiter
+    return previous
+
+
+def connection_stats() -> Dict[str, Any]:
+    return _stats.snapshot()
+
+
+def get(url: str, *, headers: Optional[Dict[str, str]] = None, params: Optional[Dict[str, Any]] = None,
+        timeout: int = DEFAULT_TIMEOUT, max_retries: int = 3, backoff: float = 1.5) -> Optional[requests.Response]:
+    """
+    GET through the shared session, retrying 429/5xx responses and connection
+    errors with exponential backoff. Returns None on a non-retryable error or
+    once max_retries is exhausted.
+    """
+    session = get_session()
+
+    for attempt in range(max_retries):
+        if _rate_limiter is not None:
+            _rate_limiter.acquire()
+        try:
+            resp = session.get(url, headers=headers, params=params, timeout=timeout)
+            if resp.status_code == 429 or 500 <= resp.status_code < 600:
+                wait = backoff ** attempt
+                print(f"[{resp.status_code}] Retrying {url} in {wait:.1f}s...")
+                time.sleep(wait)
+                continue
+            if not resp.ok:
+                print(f"[{resp.status_code}] GET {url} failed: {resp.text[:200]}")
+                return None
+            return resp
+        except requests.RequestException as e:
+            wait = backoff ** attempt
+            print(f"[EXC] {e}; retrying in {wait:.1f}s...")
+            time.sleep(wait)
+
+    print(f"[ERR] Max retries exceeded for {url}")
+    return None
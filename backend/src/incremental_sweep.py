@@ -0,0 +1,136 @@
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+import pandas as pd
+
+from src.api_helpers import latest_observation_time
+from src.sweep import DEFAULT_MAX_WORKERS, DEFAULT_REQUESTS_PER_SECOND, run_sweep
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_STATE_PATH = ROOT / "data" / "cache" / "sweep_state.sqlite3"
+CARRIED_COLUMNS = ["station_url", "latitude", "longitude", "timestamp", "fire_probability", "has_fire"]
+
+
+def _normalize_timestamp(timestamp: str) -> str:
+    return datetime.fromisoformat(timestamp).astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+
+def model_key(path: Path) -> str:
+    """Identifies a model artifact; predictions made by a different one are never carried forward."""
+    stat = Path(path).stat()
+    return f"{Path(path).resolve()}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+class SweepState:
+    """
+    Per-station record of the last sweep that scored it: the newest
+    observation timestamp it saw, the model it used and the prediction.
+    """
+
+    def __init__(self, path: Path = DEFAULT_STATE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS station_state (
+                station_url TEXT PRIMARY KEY,
+                observed_at TEXT NOT NULL,
+                model_key TEXT NOT NULL,
+                latitude REAL,
+                longitude REAL,
+                timestamp TEXT,
+                fire_probability REAL NOT NULL,
+                has_fire INTEGER NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def load(self) -> pd.DataFrame:
+        """Every station's state, indexed by station_url."""
+        with self._lock:
+            df = pd.read_sql_query("SELECT * FROM station_state", self._conn)
+        return df.set_index("station_url")
+
+    def record(self, scored: pd.DataFrame, observed_at: Dict[str, str], key: str) -> int:
+        """Store freshly scored stations with the observation timestamp their probe returned."""
+        rows = [
+            (url, observed_at[url], key,
+             None if pd.isna(lat) else float(lat), None if pd.isna(lon) else float(lon),
+             ts, float(p), int(fire))
+            for url, lat, lon, ts, p, fire in scored.reindex(columns=CARRIED_COLUMNS).itertuples(index=False, name=None)
+            if url in observed_at
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO station_state (station_url, observed_at, model_key, latitude, longitude, "
+                "timestamp, fire_probability, has_fire) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+@dataclass
+class IncrementalReport:
+    total: int = 0
+    queued: int = 0          # new observation, new station, model changed, or probe failed
+    rescored: int = 0        # queued stations that were fetched and scored
+    fetch_failed: int = 0    # queued stations whose fetch failed, so they have no prediction this sweep
+    reused: int = 0          # same observation and same model as last sweep: prior prediction carried forward
+    probe_failed: int = 0
+
+    def summary(self) -> str:
+        return (f"Incremental sweep: {self.total} stations | queued {self.queued} | rescored {self.rescored} | "
+                f"fetch failures {self.fetch_failed} | reused {self.reused} (no new observations) | "
+                f"probe failures {self.probe_failed}")
+
+
+def plan_incremental(stations: pd.DataFrame, state: SweepState, key: str,
+                     probe: Callable[..., Any] = latest_observation_time,
+                     max_workers: int = DEFAULT_MAX_WORKERS,
+                     requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND
+                     ) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, str], IncrementalReport]:
+    """
+    Probe every station's newest observation and split the list in two.
+
+    Returns (to_score, carried, observed_at, report). to_score holds the
+    stations that need the full fetch and score. carried holds prior
+    predictions for stations whose newest observation matches the last
+    sweep's and which were scored by the same model. observed_at maps each
+    probed station to the timestamp to record once it has been scored.
+    The caller fills in report.rescored and report.fetch_failed after scoring.
+    """
+    stations = stations.assign(station_url=stations["station_url"].str.rstrip("/")).reset_index(drop=True)
+    results, probe_report = run_sweep(stations, probe, max_workers=max_workers,
+                                      requests_per_second=requests_per_second)
+    print(f"Probe: {probe_report.summary()}")
+
+    previous = state.load()
+    observed_at: Dict[str, str] = {}
+    reuse = []
+    report = IncrementalReport(total=len(stations))
+    for result in results:
+        if not result.ok:
+            report.probe_failed += 1
+            reuse.append(False)
+            continue
+        observed = _normalize_timestamp(result.data)
+        observed_at[result.station_url] = observed
+        prior = previous.loc[result.station_url] if result.station_url in previous.index else None
+        reuse.append(prior is not None and prior["observed_at"] == observed and prior["model_key"] == key)
+
+    reuse = pd.Series(reuse, index=stations.index)
+    to_score = stations[~reuse].reset_index(drop=True)
+    carried = previous.loc[stations.loc[reuse, "station_url"]].reset_index().reindex(columns=CARRIED_COLUMNS)
+    report.reused = len(carried)
+    report.queued = len(to_score)
+    return to_score, carried, observed_at, report
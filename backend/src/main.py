@@ -1,3 +1,4 @@
+import os
 import re
 import json
 from datetime import datetime, timezone
@@ -6,6 +7,7 @@ import csv
 from pathlib import Path
 from pprint import pprint
 import sys
+import threading
 
 # --- robust imports: work with `python -m src.main` OR `python src/main.py` OR `uv run src/main.py` ---
 # Set up path first to avoid circular import issues
@@ -22,6 +24,8 @@ try:
     from src.archive.risk_summarize import to_context_json
     from src.archive.prompt_gemini import ask_gemini, ask_gemini_without_wildfire_data
     from src.api_helpers import get_station_list, request_observations
+    from src.prediction_sink import prediction_sink
+    from src.gemini_batcher import GeminiBatcher, GeminiDispatcher
     # from src.rf_baseline import predict_fire_risk, get_trained_model
     from src.highsight import get_satellite_image
     try:
@@ -36,6 +40,8 @@ except (ModuleNotFoundError, ImportError):
     from src.archive.risk_summarize import to_context_json
     from src.archive.prompt_gemini import ask_gemini, ask_gemini_without_wildfire_data
     from api_helpers import get_station_list, request_observations
+    from prediction_sink import prediction_sink
+    from gemini_batcher import GeminiBatcher, GeminiDispatcher
     from rf_baseline import predict_fire_risk, get_trained_model
     from highsight import get_satellite_image
     try:
@@ -132,34 +138,45 @@ def simplify_weather_json(weather_json: dict, latitude: float, longitude: float)
 
 def insert_prediction(station_id, station_name, latitude, longitude, timestamp, confidence, weather):
     """Insert a wildfire prediction record into the database."""
+    insert_predictions([(station_id, station_name, latitude, longitude, timestamp, confidence, weather)])
+
+
+def insert_predictions(rows):
+    """
+    Insert many wildfire prediction records in one transaction.
+    rows: (station_id, station_name, latitude, longitude, timestamp, confidence, weather) tuples.
+    """
     if DatabaseManager is None:
         # DB is disabled for this run; skip inserting.
         return
 
-    conn = DatabaseManager.get_connection()
-    cursor = None
     try:
-        cursor = conn.cursor()
-        sql = """
-            INSERT INTO wildfire_location_prediction
-            (station_id, station_name, latitude, longitude, timestamp, confidence, weather_json)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """
-        cursor.execute(sql, (
-            station_id,
-            station_name,
-            latitude,
-            longitude,
-            timestamp,
-            confidence,
-            json.dumps(weather)  # Convert dict to JSON
-        ))
-        conn.commit()
+        DatabaseManager.insert_predictions(rows)
     except Exception as e:
-        print(f"Error inserting record: {e}")
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+        print(f"Error inserting {len(rows)} record(s): {e}")
+
+
+def prediction_records(weather_rows, station_ids):
+    """
+    insert_predictions tuples for a scored Gemini batch (rows carry confidenceScore).
+    station_ids maps (latitude, longitude) to the NWS station id, which the rows sent to Gemini leave out.
+    """
+    records = []
+    for weather in weather_rows:
+        timestamp = weather.get("timestamp")
+        if timestamp:
+            # DATETIME columns take naive UTC, not the ISO offset the NWS returns
+            timestamp = datetime.fromisoformat(timestamp).astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        records.append((station_ids.get((weather["latitude"], weather["longitude"])), weather["stationName"],
+                        weather["latitude"], weather["longitude"], timestamp, int(weather["confidenceScore"]), weather))
+    return records
+
+
+def check_scores(response_text, weather_rows):
+    """Reject a Gemini answer that doesn't parse or doesn't score every row, so it is retried rather than memoized."""
+    scores = parse_confidence(response_text)
+    if len(scores) != len(weather_rows):
+        raise ValueError(f"Gemini returned {len(scores)} scores for {len(weather_rows)} weather records.")
 
 
 def write_predictions_to_csv(gemini_response, cumulative_weather_data):
@@ -177,23 +194,53 @@ def write_predictions_to_csv(gemini_response, cumulative_weather_data):
             f"{len(cumulative_weather_data)} weather records."
         )
 
-    for i in range(len(cumulative_weather_data)):
-        weather_data = cumulative_weather_data[i]
-        confidence_score = confidence_scores[i]
+    # One open handle per daily file, shared across batches; flushed on close/exit
+    sink = prediction_sink(csv_path)
+    for weather_data, confidence_score in zip(cumulative_weather_data, confidence_scores):
         weather_data["confidenceScore"] = confidence_score
+        # Only some stations get an image; keep the column so the header is stable across batches
+        weather_data.setdefault("satellite_image", None)
+    sink.write_many(cumulative_weather_data)
+    sink.flush()
+
+def handle_gemini_result(result) -> None:
+    """Attach satellite images for predicted fires and append the batch to the CSV."""
+    weather_rows = result.rows
+
+    print("=== Gemini Result ===")
+    print(result.text)
+
+    fire_predictions = parse_confidence(result.text) # list of 1 or 0 for each weather station
+    # Get images for each weather station that has a fire prediction
+    for i in range(len(weather_rows)):
+        if fire_predictions[i] == 1:
+            img = get_satellite_image(weather_rows[i])
+            if img:
+                weather_rows[i]["satellite_image"] = img
 
-        file_exists = csv_path.exists()
-        with csv_path.open("a", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=weather_data.keys())
-            if not file_exists:
-                writer.writeheader()
-            writer.writerow(weather_data)
+    write_predictions_to_csv(result.text, weather_rows) # list of weather data with satellite image path
 
 def predict_wildfire_likelihood_in_batches():
-    api_key = load_api_key()
     count = 0
-    weather_data_count = 0
     cumulative_weather_data = []
+
+    # One client for the whole run; batches are sized by token budget and the
+    # few-shot prefix is cached provider-side. GEMINI_FAKE=1 runs offline.
+    batcher = GeminiBatcher(api_key=None if os.getenv("GEMINI_FAKE") else load_api_key(), validate=check_scores)
+    # Gemini batches run in the background while stations keep being fetched;
+    # answers are memoized, so unchanged batches on a rerun send nothing
+    # Scored rows are collected across batches and written to the database in one insert at the end
+    station_ids = {}
+    db_records = []
+    db_records_lock = threading.Lock()
+
+    def on_result(result):
+        handle_gemini_result(result)
+        records = prediction_records(result.rows, station_ids)
+        with db_records_lock:
+            db_records.extend(records)
+
+    dispatcher = GeminiDispatcher(batcher, on_result=on_result)
     
     # Pre-load the RF model once for efficiency (uses cached model after first call)
     print("Loading RF model for fire prediction filtering...")
@@ -222,43 +269,29 @@ def predict_wildfire_likelihood_in_batches():
                 print(f"  RF model predicts fire (prob={probability:.3f}), including.")
                 
                 cumulative_weather_data.append(weather)
-                weather_data_count += 1
+                station_ids[(weather["latitude"], weather["longitude"])] = station_url.rstrip("/").rsplit("/", 1)[-1]
             except Exception as e:
                 print(f"  Error processing station: {e}")
                 continue
 
-            if weather_data_count >= 10:
-                max_retries = 3
-                for attempt in range(max_retries):
-                    try:
-                        print(f"Querying Gemini...")
-                        gemini_response = ask_gemini(api_key, cumulative_weather_data)
-                        break
-                    except Exception as e:
-                        print(f"Error querying Gemini: {e}")
-                        time.sleep(5)
-                else:
-                    print("Failed after maximum retries.")
-                    break
-
-                print("=== Gemini Result ===")
-                print(gemini_response)
-
-                fire_predictions = parse_confidence(gemini_response) # list of 1 or 0 for each weather station
-                # Get images for each weather station that has a fire prediction
-                for i in range(len(cumulative_weather_data)):
-                    if fire_predictions[i] == 1:
-                        img = get_satellite_image(cumulative_weather_data[i])
-                        if img:
-                            cumulative_weather_data[i]["satellite_image"] = img
-
-                write_predictions_to_csv(gemini_response, cumulative_weather_data) # list of weather data with satellite image path
-                weather_data_count = 0
+            if batcher.is_full(cumulative_weather_data):
+                dispatcher.submit(cumulative_weather_data)
                 cumulative_weather_data = []
 
             count += 1
             print(f"{count}/500 completed.")
 
+    # Stations left over after the last full batch
+    if cumulative_weather_data:
+        dispatcher.submit(cumulative_weather_data)
+    dispatcher.close()
+    insert_predictions(db_records)
+
+    memo_hits = batcher.memo.hits if batcher.memo else 0
+    print(f"Gemini: {batcher.batches_sent} batches sent, {memo_hits} answered from memo, "
+          f"{dispatcher.failed} failed, {batcher.total_prompt_tokens} prompt tokens "
+          f"({batcher.total_cached_tokens} served from cache)")
+
 
 def main():
     predict_wildfire_likelihood_in_batches()
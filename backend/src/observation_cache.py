@@ -0,0 +1,131 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_PATH = ROOT / "data" / "cache" / "observations.sqlite3"
+
+# Keep a day more than the 7-day feature window so the oldest day is never evicted mid-run
+DEFAULT_TTL_HOURS = 8 * 24
+# Skip the network entirely for a station fetched this recently (0 = always ask for newer data)
+DEFAULT_REFRESH_SECONDS = 0
+
+
+def _normalize_timestamp(timestamp: str) -> str:
+    return datetime.fromisoformat(timestamp).astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+
+class ObservationCache:
+    """
+    SQLite store of api.weather.gov observation properties keyed by
+    (station, observation timestamp).
+
+    Safe to share between the sweep's worker threads. `hits` counts
+    observations served from disk and `misses` counts observations that had
+    to be downloaded.
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, ttl_hours: float = DEFAULT_TTL_HOURS,
+                 refresh_seconds: float = DEFAULT_REFRESH_SECONDS):
+        self.path = Path(path)
+        self.ttl_hours = ttl_hours
+        self.refresh_seconds = refresh_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS observations (
+                station TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                properties TEXT NOT NULL,
+                PRIMARY KEY (station, timestamp)
+            );
+            CREATE TABLE IF NOT EXISTS station_fetches (
+                station TEXT PRIMARY KEY,
+                fetched_at REAL NOT NULL
+            );
+        """)
+        self._conn.commit()
+        self.evict()
+
+    def latest_timestamp(self, station: str) -> Optional[datetime]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(timestamp) FROM observations WHERE station = ?", (station,)
+            ).fetchone()
+        return datetime.fromisoformat(row[0]) if row and row[0] else None
+
+    def is_fresh(self, station: str) -> bool:
+        """True if the station was fetched less than refresh_seconds ago."""
+        if self.refresh_seconds <= 0:
+            return False
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at FROM station_fetches WHERE station = ?", (station,)
+            ).fetchone()
+        return bool(row) and time.time() - row[0] < self.refresh_seconds
+
+    def put(self, station: str, features: List[Dict[str, Any]]) -> None:
+        rows = []
+        for feature in features:
+            props = feature.get("properties", {})
+            timestamp = props.get("timestamp")
+            if timestamp:
+                rows.append((station, _normalize_timestamp(timestamp), json.dumps(props)))
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO observations (station, timestamp, properties) VALUES (?, ?, ?)", rows
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO station_fetches (station, fetched_at) VALUES (?, ?)", (station, time.time())
+            )
+            self._conn.commit()
+            self.misses += len(rows)
+
+    def features_since(self, station: str, start: datetime, downloaded: int = 0) -> List[Dict[str, Any]]:
+        """
+        Cached observations at or after `start`, newest first, shaped like API
+        features. `downloaded` is how many of them were just fetched, so they
+        are not counted as hits.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT properties FROM observations WHERE station = ? AND timestamp >= ? ORDER BY timestamp DESC",
+                (station, start.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+00:00")),
+            ).fetchall()
+            self.hits += max(0, len(rows) - downloaded)
+        return [{"properties": json.loads(row[0])} for row in rows]
+
+    def evict(self) -> int:
+        """Drop observations older than ttl_hours. Returns the number of rows removed."""
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=self.ttl_hours)
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM observations WHERE timestamp < ?", (cutoff.strftime("%Y-%m-%dT%H:%M:%S+00:00"),)
+            )
+            self._conn.commit()
+        return cur.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute("SELECT COUNT(*) FROM observations").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "rows": rows,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+OBSERVATION_DAYS = 7
+PAGE_LIMIT = 500
+
+
+@dataclass
+class FetchStats:
+    """Network cost of fetching one station's observations."""
+    pages: int = 0
+    bytes: int = 0
+    observations: int = 0
+
+    def add_page(self, resp, n_features: int) -> None:
+        self.pages += 1
+        # Content-Length is the on-the-wire (possibly gzipped) size when present
+        length = resp.headers.get("Content-Length") if getattr(resp, "headers", None) else None
+        self.bytes += int(length) if length else len(resp.content)
+        self.observations += n_features
+
+    def __iadd__(self, other: "FetchStats") -> "FetchStats":
+        self.pages += other.pages
+        self.bytes += other.bytes
+        self.observations += other.observations
+        return self
+
+
+def window_start(days: int = OBSERVATION_DAYS, now: Optional[datetime] = None) -> datetime:
+    return (now or datetime.now(timezone.utc)).replace(microsecond=0) - timedelta(days=days)
+
+
+def window_params(days: int = OBSERVATION_DAYS, now: Optional[datetime] = None,
+                  start: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    start/end query parameters covering the last `days` days up to now (UTC).
+    An explicit `start` (e.g. the newest cached observation) narrows the window.
+    """
+    end = (now or datetime.now(timezone.utc)).replace(microsecond=0)
+    start = max(start, window_start(days, end)) if start else window_start(days, end)
+    return {
+        "start": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "end": end.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "limit": PAGE_LIMIT,
+    }
+
+
+def select_daily_observations(features: List[Dict[str, Any]], n_days: int = OBSERVATION_DAYS) -> List[Dict[str, Any]]:
+    """
+    Pick one observation per day at the hour of the newest observation.
+
+    features must be newest-first (the order api.weather.gov returns them in).
+    Matches the original page-scanning loop: the first observation fixes the
+    target hour and the first observation seen for each day wins.
+    """
+    if not features:
+        return []
+
+    timestamps = pd.to_datetime(
+        pd.Series([f.get("properties", {}).get("timestamp") for f in features]),
+        utc=True, errors="coerce",
+    )
+    valid = timestamps.notna().to_numpy()
+    if not valid.any():
+        return []
+
+    target_hour = timestamps[valid].iloc[0].hour
+    at_hour = valid & (timestamps.dt.hour == target_hour).fillna(False).to_numpy()
+    # Only rows at the target hour compete for their day
+    days = timestamps.dt.normalize().where(at_hour)
+    first_of_day = at_hour & ~days.duplicated(keep="first").to_numpy()
+
+    picked = first_of_day.nonzero()[0][:n_days]
+    return [features[i]["properties"] for i in picked]
+
+
+def fetch_windowed_observations(station_id_url: str, get: Callable[..., Any], days: int = OBSERVATION_DAYS,
+                                stats: Optional[FetchStats] = None,
+                                start: Optional[datetime] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Download only the observations in the last `days` days using the API's
+    start/end filters, following pagination until the window is exhausted.
+    Returns the raw features newest-first, or None if a request failed.
+    """
+    stats = stats if stats is not None else FetchStats()
+    url = station_id_url.rstrip("/") + "/observations"
+    params = window_params(days, start=start)
+
+    features: List[Dict[str, Any]] = []
+    while url:
+        resp = get(url, params=params)
+        if not resp:
+            return None
+        data = resp.json()
+        page = data.get("features", [])
+        stats.add_page(resp, len(page))
+        if not page:
+            break
+        features.extend(page)
+
+        pagination = data.get("pagination") or {}
+        next_url = pagination.get("next")
+        url = next_url if next_url and next_url != url else None
+    return features
@@ -0,0 +1,183 @@
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_HISTORY_PATH = ROOT / "data" / "history" / "predictions.sqlite3"
+DEFAULT_PREDICTIONS_DIR = ROOT / "data" / "model_predictions"
+
+COLUMNS = ["station_url", "latitude", "longitude", "timestamp", "fire_probability"]
+
+# fire_predictions_2026-03-19_00.csv -> run "2026-03-19_00" (older daily files have no hour)
+_RUN_RE = re.compile(r"^fire_predictions_(\d{4}-\d{2}-\d{2}(?:_\d{2})?)$")
+
+TimeLike = Union[str, datetime, pd.Timestamp]
+
+
+def _normalize_timestamps(values) -> pd.Series:
+    # Fixed-width UTC strings so SQLite range scans on the index compare correctly
+    return pd.to_datetime(pd.Series(values), utc=True, errors="coerce").dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _bound(value: Optional[TimeLike]) -> Optional[str]:
+    return None if value is None else _normalize_timestamps([value]).iloc[0]
+
+
+def run_id_for(path: Path) -> Optional[str]:
+    match = _RUN_RE.match(Path(path).stem)
+    return match.group(1) if match else None
+
+
+class PredictionHistory:
+    """
+    Append-only SQLite history of every sweep's predictions.
+
+    Rows are keyed by (station_url, run_id), where run_id is the sweep's
+    hour (the fire_predictions_<run_id>.csv suffix). Indexes on station,
+    timestamp and (run, probability) let the query helpers read only the
+    rows they need instead of parsing every CSV.
+    """
+
+    def __init__(self, path: Path = DEFAULT_HISTORY_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS predictions (
+                run_id TEXT NOT NULL,
+                station_url TEXT NOT NULL,
+                latitude REAL,
+                longitude REAL,
+                timestamp TEXT NOT NULL,
+                fire_probability REAL NOT NULL,
+                PRIMARY KEY (station_url, run_id)
+            );
+            CREATE INDEX IF NOT EXISTS predictions_station_time ON predictions (station_url, timestamp);
+            CREATE INDEX IF NOT EXISTS predictions_time ON predictions (timestamp);
+            CREATE INDEX IF NOT EXISTS predictions_run_probability ON predictions (run_id, fire_probability DESC);
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                source TEXT,
+                appended_at TEXT NOT NULL,
+                n_rows INTEGER NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def append(self, scored: pd.DataFrame, run_id: Optional[str] = None, source: Optional[str] = None) -> int:
+        """
+        Add one sweep's predictions (station_url, latitude, longitude,
+        timestamp, fire_probability). run_id defaults to the current UTC hour,
+        matching write_predictions' file name. Re-appending a run replaces its
+        rows. Returns the number of rows written.
+        """
+        run_id = run_id or datetime.now(timezone.utc).strftime("%Y-%m-%d_%H")
+        df = scored.reindex(columns=COLUMNS).dropna(subset=["station_url", "fire_probability"])
+        df = df.assign(timestamp=_normalize_timestamps(df["timestamp"].to_numpy()).to_numpy())
+        df = df.dropna(subset=["timestamp"]).drop_duplicates("station_url", keep="last")
+
+        rows = [
+            (run_id, url, None if pd.isna(lat) else float(lat), None if pd.isna(lon) else float(lon), ts, float(p))
+            for url, lat, lon, ts, p in df[COLUMNS].itertuples(index=False, name=None)
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM predictions WHERE run_id = ?", (run_id,))
+                self._conn.executemany(
+                    "INSERT INTO predictions (run_id, station_url, latitude, longitude, timestamp, fire_probability) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO runs (run_id, source, appended_at, n_rows) VALUES (?, ?, ?, ?)",
+                    (run_id, source, datetime.now(timezone.utc).isoformat(), len(rows)),
+                )
+        return len(rows)
+
+    def import_csvs(self, predictions_dir: Path = DEFAULT_PREDICTIONS_DIR, force: bool = False) -> int:
+        """
+        One-shot import of existing fire_predictions_*.csv files. Runs already
+        in the history are skipped unless force is set. Returns files imported.
+        """
+        imported = 0
+        existing = set(self.runs()["run_id"])
+        for path in sorted(Path(predictions_dir).glob("fire_predictions_*.csv")):
+            run_id = run_id_for(path)
+            if run_id is None or (run_id in existing and not force):
+                continue
+            try:
+                n = self.append(pd.read_csv(path), run_id=run_id, source=path.name)
+            except Exception as e:
+                print(f"[ERR] importing {path.name}: {e}")
+                continue
+            print(f"Imported {path.name}: {n} predictions")
+            imported += 1
+        return imported
+
+    def _query(self, sql: str, params=()) -> pd.DataFrame:
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=params)
+
+    def runs(self) -> pd.DataFrame:
+        return self._query("SELECT run_id, source, appended_at, n_rows FROM runs ORDER BY run_id")
+
+    def latest_run(self) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(run_id) FROM runs").fetchone()
+        return row[0] if row else None
+
+    def station_history(self, station_url: str, start: Optional[TimeLike] = None,
+                        end: Optional[TimeLike] = None) -> pd.DataFrame:
+        """One station's predictions in [start, end), oldest first."""
+        sql = "SELECT * FROM predictions WHERE station_url = ?"
+        params = [station_url.rstrip("/")]
+        if start is not None:
+            sql += " AND timestamp >= ?"
+            params.append(_bound(start))
+        if end is not None:
+            sql += " AND timestamp < ?"
+            params.append(_bound(end))
+        return self._query(sql + " ORDER BY timestamp", params)
+
+    def time_range(self, start: TimeLike, end: TimeLike) -> pd.DataFrame:
+        """Every prediction made in [start, end), oldest first."""
+        return self._query(
+            "SELECT * FROM predictions WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+            (_bound(start), _bound(end)),
+        )
+
+    def top_k(self, k: int = 20, run_id: Optional[str] = None, start: Optional[TimeLike] = None,
+              end: Optional[TimeLike] = None) -> pd.DataFrame:
+        """
+        Highest-probability stations. With start/end, each station's peak
+        prediction in [start, end); otherwise one run (default: the latest).
+        """
+        if start is not None or end is not None:
+            sql = ("SELECT station_url, latitude, longitude, timestamp, run_id, MAX(fire_probability) AS fire_probability "
+                   "FROM predictions WHERE timestamp >= ? AND timestamp < ? "
+                   "GROUP BY station_url ORDER BY fire_probability DESC LIMIT ?")
+            return self._query(sql, (_bound(start) or "", _bound(end) or "9999", k))
+
+        run_id = run_id or self.latest_run()
+        return self._query(
+            "SELECT * FROM predictions WHERE run_id = ? ORDER BY fire_probability DESC LIMIT ?", (run_id, k)
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    # python src/prediction_history.py [predictions_dir]
+    history = PredictionHistory()
+    source_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PREDICTIONS_DIR
+    print(f"Imported {history.import_csvs(source_dir)} prediction files into {history.path}")
@@ -0,0 +1,135 @@
+import atexit
+import csv
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+DEFAULT_FLUSH_EVERY = 500  # rows buffered before they are written out
+
+
+class PredictionSink:
+    """
+    Buffered CSV writer that keeps one open handle per file.
+
+    Rows are buffered and written in batches of flush_every. The header is
+    fixed once: taken from an existing file, from fieldnames, or from the
+    union of keys in the first batch. Keys that show up later are dropped
+    (with one warning) so every row lines up with the header.
+
+    overwrite=True truncates the file on first write instead of appending.
+    Use it as a context manager, or rely on close_all() at interpreter exit.
+    """
+
+    def __init__(self, path: Path, fieldnames: Optional[Sequence[str]] = None,
+                 flush_every: int = DEFAULT_FLUSH_EVERY, overwrite: bool = False):
+        self.path = Path(path)
+        self.overwrite = overwrite
+        self.flush_every = max(1, flush_every)
+        self.fieldnames: Optional[List[str]] = list(fieldnames) if fieldnames else None
+        self.rows_written = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._handle = None
+        self._writer = None
+        self._warned_extra = False
+        self._lock = threading.Lock()
+
+    def write(self, row: Dict[str, Any]) -> None:
+        with self._lock:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.flush_every:
+                self._flush()
+
+    def write_many(self, rows: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for row in rows:
+                self._buffer.append(row)
+                if len(self._buffer) >= self.flush_every:
+                    self._flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._flush()
+                if self._handle is None and self.overwrite and self.fieldnames is not None:
+                    # Nothing was written: still replace the file with a header-only CSV
+                    self._open()
+            finally:
+                if self._handle is not None:
+                    self._handle.close()
+                    self._handle = None
+                    self._writer = None
+
+    def __enter__(self) -> "PredictionSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        existing_header = None
+        if not self.overwrite and self.path.exists() and self.path.stat().st_size > 0:
+            with self.path.open(newline="", encoding="utf-8") as f:
+                existing_header = next(csv.reader(f), None)
+
+        if existing_header:
+            self.fieldnames = existing_header
+        elif self.fieldnames is None:
+            self.fieldnames = list(dict.fromkeys(key for row in self._buffer for key in row))
+
+        self._handle = self.path.open("w" if self.overwrite else "a", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._handle, fieldnames=self.fieldnames, extrasaction="ignore")
+        if not existing_header:
+            self._writer.writeheader()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        if self._handle is None:
+            self._open()
+
+        if not self._warned_extra:
+            known = set(self.fieldnames)
+            extra = {key for row in self._buffer for key in row if key not in known}
+            if extra:
+                print(f"[WARN] {self.path.name}: dropping columns not in header: {sorted(extra)}")
+                self._warned_extra = True
+
+        self._writer.writerows(self._buffer)
+        self._handle.flush()
+        self.rows_written += len(self._buffer)
+        self._buffer.clear()
+
+
+_sinks: Dict[Path, PredictionSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def prediction_sink(path: Path, fieldnames: Optional[Sequence[str]] = None,
+                    flush_every: int = DEFAULT_FLUSH_EVERY) -> PredictionSink:
+    """Shared sink for path, so repeated writers append through one open handle."""
+    key = Path(path).resolve()
+    with _sinks_lock:
+        sink = _sinks.get(key)
+        if sink is None:
+            sink = PredictionSink(key, fieldnames=fieldnames, flush_every=flush_every)
+            _sinks[key] = sink
+        return sink
+
+
+def close_all() -> None:
+    with _sinks_lock:
+        sinks = list(_sinks.values())
+        _sinks.clear()
+    for sink in sinks:
+        try:
+            sink.close()
+        except Exception as e:
+            print(f"[ERR] closing {sink.path}: {e}")
+
+
+atexit.register(close_all)
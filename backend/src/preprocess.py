@@ -1,6 +1,13 @@
+import sqlite3
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
 import pandas as pd
 import numpy as np
 
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_COUNTS_PATH = ROOT / "data" / "cache" / "region_counts.sqlite3"
+
 def load_and_clean(csv_path: str) -> pd.DataFrame:
     """
     Loads the CSV with robust datetime parsing.
@@ -8,6 +15,9 @@ def load_and_clean(csv_path: str) -> pd.DataFrame:
     """
     # utf-8-sig handles possible BOM on header (e.g., \ufeffOBJECTID)
     df = pd.read_csv(csv_path, encoding="utf-8-sig")
+    return _clean(df)
+
+def _clean(df: pd.DataFrame) -> pd.DataFrame:
     # Map columns case-insensitively
     cols = {c.lower(): c for c in df.columns}
     dt_col = next((cols[c] for c in cols if "attr_firediscoverydatetime" in c), None)
@@ -16,7 +26,7 @@ def load_and_clean(csv_path: str) -> pd.DataFrame:
     if not all([dt_col, lat_col, lon_col]):
         raise ValueError("CSV must have 'attr_FireDiscoveryDateTime', 'attr_InitialLatitude', 'attr_InitialLongitude' columns.")
 
-    df["ts"] = pd.to_datetime(df[dt_col], errors="coerce", infer_datetime_format=True)
+    df["ts"] = pd.to_datetime(df[dt_col], errors="coerce")
     df = df.dropna(subset=["ts", lat_col, lon_col]).copy()
     df.rename(columns={lat_col: "lat", lon_col: "lon"}, inplace=True)
     return df
@@ -24,6 +34,19 @@ def load_and_clean(csv_path: str) -> pd.DataFrame:
 def bin_coord(x: float, grid: float) -> float:
     return float(np.round(x / grid) * grid)
 
+def grid_index(values, grid: float) -> np.ndarray:
+    """Integer grid cell for every coordinate at once; cell * grid == bin_coord(value, grid)."""
+    return np.round(np.asarray(values, dtype=float) / grid).astype(np.int64)
+
+def _score(agg: pd.DataFrame) -> pd.DataFrame:
+    agg["trend_ratio"] = (agg["count_recent"] + 1.0) / (agg["count_prior"] + 1.0)  # +1 to avoid div by zero
+    # Score: emphasize recent, add baseline, reward upward trend
+    agg["score"] = (0.7 * agg["count_recent"]
+                    + 0.3 * np.log1p(agg["count_all"])
+                    + np.log2(agg["trend_ratio"] + 1.0))
+    # Keep regions with some recent activity
+    return agg[agg["count_recent"] > 0].sort_values("score", ascending=False)
+
 def aggregate_regions(df: pd.DataFrame, grid: float, lookback_days: int) -> tuple[pd.DataFrame, pd.Timestamp]:
     """
     Creates lat/lon grid bins and computes:
@@ -32,33 +55,133 @@ def aggregate_regions(df: pd.DataFrame, grid: float, lookback_days: int) -> tupl
     - count_prior (preceding lookback_days)
     Returns (agg_df, max_ts)
     """
-    df = df.copy()
-    df["lat_bin"] = df["lat"].apply(lambda v: bin_coord(v, grid))
-    df["lon_bin"] = df["lon"].apply(lambda v: bin_coord(v, grid))
-
     max_ts = df["ts"].max()
     recent_cut = max_ts - pd.Timedelta(days=lookback_days)
     prior_cut  = recent_cut - pd.Timedelta(days=lookback_days)
 
-    grp = df.groupby(["lat_bin", "lon_bin"])
-    totals = grp.size().rename("count_all")
+    # One groupby over integer cells computes all three counts together
+    ts = df["ts"].to_numpy()
+    cells = pd.DataFrame({
+        "lat_idx": grid_index(df["lat"], grid),
+        "lon_idx": grid_index(df["lon"], grid),
+        "count_all": 1.0,
+        "count_recent": (ts >= recent_cut).astype(float),
+        "count_prior": ((ts >= prior_cut) & (ts < recent_cut)).astype(float),
+    })
+    agg = cells.groupby(["lat_idx", "lon_idx"], sort=True).sum().reset_index()
+    agg.insert(0, "lat_bin", agg.pop("lat_idx") * grid)
+    agg.insert(1, "lon_bin", agg.pop("lon_idx") * grid)
+    return _score(agg), max_ts
 
-    recent = (df[df["ts"] >= recent_cut]
-              .groupby(["lat_bin", "lon_bin"])
-              .size()
-              .rename("count_recent"))
 
-    prior = (df[(df["ts"] >= prior_cut) & (df["ts"] < recent_cut)]
-             .groupby(["lat_bin", "lon_bin"])
-             .size()
-             .rename("count_prior"))
+def _epoch_day(ts: pd.Timestamp) -> int:
+    return int(np.datetime64(ts, "D").astype(np.int64))
 
-    agg = pd.concat([totals, recent, prior], axis=1).fillna(0.0).reset_index()
-    agg["trend_ratio"] = (agg["count_recent"] + 1.0) / (agg["count_prior"] + 1.0)  # +1 to avoid div by zero
-    # Score: emphasize recent, add baseline, reward upward trend
-    agg["score"] = (0.7 * agg["count_recent"]
-                    + 0.3 * np.log1p(agg["count_all"])
-                    + np.log2(agg["trend_ratio"] + 1.0))
-    # Keep regions with some recent activity
-    agg = agg[agg["count_recent"] > 0].sort_values("score", ascending=False)
-    return agg, max_ts
+
+class RegionCounts:
+    """
+    Persisted per-cell daily fire counts, so new fires can be folded in
+    without rescanning history.
+
+    Counts are kept per (lat cell, lon cell, day) in SQLite. aggregate()
+    derives count_all/recent/prior from them in one query. The recent and
+    prior windows are resolved to whole days, so a fire on the cut-off day
+    counts as recent even if it came earlier in the day than the cut-off.
+    update_from_csv() remembers how many rows of an append-only CSV it
+    has already folded in and only reads the rest.
+    """
+
+    def __init__(self, grid: float, path: Union[str, Path] = DEFAULT_COUNTS_PATH):
+        self.grid = grid
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cell_days (
+                lat_idx INTEGER NOT NULL,
+                lon_idx INTEGER NOT NULL,
+                day INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (lat_idx, lon_idx, day)
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+        stored = self._meta("grid")
+        if stored is None:
+            self._set_meta("grid", repr(grid))
+            self.conn.commit()
+        elif float(stored) != grid:
+            raise ValueError(f"{self.path} holds counts for grid {stored}, not {grid}")
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def max_ts(self) -> Optional[pd.Timestamp]:
+        value = self._meta("max_ts")
+        return pd.Timestamp(value) if value else None
+
+    def update(self, df: pd.DataFrame) -> int:
+        """Fold cleaned fire records (ts/lat/lon, as from load_and_clean) into the counters."""
+        if df.empty:
+            return 0
+        cells = pd.DataFrame({
+            "lat_idx": grid_index(df["lat"], self.grid),
+            "lon_idx": grid_index(df["lon"], self.grid),
+            "day": df["ts"].to_numpy().astype("datetime64[D]").astype(np.int64),
+        })
+        counts = cells.groupby(["lat_idx", "lon_idx", "day"]).size().reset_index(name="count")
+        max_ts = df["ts"].max()
+        if self.max_ts is not None:
+            max_ts = max(max_ts, self.max_ts)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO cell_days (lat_idx, lon_idx, day, count) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (lat_idx, lon_idx, day) DO UPDATE SET count = count + excluded.count",
+                counts.itertuples(index=False, name=None),
+            )
+            self._set_meta("max_ts", max_ts.isoformat())
+        return len(df)
+
+    def update_from_csv(self, csv_path: Union[str, Path]) -> int:
+        """Fold in the rows appended to csv_path since the last call; returns how many were read."""
+        key = f"rows_seen:{Path(csv_path).resolve()}"
+        seen = int(self._meta(key) or 0)
+        raw = pd.read_csv(csv_path, encoding="utf-8-sig", skiprows=range(1, seen + 1))
+        if raw.empty:
+            return 0
+        self.update(_clean(raw))
+        with self.conn:
+            self._set_meta(key, str(seen + len(raw)))
+        return len(raw)
+
+    def aggregate(self, lookback_days: int) -> Tuple[pd.DataFrame, Optional[pd.Timestamp]]:
+        """Same output as aggregate_regions over everything folded in so far."""
+        max_ts = self.max_ts
+        if max_ts is None:
+            return _score(pd.DataFrame(columns=["lat_bin", "lon_bin", "count_all", "count_recent", "count_prior"],
+                                       dtype=float)), None
+        recent_day = _epoch_day(max_ts - pd.Timedelta(days=lookback_days))
+        prior_day = _epoch_day(max_ts - pd.Timedelta(days=2 * lookback_days))
+        agg = pd.read_sql_query(
+            """
+            SELECT lat_idx, lon_idx,
+                   SUM(count) AS count_all,
+                   SUM(CASE WHEN day >= :recent THEN count ELSE 0 END) AS count_recent,
+                   SUM(CASE WHEN day >= :prior AND day < :recent THEN count ELSE 0 END) AS count_prior
+            FROM cell_days
+            GROUP BY lat_idx, lon_idx
+            ORDER BY lat_idx, lon_idx
+            """,
+            self.conn, params={"recent": recent_day, "prior": prior_day},
+        ).astype(float)
+        agg.insert(0, "lat_bin", agg.pop("lat_idx") * self.grid)
+        agg.insert(1, "lon_bin", agg.pop("lon_idx") * self.grid)
+        return _score(agg), max_ts
+
+    def close(self) -> None:
+        self.conn.close()
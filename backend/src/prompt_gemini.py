@@ -1,3 +1,4 @@
+from functools import lru_cache
 from google import genai
 
 PROMPT = """You are a wildfire risk analyst. I will provide weather data for you to analyze.
@@ -132,11 +133,21 @@ FORMAT INSTRUCTIONS (IMPORTANT):
 - Your entire reply MUST be valid JSON.
 """
 
+# The few-shot example table is identical on every call; only the part from
+# "Task:" on changes per batch, so the prefix can be cached provider-side.
+FEW_SHOT_PREFIX, _task = PROMPT.split("\nTask:", 1)
+TASK_PROMPT = "Task:" + _task
+
+@lru_cache(maxsize=4)
+def get_client(api_key: str) -> genai.Client:
+    """One client (and its HTTP connection pool) per API key for the whole process."""
+    return genai.Client(api_key=api_key)
+
 def ask_gemini_without_wildfire_data(api_key: str, weather_json: str) -> str:
     prompt = PROMPT.format(
         weather_json=weather_json,
     )
-    client = genai.Client(api_key=api_key)
+    client = get_client(api_key)
     resp = client.models.generate_content(
         model="gemini-2.5-flash",
         contents=prompt
@@ -144,7 +155,7 @@ def ask_gemini_without_wildfire_data(api_key: str, weather_json: str) -> str:
     return getattr(resp, "text", "").strip()
 
 def ask_gemini(api_key: str, weather_data: list) -> str:
-    client = genai.Client(api_key=api_key)
+    client = get_client(api_key)
     prompt = PROMPT.format(
         weather_data=weather_data
     )
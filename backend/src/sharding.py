@@ -0,0 +1,106 @@
+import json
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+SHARD_BY = ("hash", "state")
+SHARD_COLUMNS = ["station_url", "latitude", "longitude", "timestamp", "fire_probability"]
+
+
+def station_hash_shards(station_urls: Sequence[str], n_shards: int) -> np.ndarray:
+    """
+    Shard per station from a CRC32 of its URL. Stable across processes,
+    machines and Python versions, unlike hash().
+    """
+    return np.array([zlib.crc32(url.rstrip("/").encode()) % n_shards for url in station_urls], dtype=np.int64)
+
+
+def state_shards(states: Sequence[Optional[str]], station_urls: Sequence[str], n_shards: int) -> np.ndarray:
+    """
+    Keep each state's stations on one shard, packing states largest-first
+    onto the least loaded shard. Stations with no state are hashed.
+    """
+    states = pd.Series(list(states), dtype=object)
+    shards = station_hash_shards(station_urls, n_shards)
+    load = np.bincount(shards[states.isna().to_numpy()], minlength=n_shards)
+    for state, count in states.value_counts().items():
+        target = int(np.argmin(load))
+        shards[(states == state).to_numpy()] = target
+        load[target] += count
+    return shards
+
+
+def assign_shards(stations: pd.DataFrame, n_shards: int, by: str = "hash") -> np.ndarray:
+    """Shard index (0..n_shards-1) for every row of stations (station_url, latitude, longitude)."""
+    if n_shards < 1:
+        raise ValueError("n_shards must be at least 1")
+    if by not in SHARD_BY:
+        raise ValueError(f"by must be one of {', '.join(SHARD_BY)}, got {by!r}")
+    urls = stations["station_url"].tolist()
+    if by == "hash":
+        return station_hash_shards(urls, n_shards)
+
+    from src.filter_by_state import _load_states, states_for_points
+
+    states = states_for_points(stations["latitude"].to_numpy(dtype=float), stations["longitude"].to_numpy(dtype=float),
+                               _load_states()["STUSPS"].tolist())
+    return state_shards(states, urls, n_shards)
+
+
+def select_shard(stations: pd.DataFrame, index: int, n_shards: int, by: str = "hash") -> pd.DataFrame:
+    if not 0 <= index < n_shards:
+        raise ValueError(f"shard index must be between 0 and {n_shards - 1}, got {index}")
+    return stations[assign_shards(stations, n_shards, by) == index].reset_index(drop=True)
+
+
+def shard_dir(predictions_dir: Path, run_id: str) -> Path:
+    return Path(predictions_dir) / "shards" / run_id
+
+
+def shard_output_path(predictions_dir: Path, run_id: str, index: int, n_shards: int) -> Path:
+    return shard_dir(predictions_dir, run_id) / f"part-{index:04d}-of-{n_shards:04d}.csv"
+
+
+def write_shard_manifest(output_path: Path, **info) -> None:
+    """Written after the shard's CSV is complete, so its presence marks the shard as done."""
+    Path(output_path).with_suffix(".json").write_text(json.dumps(info, indent=2, default=str), encoding="utf-8")
+
+
+def merge_shard_outputs(predictions_dir: Path, run_id: str, n_shards: int,
+                        allow_missing: bool = False) -> pd.DataFrame:
+    """
+    Concatenate every finished shard of a run into one prediction set.
+    Raises if a shard hasn't finished, unless allow_missing is set. Finished
+    shards that scored nothing count as empty.
+    """
+    frames: List[pd.DataFrame] = []
+    missing: List[int] = []
+    for index, manifest in shard_summary(predictions_dir, run_id, n_shards).items():
+        path = shard_output_path(predictions_dir, run_id, index, n_shards)
+        if manifest is None:
+            missing.append(index)
+            continue
+        if manifest.get("scored") == 0 or not path.exists():
+            # Finished but nothing scored (e.g. every fetch failed): contributes no rows
+            continue
+        frames.append(pd.read_csv(path))
+    if missing:
+        message = f"{len(missing)} of {n_shards} shards missing for run {run_id}: {missing}"
+        if not allow_missing:
+            raise FileNotFoundError(message)
+        print(f"[WARN] {message}")
+    if not frames:
+        return pd.DataFrame(columns=SHARD_COLUMNS)
+    return pd.concat(frames, ignore_index=True).drop_duplicates("station_url", keep="last").reset_index(drop=True)
+
+
+def shard_summary(predictions_dir: Path, run_id: str, n_shards: int) -> Dict[int, Optional[dict]]:
+    """Manifest of each shard of a run (None for shards that haven't finished)."""
+    out: Dict[int, Optional[dict]] = {}
+    for index in range(n_shards):
+        manifest = shard_output_path(predictions_dir, run_id, index, n_shards).with_suffix(".json")
+        out[index] = json.loads(manifest.read_text(encoding="utf-8")) if manifest.exists() else None
+    return out
@@ -0,0 +1,65 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_STATION_CSVS = (ROOT / "src" / "weather_stations_all_states_valid.csv",)
+EARTH_RADIUS_KM = 6371.0
+
+
+class StationIndex:
+    """
+    Haversine BallTree over station coordinates, for k-nearest and radius
+    lookups without asking api.weather.gov's /points endpoint.
+
+    Distances are great-circle kilometres. Results are (station_url,
+    distance_km) pairs, nearest first.
+    """
+
+    def __init__(self, stations: pd.DataFrame):
+        stations = stations.dropna(subset=["latitude", "longitude"]).drop_duplicates("station_url")
+        self.station_urls = stations["station_url"].str.rstrip("/").to_numpy()
+        self.coords = stations[["latitude", "longitude"]].to_numpy(dtype=float)
+        self._tree = BallTree(np.radians(self.coords), metric="haversine")
+
+    @classmethod
+    def from_csvs(cls, paths: Sequence[Union[str, Path]] = DEFAULT_STATION_CSVS) -> "StationIndex":
+        frames = [pd.read_csv(p, usecols=["station_url", "latitude", "longitude"]) for p in paths]
+        return cls(pd.concat(frames, ignore_index=True))
+
+    def __len__(self) -> int:
+        return len(self.station_urls)
+
+    def nearest(self, lat: float, lon: float, k: int = 1,
+                max_km: Optional[float] = None) -> List[Tuple[str, float]]:
+        """The k stations closest to (lat, lon), dropping any farther than max_km."""
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+        distance, index = self._tree.query(np.radians([[lat, lon]]), k=k)
+        out = [(self.station_urls[i], float(d * EARTH_RADIUS_KM)) for i, d in zip(index[0], distance[0])]
+        if max_km is not None:
+            out = [(url, km) for url, km in out if km <= max_km]
+        return out
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[str, float]]:
+        """Every station within radius_km of (lat, lon)."""
+        index, distance = self._tree.query_radius(np.radians([[lat, lon]]), r=radius_km / EARTH_RADIUS_KM,
+                                                  return_distance=True, sort_results=True)
+        return [(self.station_urls[i], float(d * EARTH_RADIUS_KM)) for i, d in zip(index[0], distance[0])]
+
+
+@lru_cache(maxsize=4)
+def _load(paths: Tuple[str, ...]) -> StationIndex:
+    index = StationIndex.from_csvs(paths)
+    print(f"Station index: {len(index)} stations from {', '.join(paths)}")
+    return index
+
+
+def load_station_index(paths: Sequence[Union[str, Path]] = DEFAULT_STATION_CSVS) -> StationIndex:
+    """Station index for the given CSVs, built once per process."""
+    return _load(tuple(str(p) for p in paths))
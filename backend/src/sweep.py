@@ -0,0 +1,146 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src import http_client
+from src.observations import FetchStats
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_REQUESTS_PER_SECOND = 5.0  # api.weather.gov starts returning 429s well above this
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces calls so that at most `rate` of them
+    start per second, no matter how many threads share it.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def acquire(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+@dataclass
+class StationResult:
+    station_url: str
+    latitude: float
+    longitude: float
+    data: Any = None
+    error: Optional[str] = None
+    latency: float = 0.0
+    timestamp: str = ""
+    fetch_stats: FetchStats = field(default_factory=FetchStats)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class SweepReport:
+    total: int
+    failures: int
+    wall_clock: float
+    latencies: List[float] = field(default_factory=list)
+    connections_opened: int = 0
+    connections_reused: int = 0
+    pages: int = 0
+    bytes_downloaded: int = 0
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        return float(np.percentile(self.latencies, q))
+
+    def summary(self) -> str:
+        return (
+            f"Sweep finished in {self.wall_clock:.2f}s | "
+            f"stations: {self.total} | ok: {self.total - self.failures} | failed: {self.failures} | "
+            f"latency p50={self.percentile(50):.2f}s p90={self.percentile(90):.2f}s "
+            f"p99={self.percentile(99):.2f}s max={max(self.latencies, default=0.0):.2f}s | "
+            f"connections opened={self.connections_opened} reused={self.connections_reused} | "
+            f"pages={self.pages} ({self.pages / max(self.total, 1):.1f}/station) "
+            f"downloaded={self.bytes_downloaded / 1e6:.2f} MB "
+            f"({self.bytes_downloaded / max(self.total, 1) / 1e3:.1f} kB/station)"
+        )
+
+
+def _fetch_one(fetch: Callable[[str], Any], station_url: str, latitude: float, longitude: float) -> StationResult:
+    start = time.perf_counter()
+    result = StationResult(station_url=station_url, latitude=latitude, longitude=longitude)
+    try:
+        result.data = fetch(station_url, stats=result.fetch_stats)
+    except Exception as e:
+        result.error = str(e) or type(e).__name__
+    result.latency = time.perf_counter() - start
+    result.timestamp = datetime.now(timezone.utc).isoformat()
+    return result
+
+
+def run_sweep(
+    stations_df: pd.DataFrame,
+    fetch: Callable[[str], Any],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+) -> Tuple[List[StationResult], SweepReport]:
+    """
+    Call `fetch(station_url, stats=FetchStats())` for every row of stations_df on a thread pool.
+
+    All HTTP calls made through src.http_client share one RateLimiter for the
+    duration of the sweep, so `requests_per_second` is a global budget rather
+    than a per-thread one. Results come back in the same order as stations_df.
+    """
+    stations = list(zip(stations_df["station_url"], stations_df["latitude"], stations_df["longitude"]))
+    total = len(stations)
+    results: List[Optional[StationResult]] = [None] * total
+
+    stats_before = http_client.connection_stats()
+    previous_limiter = http_client.set_rate_limiter(RateLimiter(requests_per_second))
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {
+                pool.submit(_fetch_one, fetch, url, lat, lon): i
+                for i, (url, lat, lon) in enumerate(stations)
+            }
+            done = 0
+            for future in as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                done += 1
+                if result.ok:
+                    print(f"{done}/{total} Fetched station: {result.station_url} ({result.latency:.2f}s)")
+                else:
+                    print(f"{done}/{total} Error fetching data for station {result.station_url}: {result.error}")
+    finally:
+        http_client.set_rate_limiter(previous_limiter)
+    stats_after = http_client.connection_stats()
+
+    report = SweepReport(
+        total=total,
+        failures=sum(1 for r in results if not r.ok),
+        wall_clock=time.perf_counter() - start,
+        latencies=[r.latency for r in results],
+        connections_opened=stats_after["connections_opened"] - stats_before["connections_opened"],
+        connections_reused=stats_after["connections_reused"] - stats_before["connections_reused"],
+        pages=sum(r.fetch_stats.pages for r in results),
+        bytes_downloaded=sum(r.fetch_stats.bytes for r in results),
+    )
+    return results, report
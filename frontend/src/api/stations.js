@@ -1,6 +1,7 @@
 import { api } from "./client";
 
-export async function fetchStations() {
-  const { data } = await api.get("/stations");
+// params: { bbox: "minLon,minLat,maxLon,maxLat", zoom, limit, offset } -- all optional
+export async function fetchStations(params = {}) {
+  const { data } = await api.get("/stations", { params });
   return data;
-}
\ No newline at end of file
+}